@@ -0,0 +1 @@
+"""Benchmarks for the import and API hot paths; run each module with python -m benchmarks.<name>."""
@@ -0,0 +1,130 @@
+import argparse
+import csv
+import random
+from typing import Dict, Iterator, Optional
+
+# Synthetic rows shaped like data_to_import/*.csv: same header, pipe-delimited
+# "Experience Details" and "Skills", the "Â·" mojibake, blanks and repeated URLs.
+#
+#   python -m benchmarks.generator 1000000 -o bench_1m.csv --seed 7
+
+SHEET_HEADER = [
+    "Name", "Title", "Location", "Education", "Profile URL",
+    "Total Experience", "Experience Details", "Skills",
+]
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Amit", "Ananya", "Ankit", "Arjun", "Deepak", "Divya", "Gaurav", "Ishaan",
+    "Kavya", "Manish", "Meera", "Neha", "Nikhil", "Pooja", "Priya", "Rahul", "Riya", "Rohan",
+    "Sakshi", "Sanjay", "Shreya", "Siddharth", "Sneha", "Surya", "Tanvi", "Varun", "Vikram", "Yash",
+]
+LAST_NAMES = [
+    "Agarwal", "Bansal", "Chauhan", "Das", "Gupta", "Iyer", "Jain", "Kapoor", "Kumar", "Mehta",
+    "Mishra", "Nair", "Patel", "Rao", "Reddy", "Sharma", "Singh", "Verma", "Yadav", "V.",
+]
+ROLES = [
+    "Software Engineer", "Senior Software Engineer", "SDE 2", "SDE 3", "Backend Engineer",
+    "Frontend Engineer", "Full Stack Developer", "Engineering Manager", "Product Engineer",
+    "Associate Product Engineer", "Data Engineer", "Machine Learning Engineer", "Tech Lead",
+]
+COMPANIES = [
+    "Dream11", "Games24x7", "MPL", "Zupee", "Gameskraft", "Baazi Games", "Times Internet", "Groyyo",
+    "Flipkart", "Swiggy", "Zomato", "Razorpay", "PhonePe", "Paytm", "Infosys", "TCS", "Wipro",
+    "Microsoft", "Amazon", "Google", "Gameramp", "Nazara Technologies", "Junglee Games",
+]
+LOCATIONS = [
+    "Bengaluru, Karnataka, India", "Delhi, India", "Gurugram, Haryana, India", "Mumbai, Maharashtra, India",
+    "Pune, Maharashtra, India", "Hyderabad, Telangana, India", "Noida, Uttar Pradesh, India",
+    "Chennai, Tamil Nadu, India", "Kolkata, West Bengal, India", "India",
+]
+INSTITUTES = [
+    "Delhi Technological University (Formerly DCE)", "Indian Institute of Technology, Delhi",
+    "NIT Allahabad", "PES University", "Lovely Professional University", "Manipal Institute of Technology",
+    "The LNM Institute of Information Technology", "Visvesvaraya National Institute of Technology",
+    "Indira Gandhi National Open University", "BITS Pilani",
+]
+# Mixed spellings on purpose, so skill canonicalization does real work
+SKILLS = [
+    "React.js", "React", "ReactJS", "Node.js", "Nodejs", "JavaScript", "TypeScript", "HTML5", "HTML",
+    "CSS", "Cascading Style Sheets (CSS)", "Java", "Spring Boot", "Python", "Django", "Go", "Golang",
+    "C++", "Kotlin", "MongoDB", "MySQL", "PostgreSQL", "Redis", "Kafka", "AWS", "Docker", "Kubernetes",
+    "GraphQL", "Redux", "Next.js", "Data Structures", "Algorithms", "System Design", "Unity",
+    "Machine Learning", "REST APIs", "Git", "Microservices", "Problem Solving",
+]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+def _duration(months: int) -> str:
+    years, months = divmod(months, 12)
+    parts = []
+    if years:
+        parts.append(f"{years} yr{'s' if years > 1 else ''}")
+    if months or not years:
+        parts.append(f"{months} mo{'s' if months != 1 else ''}")
+    return " ".join(parts)
+
+def _experience(rng: random.Random, end_year: int = 2025) -> tuple:
+    """("Company | Role | Jul 2023 - Sep 2024 Â· 1 yr 3 mos || ...", total months), newest role first."""
+    entries = []
+    total = 0
+    end = end_year * 12 + rng.randrange(12)
+    for index in range(rng.randint(1, 5)):
+        length = rng.randint(4, 48)
+        start = end - length + 1
+        finish = "Present" if index == 0 and rng.random() < 0.6 else f"{MONTHS[end % 12]} {end // 12}"
+        span = f"{MONTHS[start % 12]} {start // 12} - {finish} Â· {_duration(length)}"
+        entry = f"{rng.choice(COMPANIES)} | {rng.choice(ROLES)} | {span}"
+        if rng.random() < 0.5:
+            # Sheets often repeat the date range in a second column
+            entry += f" | {span}"
+        entries.append(entry)
+        total += length
+        end = start - rng.randint(0, 6)
+    return " || ".join(entries), total
+
+def generate_rows(count: int, seed: Optional[int] = 0, duplicate_rate: float = 0.02, blank_rate: float = 0.1) -> Iterator[Dict[str, str]]:
+    """Yield `count` sheet rows; `duplicate_rate` repeat an earlier URL, `blank_rate` leave optional cells empty."""
+    rng = random.Random(seed)
+    for index in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        company = rng.choice(COMPANIES)
+        if index and rng.random() < duplicate_rate:
+            url_index = rng.randrange(index)
+        else:
+            url_index = index
+        row = {
+            "Name": name,
+            "Title": f"{rng.choice(ROLES)} {rng.choice(['at', '@'])} {company}",
+            "Location": rng.choice(LOCATIONS),
+            "Education": "",
+            "Profile URL": f"https://www.linkedin.com/in/bench-{url_index:08d}/",
+            "Total Experience": "",
+            "Experience Details": "",
+            "Skills": "",
+        }
+        if rng.random() >= blank_rate:
+            row["Education"] = " | ".join(rng.sample(INSTITUTES, rng.randint(1, 2)))
+        if rng.random() >= blank_rate:
+            row["Experience Details"], months = _experience(rng)
+            row["Total Experience"] = _duration(months)
+        if rng.random() >= blank_rate:
+            row["Skills"] = " | ".join(rng.sample(SKILLS, rng.randint(3, 25)))
+        yield row
+
+def write_sheet(path: str, count: int, seed: Optional[int] = 0, duplicate_rate: float = 0.02, blank_rate: float = 0.1) -> str:
+    """Stream `count` synthetic rows to a CSV at `path`; memory use does not grow with `count`."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SHEET_HEADER)
+        writer.writeheader()
+        writer.writerows(generate_rows(count, seed, duplicate_rate, blank_rate))
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic LinkedIn profile sheet.")
+    parser.add_argument("rows", type=int, help="Number of rows to generate")
+    parser.add_argument("-o", "--output", default="bench_profiles.csv", help="CSV file to write")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same sheet")
+    parser.add_argument("--duplicate-rate", type=float, default=0.02, help="Share of rows repeating an earlier profile URL")
+    parser.add_argument("--blank-rate", type=float, default=0.1, help="Share of optional cells left empty")
+    args = parser.parse_args()
+    write_sheet(args.output, args.rows, args.seed, args.duplicate_rate, args.blank_rate)
+    print(f"Wrote {args.rows} rows to {args.output}")
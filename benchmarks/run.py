@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Benchmark suite for the import pipeline and the read endpoints, run against a
+# local mongod in its own database (dropped and rebuilt on every run):
+#
+#   python -m benchmarks.run --rows 100000 --output results.json
+#   python -m benchmarks.run --rows 100000 --compare results.json --threshold 0.15
+#
+# Results are JSON: {"meta": {...}, "benchmarks": {name: {metric: value}}}. With
+# --compare, metrics worse than the baseline by more than --threshold are reported
+# as regressions and the exit status is 1.
+
+DEFAULT_URI = "mongodb://localhost:27017"
+DEFAULT_DATABASE = "linkedin_bench"
+BENCH_CATEGORIES = ["SSE", "SDE2", "EM", "Frontend", "Backend", "Data", "ML", "Mobile", "QA", "DevOps"]
+
+# name -> query parameters for /profiles/search-adv
+SEARCH_CASES: Dict[str, Dict[str, Any]] = {
+    "all": {},
+    "role": {"role": "senior"},
+    "location": {"location": "bengaluru"},
+    "skill": {"skill": "react"},
+    "skills_all": {"skill": "react,node.js,typescript", "skill_mode": "all"},
+    "skills_any": {"skill": "kafka,redis", "skill_mode": "any"},
+    "location_skill": {"location": "pune", "skill": "java"},
+    "category": {"category": "SSE"},
+    "experience": {"min_exp": 5, "max_exp": 8},
+    "q_prefix": {"q": "game"},
+    "q_text": {"q": "machine learning", "search_mode": "text"},
+    "q_regex": {"q": "engineer", "search_mode": "regex"},
+}
+
+# Metrics where a larger value is better; every other metric is a duration
+HIGHER_IS_BETTER = {"rows_per_second"}
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(_percentile(samples, 0.5), 3),
+        "p95_ms": round(_percentile(samples, 0.95), 3),
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def _timed_requests(client, path: str, params: Dict[str, Any], iterations: int, warmup: int = 2) -> Dict[str, float]:
+    for _ in range(warmup):
+        (await client.get(path, params=params)).raise_for_status()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = await client.get(path, params=params)
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return latency_summary(samples)
+
+def count_rows(sheet: str) -> int:
+    from etl import read_raw_chunks, resolve_mapping
+
+    _, columns = resolve_mapping(sheet)
+    return sum(len(chunk) for chunk in read_raw_chunks(sheet, 50000, list(columns)))
+
+def bench_clean(sheet: str, rows: int) -> Dict[str, Dict[str, Any]]:
+    """Per-row clean_profile_data against the column-wise clean_profiles_frame on the same rows."""
+    from etl import map_chunk, read_raw_chunks, resolve_mapping
+    from utils import clean_profile_data, clean_profiles_frame
+
+    _, columns = resolve_mapping(sheet)
+    # The frame the importer hands to clean_profiles_frame: mapped columns under model keys
+    frame = map_chunk(next(read_raw_chunks(sheet, rows, list(columns))), columns)
+    records = frame.to_dict("records")
+    start = time.perf_counter()
+    for record in records:
+        clean_profile_data(record)
+    per_row = time.perf_counter() - start
+    start = time.perf_counter()
+    clean_profiles_frame(frame)
+    per_frame = time.perf_counter() - start
+    return {
+        "clean_profile_data": {"seconds": round(per_row, 4), "rows_per_second": round(len(records) / per_row, 1)},
+        "clean_profiles_frame": {"seconds": round(per_frame, 4), "rows_per_second": round(len(records) / per_frame, 1)},
+    }
+
+async def bench_import(sheet: str, rows: int) -> Dict[str, Dict[str, Any]]:
+    """First import into an empty collection, then a re-import where every row is unchanged."""
+    from db import create_indexes, get_collection
+    from etl import import_csv_file
+
+    results = {}
+    await create_indexes()
+    for name in ("import_csv_file", "import_csv_file.reimport"):
+        start = time.perf_counter()
+        stats = await import_csv_file(sheet)
+        elapsed = time.perf_counter() - start
+        results[name] = {"seconds": round(elapsed, 3), "rows_per_second": round(rows / elapsed, 1)}
+        print(f"  {name}: {elapsed:.2f}s (inserted={stats['inserted']}, unchanged={stats['unchanged']})")
+    # Synthetic URLs end in a digit, which spreads profiles over ten categories
+    collection = await get_collection()
+    for digit, category in enumerate(BENCH_CATEGORIES):
+        await collection.update_many({"profile_url": {"$regex": f"{digit}/$"}}, {"$set": {"category": category}})
+    return results
+
+async def bench_api(rows: int, iterations: int, depth: int) -> Dict[str, Dict[str, Any]]:
+    import httpx
+    from cache import result_cache, totals_cache
+    from categories import CATEGORY_TOP_N, refresh_category_summaries
+    from main import app
+
+    # Measure the database and serialization work, not cache hits
+    result_cache.ttl = 0
+    totals_cache.ttl = 0
+    results = {}
+    await refresh_category_summaries()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, params in SEARCH_CASES.items():
+            results[f"search_adv.{name}"] = await _timed_requests(client, "/api/profiles/search-adv", {**params, "view": "summary", "limit": 20}, iterations)
+            print(f"  search_adv.{name}: {results[f'search_adv.{name}']['p50_ms']}ms p50")
+        results["search_faceted.skill"] = await _timed_requests(client, "/api/profiles/search-faceted", {"skill": "react", "view": "summary", "limit": 20}, iterations)
+        results["search_adv.full_view"] = await _timed_requests(client, "/api/profiles/search-adv", {"limit": 100}, iterations)
+
+        # The same page reached with skip and with a keyset cursor
+        depth = max(0, min(depth, rows - 20))
+        results["pagination.skip"] = await _timed_requests(client, "/api/profiles/search-adv", {"view": "summary", "limit": 20, "skip": depth, "count": "none"}, iterations)
+        cursor = None
+        for _ in range(depth // 1000):
+            page = (await client.get("/api/profiles/search-adv", params={"fields": "name", "limit": 1000, "count": "none", **({"cursor": cursor} if cursor else {})})).json()
+            cursor = page["next_cursor"]
+        params = {"view": "summary", "limit": 20, "count": "none", **({"cursor": cursor} if cursor else {})}
+        results["pagination.cursor"] = await _timed_requests(client, "/api/profiles/search-adv", params, iterations)
+        results["pagination.skip"]["depth"] = results["pagination.cursor"]["depth"] = depth
+
+        results["by_category"] = await _timed_requests(client, "/api/profiles/by-category", {"limit": 6}, iterations)
+        results["by_category.live"] = await _timed_requests(client, "/api/profiles/by-category", {"limit": CATEGORY_TOP_N + 1}, iterations)
+
+        for export_format in ("csv", "ndjson"):
+            start = time.perf_counter()
+            exported = 0
+            async with client.stream("GET", "/api/profiles/export-csv", params={"format": export_format}) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    exported += 1
+            if export_format == "csv":
+                exported -= 1
+            elapsed = time.perf_counter() - start
+            results[f"export.{export_format}"] = {"seconds": round(elapsed, 3), "rows_per_second": round(exported / elapsed, 1)}
+            print(f"  export.{export_format}: {elapsed:.2f}s")
+    return results
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Metrics in both runs that got worse than the baseline by more than `threshold` (0.1 = 10%)."""
+    regressions = []
+    for name, metrics in results["benchmarks"].items():
+        base_metrics = baseline.get("benchmarks", {}).get(name)
+        if not base_metrics:
+            continue
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if metric == "depth" or not isinstance(value, (int, float)) or not base:
+                continue
+            change = (value - base) / base
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            marker = "REGRESSION" if worse > threshold else ""
+            print(f"  {name:32} {metric:16} {base:>12} -> {value:>12} ({change:+.1%}) {marker}")
+            if marker:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+async def run_suite(sheet: str, rows: int, iterations: int, depth: int, clean_rows: int, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    from db import get_collection, get_manifest_collection
+
+    def selected(group: str) -> bool:
+        return not only or group in only
+
+    collection = await get_collection()
+    await collection.drop()
+    await (await get_manifest_collection()).drop()
+
+    benchmarks = {}
+    if selected("clean"):
+        print("clean")
+        benchmarks.update(bench_clean(sheet, min(rows, clean_rows)))
+    # The API benchmarks read what the import wrote
+    if selected("import") or selected("api"):
+        print("import")
+        benchmarks.update(await bench_import(sheet, rows))
+    if selected("api"):
+        print("api")
+        benchmarks.update(await bench_api(rows, iterations, depth))
+    return benchmarks
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark imports and read endpoints against a local MongoDB.")
+    parser.add_argument("--rows", type=int, default=100000, help="Synthetic rows to generate (ignored with --sheet)")
+    parser.add_argument("--sheet", help="Benchmark this CSV/Excel sheet instead of a generated one")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=20, help="Timed requests per API benchmark")
+    parser.add_argument("--depth", type=int, default=10000, help="Row offset for the deep pagination benchmarks")
+    parser.add_argument("--clean-rows", type=int, default=20000, help="Rows used by the cleaning benchmarks")
+    parser.add_argument("--only", nargs="*", choices=["clean", "import", "api"], help="Run only these groups")
+    parser.add_argument("--mongodb-uri", default=DEFAULT_URI)
+    parser.add_argument("--database", default=DEFAULT_DATABASE, help="Database to use; it is dropped and rebuilt")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown before a metric is flagged (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    # Set before the app modules are imported so they connect to the benchmark database
+    os.environ["MONGODB_URI"] = args.mongodb_uri
+    os.environ["DATABASE_NAME"] = args.database
+
+    sheet = args.sheet
+    rows = args.rows
+    if not sheet:
+        from benchmarks.generator import write_sheet
+
+        sheet = os.path.join(tempfile.gettempdir(), f"bench_profiles_{rows}_{args.seed}.csv")
+        if not os.path.exists(sheet):
+            print(f"Generating {rows} rows into {sheet}")
+            write_sheet(sheet, rows, args.seed)
+    else:
+        rows = count_rows(sheet)
+
+    benchmarks = asyncio.run(run_suite(sheet, rows, args.iterations, args.depth, args.clean_rows, args.only))
+    results = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rows": rows,
+            "sheet": None if args.sheet is None else os.path.basename(args.sheet),
+            "seed": args.seed if args.sheet is None else None,
+            "iterations": args.iterations,
+        },
+        "benchmarks": benchmarks,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare} (commit {baseline.get('meta', {}).get('commit')})")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
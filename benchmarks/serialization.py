@@ -0,0 +1,71 @@
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import pandas as pd
+from models import Profile, ProfileSummary
+from serialization import FastJSONResponse, compile_renderer
+from utils import clean_profiles_frame
+
+# Compares the CPU cost of rendering one list page the old way (a Profile per item,
+# jsonable_encoder, stdlib json) with precompiled renderers and FastJSONResponse.
+# Needs no database: documents are built from a sheet the way the importer stores them.
+#
+#   python -m benchmarks.serialization --page-size 100 --pages 200
+
+DEFAULT_SHEET = "data_to_import/Omaza Games profiles - SSE.csv"
+# Header of the bundled sheets -> model keys; etl is not imported so no client is created
+SHEET_COLUMNS = {
+    "Name": "name", "Title": "current_role", "Location": "location", "Education": "education",
+    "Experience Details": "experience", "Total Experience": "total_experience",
+    "Skills": "skills", "Profile URL": "profile_url",
+}
+
+def load_documents(sheet: str) -> List[Dict[str, Any]]:
+    # Empty cells as "" rather than NaN, which the model path's stdlib encoder rejects
+    frame = pd.read_csv(sheet, usecols=lambda c: c in SHEET_COLUMNS, dtype=str, keep_default_na=False)
+    frame = frame.rename(columns=SHEET_COLUMNS)
+    profiles = clean_profiles_frame(frame)
+    now = datetime.utcnow()
+    return [{**p, "_id": ObjectId(), "last_scraped_at": now} for p in profiles]
+
+def _model_page(model: type, docs: List[Dict[str, Any]]) -> bytes:
+    items = [model(**{**doc, "_id": str(doc["_id"])}) for doc in docs]
+    return JSONResponse(jsonable_encoder(items)).body
+
+def _fast_page(render: Callable[[Dict[str, Any]], Dict[str, Any]], docs: List[Dict[str, Any]]) -> bytes:
+    return FastJSONResponse([render(doc) for doc in docs]).body
+
+def cpu_ms_per_page(render_page: Callable[[List[Dict[str, Any]]], bytes], pages: List[List[Dict[str, Any]]]) -> float:
+    start = time.process_time()
+    for page in pages:
+        render_page(page)
+    return (time.process_time() - start) * 1000 / len(pages)
+
+def run(sheet: str = DEFAULT_SHEET, page_size: int = 100, pages: int = 200) -> Dict[str, Any]:
+    docs = load_documents(sheet)
+    batches = [[docs[(i * page_size + j) % len(docs)] for j in range(page_size)] for i in range(pages)]
+    render_profile = compile_renderer(Profile)
+    render_summary = compile_renderer(ProfileSummary)
+    results = {}
+    for view, model, render in (("full", Profile, render_profile), ("summary", ProfileSummary, render_summary)):
+        before = cpu_ms_per_page(lambda page: _model_page(model, page), batches)
+        after = cpu_ms_per_page(lambda page: _fast_page(render, page), batches)
+        results[view] = {
+            "model_ms_per_page": round(before, 3),
+            "fast_ms_per_page": round(after, 3),
+            "speedup": round(before / after, 1) if after else None,
+        }
+    return {"page_size": page_size, "pages": pages, "documents": len(docs), "results": results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark list page serialization.")
+    parser.add_argument("--sheet", default=DEFAULT_SHEET, help="CSV/Excel sheet to build documents from")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sheet, args.page_size, args.pages), indent=2))
@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import importlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOTALS_CACHE_TTL = float(os.getenv("TOTALS_CACHE_TTL", "60"))
+TOTALS_CACHE_SIZE = int(os.getenv("TOTALS_CACHE_SIZE", "1024"))
+# count=approx stops counting here and reports the total as approximate
+APPROX_COUNT_LIMIT = int(os.getenv("APPROX_COUNT_LIMIT", "10000"))
+
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "30"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))
+# "memory" (per worker), "redis" (shared, needs the redis package) or "module:Class"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Seconds the write generation is read from memory before storage is asked again; writes
+# by other processes (CLI imports, other workers) invalidate cached results within this long
+GENERATION_CHECK_INTERVAL = float(os.getenv("GENERATION_CHECK_INTERVAL", "2"))
+
+def normalize_key(*parts: Any) -> str:
+    """Stable string key for query dicts and parameter values."""
+    return json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+
+class TTLCache:
+    """Size-capped in-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str, generation: Optional[int] = None) -> Optional[Any]:
+        """Return a live entry; when `generation` is given, only one written at that generation."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, entry_generation, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        if generation is not None and entry_generation != generation:
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, generation: int = 0, ttl: Optional[float] = None) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = (value, generation, time.monotonic() + (ttl if ttl is not None else self.ttl))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class CacheBackend:
+    """Storage for serialized responses.
+
+    Implement this to share cached results across uvicorn workers.
+    """
+
+    name = "base"
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def size(self) -> Optional[int]:
+        return None
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process backend: an LRU TTLCache."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL):
+        self._cache = TTLCache(max_entries, ttl)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def size(self) -> Optional[int]:
+        return len(self._cache)
+
+class RedisCacheBackend(CacheBackend):
+    """Shared backend; eviction is left to Redis' maxmemory policy (e.g. allkeys-lru)."""
+
+    name = "redis"
+    PREFIX = "ldm:cache:"
+
+    def __init__(self, url: str = CACHE_REDIS_URL):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._redis.get(self.PREFIX + key)
+        return value.decode() if value is not None else None
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._redis.set(self.PREFIX + key, value, px=int(ttl * 1000))
+
+def load_backend(spec: str = CACHE_BACKEND) -> CacheBackend:
+    if spec == "memory":
+        return MemoryCacheBackend()
+    if spec == "redis":
+        return RedisCacheBackend()
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+class WriteGeneration:
+    """The write generation, kept in storage so a write from any process invalidates every cache.
+
+    It is read from memory for up to `interval` seconds; bumps from this process are seen at once.
+    """
+
+    def __init__(self, interval: float = GENERATION_CHECK_INTERVAL):
+        self.interval = interval
+        self._value: Optional[int] = None
+        self._read_at = 0.0
+
+    @staticmethod
+    def _repository():
+        # storage imports this module (through categories), so it is imported on first use
+        from storage import repository
+
+        return repository
+
+    def _remember(self, value: int) -> int:
+        # A slow read may finish after a later bump; the counter only moves forward
+        self._value = max(value, self._value or 0)
+        self._read_at = time.monotonic()
+        return self._value
+
+    async def get(self) -> int:
+        if self._value is None or time.monotonic() - self._read_at >= self.interval:
+            return self._remember(await self._repository().get_generation())
+        return self._value
+
+    async def incr(self) -> int:
+        return self._remember(await self._repository().incr_generation())
+
+class ResultCache:
+    """Serialized response bodies keyed on (namespace, write generation, normalized params)."""
+
+    def __init__(self, backend: CacheBackend, generation: WriteGeneration, ttl: float = RESULT_CACHE_TTL):
+        self.backend = backend
+        self.generation = generation
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def key(self, namespace: str, params: Dict[str, Any]) -> str:
+        # Reading the generation up front means a write during the request files the
+        # result under the old generation, where no later request will look
+        generation = await self.generation.get()
+        return f"{namespace}:{generation}:{normalize_key(params)}"
+
+    def etag(self, key: str) -> str:
+        """Strong ETag for a result key: the body only changes with the write generation and params it contains."""
+        return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        entry = await self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        payload = json.loads(entry)
+        return payload["body"].encode(), payload["headers"]
+
+    async def set(self, key: str, body: bytes, headers: Dict[str, str]) -> None:
+        entry = json.dumps({"body": body.decode(), "headers": headers})
+        await self.backend.set(key, entry, self.ttl)
+
+    async def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": await self.backend.size(),
+            "generation": await self.generation.get(),
+        }
+
+result_cache = ResultCache(load_backend(), WriteGeneration())
+totals_cache = TTLCache(TOTALS_CACHE_SIZE, TOTALS_CACHE_TTL)
+
+async def bump_generation() -> int:
+    """Invalidate cached results and totals in every process; called by every write path."""
+    return await result_cache.generation.incr()
+
+async def current_generation() -> int:
+    return await result_cache.generation.get()
+
+async def refresh_on_write(refresh: Callable[[], Awaitable[Any]], interval: float, name: str, max_age: Optional[float] = None,
+                           full_refresh: Optional[Callable[[], Awaitable[Any]]] = None) -> None:
+    """Background loop running `refresh` whenever the write generation has moved since its last run.
+
+    With `max_age`, it also runs once its last run is that many seconds old, so writes that
+    bypassed the generation (edits made straight in the database) show up too; `full_refresh`,
+    when given, is run instead at those times, and only it resets the clock.
+    """
+    refreshed = None
+    refreshed_at = 0.0
+    while True:
+        try:
+            generation = await current_generation()
+            expired = max_age is not None and time.monotonic() - refreshed_at >= max_age
+            if generation != refreshed or expired:
+                await (full_refresh if expired and full_refresh else refresh)()
+                refreshed = generation
+                # With full_refresh, max_age counts from the last full run
+                if expired or full_refresh is None:
+                    refreshed_at = time.monotonic()
+                logger.info(f"Refreshed {name}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Refreshing {name} failed: {str(e)}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,71 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, List
+from pymongo import DeleteMany, ReplaceOne
+from cache import refresh_on_write
+from db import get_category_collection, get_collection
+from models import SUMMARY_FIELDS
+
+# Recent profiles kept per category in the materialized summaries
+CATEGORY_TOP_N = int(os.getenv("CATEGORY_TOP_N", "20"))
+# Seconds between checks for writes that made the summaries stale
+CATEGORY_REFRESH_INTERVAL = float(os.getenv("CATEGORY_REFRESH_INTERVAL", "15"))
+# Seconds after which the summaries are rebuilt even if no write was seen
+CATEGORY_MAX_AGE = float(os.getenv("CATEGORY_MAX_AGE", "600"))
+
+UNCATEGORIZED = "Uncategorized"
+
+def category_pipeline(limit: int) -> List[Dict[str, Any]]:
+    """Group by category keeping only `limit` recent summaries per group, never whole documents."""
+    return [
+        {"$group": {
+            "_id": {"$ifNull": ["$category", UNCATEGORIZED]},
+            "count": {"$sum": 1},
+            "profiles": {"$topN": {
+                "n": limit,
+                "sortBy": {"last_scraped_at": -1, "_id": -1},
+                "output": {field: f"${field}" for field in ["_id"] + SUMMARY_FIELDS},
+            }},
+        }},
+        {"$sort": {"count": -1}},
+    ]
+
+def _summary_docs(doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{**p, "_id": str(p["_id"])} for p in doc["profiles"]]
+
+async def live_category_summaries(limit: int) -> List[Dict[str, Any]]:
+    """Aggregate category summaries straight from the profiles collection."""
+    collection = await get_collection()
+    groups = []
+    async for doc in collection.aggregate(category_pipeline(limit)):
+        groups.append({"category": doc["_id"], "count": doc["count"], "profiles": _summary_docs(doc)})
+    return groups
+
+async def stored_category_summaries() -> List[Dict[str, Any]]:
+    """Read the materialized summaries, one small document per category."""
+    summaries = await get_category_collection()
+    groups = []
+    async for doc in summaries.find({}).sort("count", -1):
+        groups.append({"category": doc["_id"], "count": doc["count"], "profiles": doc["profiles"]})
+    return groups
+
+async def refresh_category_summaries() -> int:
+    """Rebuild the materialized summaries from the profiles collection; returns the category count."""
+    groups = await live_category_summaries(CATEGORY_TOP_N)
+    now = datetime.utcnow()
+    requests = [
+        ReplaceOne(
+            {"_id": group["category"]},
+            {"count": group["count"], "profiles": group["profiles"], "refreshed_at": now},
+            upsert=True,
+        )
+        for group in groups
+    ]
+    requests.append(DeleteMany({"_id": {"$nin": [group["category"] for group in groups]}}))
+    summaries = await get_category_collection()
+    await summaries.bulk_write(requests, ordered=False)
+    return len(groups)
+
+async def run_category_refresher(interval: float = CATEGORY_REFRESH_INTERVAL, max_age: float = CATEGORY_MAX_AGE) -> None:
+    """Refresh the summaries whenever the write generation has moved, and at least every `max_age` seconds."""
+    await refresh_on_write(refresh_category_summaries, interval, "category summaries", max_age)
@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from cache import bump_generation
+from search import build_search_tokens, tokenize
+from skills import canonical_skills
+from storage import repository
+from utils import canonical_profile_url, generate_profile_id, restored_profile_url
+
+logger = logging.getLogger(__name__)
+
+# Near-duplicate detection: profiles whose name + company + location + skills shingle
+# sets have a Jaccard similarity of at least DEDUP_THRESHOLD (and compatible names) are
+# clustered. MinHash signatures take DEDUP_NUM_PERM * 4 bytes per profile.
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "64"))
+# Profiles hashed per numpy batch
+SIGNATURE_BATCH_SIZE = 10000
+
+DEDUP_FIELDS = ["name", "current_company", "location", "skills", "profile_url", "last_scraped_at"]
+# Scalar fields a merged profile takes from a duplicate when its own value is empty
+FILL_FIELDS = [
+    "name", "current_role", "current_company", "location", "category", "total_experience",
+    "total_experience_months", "current_tenure_start", "experience", "education",
+]
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64(0xFFFFFFFF)
+NAME_FEATURES = ("n:", "t:")
+
+def shingles(profile: Dict[str, Any]) -> List[str]:
+    """Features compared between profiles: name trigrams and tokens, company, city and skills."""
+    name = " ".join(tokenize(profile.get("name")))
+    features = {f"n:{name[i:i + 3]}" for i in range(max(len(name) - 2, 1))} if name else set()
+    features.update(f"t:{token}" for token in name.split())
+    company = " ".join(tokenize(profile.get("current_company")))
+    if company:
+        features.add(f"c:{company}")
+    # The city is enough; "Bengaluru, Karnataka, India" and "Bengaluru" are the same place
+    city = " ".join(tokenize((profile.get("location") or "").split(",")[0]))
+    if city:
+        features.add(f"l:{city}")
+    features.update(f"s:{skill}" for skill in profile.get("skills") or [])
+    return sorted(features)
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+def names_match(a: Optional[str], b: Optional[str]) -> bool:
+    """Same first name, and every other token of the shorter name is in the longer one or is its initial ("Ankit V." ~ "Ankit Verma")."""
+    a_tokens, b_tokens = tokenize(a), tokenize(b)
+    if not a_tokens or not b_tokens or a_tokens[0] != b_tokens[0]:
+        return False
+    shorter, longer = sorted([a_tokens[1:], b_tokens[1:]], key=len)
+    return all(any(t == u or (len(t) == 1 and u.startswith(t)) for u in longer) for t in shorter)
+
+def lsh_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) whose S-curve midpoint (1/bands)^(1/rows) is closest to threshold."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        if best is None or abs(midpoint - threshold) < best[0]:
+            best = (abs(midpoint - threshold), bands, rows)
+    return best[1], best[2]
+
+class MinHasher:
+    """MinHash signatures from universal hashes (a * x + b) mod p over crc32 shingle hashes."""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_sets: List[List[str]]) -> np.ndarray:
+        """One row of num_perm minimum hashes per (non-empty) shingle set."""
+        result = np.empty((len(shingle_sets), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(shingle_sets), SIGNATURE_BATCH_SIZE):
+            batch = shingle_sets[start:start + SIGNATURE_BATCH_SIZE]
+            hashes = np.fromiter((zlib.crc32(s.encode()) for features in batch for s in features), dtype=np.uint64)
+            offsets = np.cumsum([0] + [len(features) for features in batch[:-1]])
+            # uint64 products wrap around, which still mixes the bits well enough for MinHash
+            with np.errstate(over="ignore"):
+                permuted = ((hashes[:, None] * self.a + self.b) % MERSENNE_PRIME) & MAX_HASH
+            result[start:start + len(batch)] = np.minimum.reduceat(permuted, offsets, axis=0)
+        return result
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        self.parent[self.find(i)] = self.find(j)
+
+def _candidate_pairs(signatures: np.ndarray, bands: int, rows: int) -> set:
+    """Pairs sharing at least one LSH band. Large buckets are linked to their first member only."""
+    pairs = set()
+    for band in range(bands):
+        keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows]).view(np.dtype((np.void, rows * 4))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        if counts.max(initial=0) < 2:
+            continue
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(counts)[:-1]
+        for bucket in np.split(order, bounds):
+            if len(bucket) < 2:
+                continue
+            members = bucket.tolist()
+            if len(members) <= 50:
+                pairs.update((i, j) for x, i in enumerate(members) for j in members[x + 1:])
+            else:
+                pairs.update((members[0], j) for j in members[1:])
+    return pairs
+
+def cluster_profiles(profiles: List[Dict[str, Any]], threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM) -> List[Dict[str, Any]]:
+    """Group duplicate profiles: equal canonical URLs, or MinHash/LSH near-duplicates with matching names.
+
+    Returns [{"members": [index into profiles], "similarity": lowest Jaccard similarity linking them}],
+    largest clusters first. Runs in time roughly linear in the number of profiles.
+    """
+    union_find = _UnionFind(len(profiles))
+    similarity: Dict[int, float] = {}
+    by_url: Dict[str, int] = {}
+    for i, profile in enumerate(profiles):
+        # Slug case aside: vanity slugs ignore it, and member ids stored lowercased are the same profile
+        url = canonical_profile_url(profile.get("profile_url") or "").lower()
+        if url in by_url:
+            union_find.union(i, by_url[url])
+        elif url:
+            by_url[url] = i
+
+    # A name alone ("Join LinkedIn" placeholders, bare rows) is not enough to call two profiles the same
+    indexed = [
+        (i, features) for i, features in ((i, shingles(p)) for i, p in enumerate(profiles))
+        if any(not feature.startswith(NAME_FEATURES) for feature in features)
+    ]
+    if indexed:
+        signatures = MinHasher(num_perm).signatures([features for _, features in indexed])
+        bands, rows = lsh_params(num_perm, threshold)
+        candidates = _candidate_pairs(signatures, bands, rows)
+        del signatures
+        feature_sets = [frozenset(features) for _, features in indexed]
+        first_names = [tokenize(profiles[i].get("name"))[:1] for i, _ in indexed]
+        # LSH only proposes pairs; the exact Jaccard similarity decides
+        for x, y in candidates:
+            if first_names[x] != first_names[y]:
+                continue
+            score = jaccard(feature_sets[x], feature_sets[y])
+            i, j = indexed[x][0], indexed[y][0]
+            if score >= threshold and names_match(profiles[i].get("name"), profiles[j].get("name")):
+                union_find.union(i, j)
+                for k in (i, j):
+                    similarity[k] = min(similarity.get(k, 1.0), score)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(profiles)):
+        groups.setdefault(union_find.find(i), []).append(i)
+    clusters = [
+        {"members": members, "similarity": round(min(similarity.get(i, 1.0) for i in members), 3)}
+        for members in groups.values() if len(members) > 1
+    ]
+    clusters.sort(key=lambda cluster: -len(cluster["members"]))
+    return clusters
+
+def _cluster_view(profiles: List[Dict[str, Any]], cluster: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "similarity": cluster["similarity"],
+        "profiles": [
+            {
+                "_id": str(profiles[i]["_id"]),
+                "name": profiles[i].get("name"),
+                "current_company": profiles[i].get("current_company"),
+                "location": profiles[i].get("location"),
+                "profile_url": profiles[i].get("profile_url"),
+            }
+            for i in cluster["members"]
+        ],
+    }
+
+async def find_duplicates(threshold: float = DEDUP_THRESHOLD) -> List[Dict[str, Any]]:
+    """Duplicate clusters across all stored profiles, each listing its members."""
+    profiles = [doc async for doc in repository.iter_profiles(fields=DEDUP_FIELDS)]
+    clusters = await asyncio.to_thread(cluster_profiles, profiles, threshold)
+    return [_cluster_view(profiles, cluster) for cluster in clusters]
+
+def merge_documents(docs: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(survivor, fields to set on it): the most recently scraped profile, with the
+    union of skills, empty fields filled from the others and its canonical URL."""
+    docs = sorted(docs, key=lambda doc: doc.get("last_scraped_at") or datetime.min, reverse=True)
+    survivor = docs[0]
+    fields: Dict[str, Any] = {}
+    for field in FILL_FIELDS:
+        if not survivor.get(field):
+            value = next((doc[field] for doc in docs[1:] if doc.get(field)), None)
+            if value:
+                fields[field] = value
+    skills = canonical_skills(skill for doc in docs for skill in doc.get("skills") or [])
+    if skills != (survivor.get("skills") or []):
+        fields["skills"] = skills
+    profile_url = restored_profile_url(survivor)
+    if profile_url and profile_url != survivor.get("profile_url"):
+        fields["profile_url"] = profile_url
+        fields["profile_id"] = generate_profile_id(profile_url)
+    if fields:
+        fields["search_tokens"] = build_search_tokens({**survivor, **fields})
+    return survivor, fields
+
+async def merge_duplicates(threshold: float = DEDUP_THRESHOLD) -> List[Dict[str, Any]]:
+    """Merge every duplicate cluster into its most recent profile and delete the rest."""
+    merged = []
+    for cluster in await find_duplicates(threshold):
+        docs = [doc for doc in [await repository.get(p["_id"]) for p in cluster["profiles"]] if doc]
+        if len(docs) < 2:
+            continue
+        survivor, fields = merge_documents(docs)
+        removed = [doc for doc in docs if doc is not survivor]
+        # Delete first, in one batch: the survivor's canonical URL may belong to one of them
+        await repository.delete_many([str(doc["_id"]) for doc in removed])
+        if fields:
+            await repository.update(str(survivor["_id"]), fields)
+        merged.append({
+            "_id": str(survivor["_id"]),
+            "profile_url": fields.get("profile_url", survivor.get("profile_url")),
+            "merged": [doc.get("profile_url") for doc in removed],
+            "similarity": cluster["similarity"],
+        })
+    if merged:
+        await bump_generation()
+        logger.info(f"Merged {sum(len(m['merged']) for m in merged)} duplicate profiles into {len(merged)}")
+    return merged
+
+async def main(threshold: float, merge: bool) -> None:
+    if merge:
+        result = await merge_duplicates(threshold)
+        print(json.dumps({"clusters": len(result), "removed": sum(len(m["merged"]) for m in result), "merged": result}, indent=2, default=str))
+    else:
+        clusters = await find_duplicates(threshold)
+        print(json.dumps({"clusters": len(clusters), "items": clusters}, indent=2, default=str))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report (or merge) duplicate and near-duplicate profiles.")
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD, help="Minimum Jaccard similarity (0-1)")
+    parser.add_argument("--merge", action="store_true", help="Merge each cluster into its most recent profile")
+    args = parser.parse_args()
+    asyncio.run(main(args.threshold, args.merge))
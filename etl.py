@@ -1,66 +1,424 @@
 import pandas as pd
+import asyncio
 import os
+import hashlib
+import json
 import logging
 import re
-from typing import List, Dict, Any
-from datetime import datetime
-from db import get_collection
-from utils import clean_profile_data, deduplicate_profiles
+import time
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Callable, Awaitable
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pydantic import ValidationError
+from storage import ProfileUpsert, repository
+from utils import clean_profiles_frame, iter_unique_profiles
 from models import Profile
+from search import build_search_tokens
+from cache import bump_generation
+from metrics import etl_rows, etl_stage_duration
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def import_csv_file(file_path: str, category: str = None) -> Dict[str, int]:
-    """Import data from a single CSV/Excel file."""
-    collection = await get_collection()
+# Number of upserts sent to storage per batch
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# Number of sheet rows read into memory at a time
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+# Parser processes and concurrent file writes for folder imports (0 = one per core / same as workers)
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "0"))
+IMPORT_MAX_IN_FLIGHT = int(os.getenv("IMPORT_MAX_IN_FLIGHT", "0"))
+# Cap on per-row errors returned in an import summary (all are still counted)
+MAX_REPORTED_ERRORS = 100
+# Per-chunk stages timed by import_csv_file and import_folder and reported in stats["stage_seconds"]
+ETL_STAGES = ("read", "map", "clean", "dedup", "write")
+# Cleaned fields left out of content_hash: ongoing roles count up to today, so the value
+# moves every month without the sheet changing (it still follows experience, which is hashed)
+UNHASHED_FIELDS = {"total_experience_months"}
+
+async def import_csv_file(
+    file_path: str,
+    category: str = None,
+    batch_size: int = None,
+    chunk_size: int = None,
+    skip_rows: int = 0,
+    on_progress: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None,
+    mapping: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Import data from a single CSV/Excel file.
+
+    Rows are streamed through read -> map -> clean -> dedup -> write in chunks,
+    so memory stays bounded by chunk_size/batch_size rather than the file size.
+    `mapping` names a MAPPING_PROFILES entry; by default it is detected from the header.
+    `on_progress(rows, stats)` is awaited once each chunk is fully written, so
+    `rows` can be passed back as `skip_rows` to resume an interrupted import.
+    """
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+
+    mapping, columns = resolve_mapping(file_path, mapping)
+    stats = _new_stats()
+    stage_seconds = dict.fromkeys(ETL_STAGES, 0.0)
+    seen_urls = set()
+    rows = skip_rows
+    chunks = _skip_rows(read_raw_chunks(file_path, chunk_size, list(columns)), skip_rows)
+    while True:
+        # Parse and clean off the event loop so the API stays responsive during imports
+        prepared = await asyncio.to_thread(_prepare_next_chunk, chunks, columns, stage_seconds)
+        if prepared is None:
+            break
+        chunk_rows, profiles = prepared
+        rows += chunk_rows
+        etl_rows.inc(chunk_rows)
+        with _stage_timer("dedup", stage_seconds):
+            unique = list(iter_unique_profiles(profiles, seen_urls))
+        with _stage_timer("write", stage_seconds):
+            await _write_profiles(unique, category, batch_size, stats)
+        if on_progress:
+            await on_progress(rows, stats)
+    stats["mapping"] = mapping
+    stats["stage_seconds"] = {stage: round(seconds, 3) for stage, seconds in stage_seconds.items()}
+    return _finish_stats(file_path, category, stats, rows - skip_rows)
+
+def prepare_chunk(chunk: pd.DataFrame, columns: Dict[str, str]) -> Tuple[int, List[Dict[str, Any]], Dict[str, float]]:
+    """Map and clean one raw chunk and return (row count, cleaned profiles, seconds per stage).
+
+    Runs inside a worker process for folder imports; metrics observed there would never
+    reach /metrics, so the parent records the returned timings.
+    """
+    stage_seconds = {"map": 0.0, "clean": 0.0}
+    start = time.perf_counter()
+    chunk = map_chunk(chunk, columns)
+    stage_seconds["map"] = time.perf_counter() - start
+    start = time.perf_counter()
+    profiles = clean_profiles_frame(chunk)
+    stage_seconds["clean"] = time.perf_counter() - start
+    return len(chunk), profiles, stage_seconds
+
+@contextmanager
+def _stage_timer(stage: str, stage_seconds: Dict[str, float]) -> Iterator[None]:
+    """Add the time spent in the block to stage_seconds[stage] and the etl_stage_duration histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_stage(stage, time.perf_counter() - start, stage_seconds)
+
+def _record_stage(stage: str, elapsed: float, stage_seconds: Dict[str, float]) -> None:
+    stage_seconds[stage] += elapsed
+    etl_stage_duration.observe(elapsed, stage=stage)
+
+def _read_next_chunk(chunks: Iterator[pd.DataFrame], stage_seconds: Dict[str, float]) -> Optional[pd.DataFrame]:
+    """The next raw chunk, or None at end of file, timed as the read stage."""
+    with _stage_timer("read", stage_seconds):
+        return next(chunks, None)
+
+def _prepare_next_chunk(chunks: Iterator[pd.DataFrame], columns: Dict[str, str], stage_seconds: Dict[str, float]) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+    """Read, map and clean the next chunk and return (row count, cleaned profiles), or None at end of file."""
+    chunk = _read_next_chunk(chunks, stage_seconds)
+    if chunk is None:
+        return None
+    with _stage_timer("map", stage_seconds):
+        chunk = map_chunk(chunk, columns)
+    with _stage_timer("clean", stage_seconds):
+        profiles = clean_profiles_frame(chunk)
+    return len(chunk), profiles
+
+def _new_stats() -> Dict[str, Any]:
+    return {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0, "failed": 0, "errors": []}
+
+def _finish_stats(file_path: str, category: Optional[str], stats: Dict[str, Any], rows: int) -> Dict[str, Any]:
+    # Every unique profile ends up inserted, updated, unchanged or failed; the rest were dropped by dedup
+    stats["skipped"] = rows - stats["inserted"] - stats["updated"] - stats["unchanged"] - stats["failed"]
+    logger.info(f"Imported {file_path} with category '{category}': inserted={stats['inserted']}, updated={stats['updated']}, unchanged={stats['unchanged']}, skipped={stats['skipped']}, failed={stats['failed']}")
+    if category:
+        stats["category"] = category
+    return stats
+
+def resolve_mapping(file_path: str, mapping: Optional[str] = None) -> Tuple[str, Dict[str, str]]:
+    """Pick a mapping profile (by name, or the best match for the header) and compile it for this file."""
+    header = read_header(file_path)
+    if mapping is None:
+        mapping = detect_mapping(header)
+    elif mapping not in MAPPING_PROFILES:
+        raise ValueError(f"Unknown mapping profile '{mapping}'. Available: {', '.join(MAPPING_PROFILES)}")
+    columns = compile_mapping(MAPPING_PROFILES[mapping], header)
+    if "profile_url" not in columns.values():
+        logger.warning(f"Mapping '{mapping}' has no profile URL column in {file_path}; every row will be skipped")
+    return mapping, columns
+
+def detect_mapping(header: List[str]) -> str:
+    """Name of the profile mapping the most header columns, preferring the one with fewest unmatched entries."""
+    present = set(header)
+    best, best_score = "default", (0, 0)
+    for name, profile in MAPPING_PROFILES.items():
+        matched = sum(1 for column in profile if column in present)
+        score = (matched, matched - len(profile))
+        if "profile_url" in compile_mapping(profile, header).values() and score > best_score:
+            best, best_score = name, score
+    return best
+
+def compile_mapping(profile: Dict[str, str], header: List[str]) -> Dict[str, str]:
+    """{sheet column: model key} for the profile's columns present in header (later entries win)."""
+    present = set(header)
+    columns_by_key = {}
+    for column, model_key in profile.items():
+        if column in present:
+            columns_by_key[model_key] = column
+    return {column: model_key for model_key, column in columns_by_key.items()}
+
+def read_header(file_path: str) -> List[str]:
+    """Column names of the sheet, read without loading any rows."""
     if file_path.endswith('.csv'):
-        df = pd.read_csv(file_path)
-    elif file_path.endswith(('.xlsx', '.xls')):
-        df = pd.read_excel(file_path)
+        return list(pd.read_csv(file_path, nrows=0).columns)
+    if file_path.endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            header = next(workbook.worksheets[0].iter_rows(values_only=True), None) or ()
+        finally:
+            workbook.close()
+        return _xlsx_columns(header)
+    if file_path.endswith('.xls'):
+        return list(pd.read_excel(file_path, nrows=0).columns)
+    raise ValueError("Unsupported file format. Use CSV or Excel.")
+
+def read_raw_chunks(file_path: str, chunk_size: int, usecols: List[str]) -> Iterator[pd.DataFrame]:
+    """Yield the `usecols` sheet columns, under their sheet names, as string DataFrames of at most chunk_size rows."""
+    if file_path.endswith('.csv'):
+        # usecols=[] would drop the rows too; read everything and select nothing instead
+        yield from pd.read_csv(file_path, chunksize=chunk_size, usecols=usecols or None, dtype=str)
+    elif file_path.endswith('.xlsx'):
+        yield from _read_xlsx_chunks(file_path, chunk_size, usecols)
+    elif file_path.endswith('.xls'):
+        # Legacy .xls has no streaming reader; load once and hand out slices
+        df = pd.read_excel(file_path, usecols=usecols or None, dtype=str)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
     else:
         raise ValueError("Unsupported file format. Use CSV or Excel.")
 
-    raw_profiles = df.to_dict('records')
-    # Map CSV columns to model keys using MAPPING_TEMPLATE
-    mapped_profiles = []
-    for row in raw_profiles:
-        mapped = {}
-        for csv_key, model_key in MAPPING_TEMPLATE.items():
-            if csv_key in row:
-                mapped[model_key] = row[csv_key]
-        mapped_profiles.append(mapped)
-    cleaned_profiles = [clean_profile_data(row) for row in mapped_profiles]
-    unique_profiles = deduplicate_profiles(cleaned_profiles)
-
-    inserted = 0
-    updated = 0
-    skipped = 0
-
-    for profile_data in unique_profiles:
+def map_chunk(chunk: pd.DataFrame, columns: Dict[str, str]) -> pd.DataFrame:
+    """Select the mapped sheet columns in mapping order and rename them to model keys."""
+    return chunk[list(columns)].rename(columns=columns)
+
+def _skip_rows(chunks: Iterable[pd.DataFrame], skip_rows: int) -> Iterator[pd.DataFrame]:
+    """Drop the first skip_rows sheet rows (counted as parsed records, not text lines)."""
+    for chunk in chunks:
+        if skip_rows >= len(chunk):
+            skip_rows -= len(chunk)
+            continue
+        yield chunk.iloc[skip_rows:] if skip_rows else chunk
+        skip_rows = 0
+
+def _xlsx_columns(header: tuple) -> List[str]:
+    return [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+
+def _read_xlsx_chunks(file_path: str, chunk_size: int, usecols: List[str]) -> Iterator[pd.DataFrame]:
+    """Stream the `usecols` columns of the first worksheet using openpyxl's read-only mode."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = _xlsx_columns(header)
+        positions = [header.index(column) for column in usecols]
+        batch = []
+        for row in rows:
+            # Same as dtype=str for CSV: cells become strings, empty cells stay missing
+            batch.append(tuple(
+                str(row[i]) if i < len(row) and row[i] is not None else None
+                for i in positions
+            ))
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=usecols, dtype=object)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=usecols, dtype=object)
+    finally:
+        workbook.close()
+
+async def _write_profiles(profiles: Iterable[Dict[str, Any]], category: Optional[str], batch_size: int, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Upsert cleaned, deduplicated profiles in bulk batches and return the write stats."""
+    stats = stats if stats is not None else _new_stats()
+    upserts = []
+    hashes = []
+    for profile_data in profiles:
         if category:
             profile_data['category'] = category
-        profile_url = profile_data['profile_url']
-        existing = await collection.find_one({"profile_url": profile_url})
-        if existing:
-            # Update existing
-            await collection.update_one({"profile_url": profile_url}, {"$set": profile_data})
-            updated += 1
-        else:
-            # Insert new
-            profile = Profile(**profile_data)
-            await collection.insert_one(profile.dict(by_alias=True))
-            inserted += 1
-
-    logger.info(f"Imported {file_path} with category '{category}': inserted={inserted}, updated={updated}, skipped={skipped}")
-    result = {"inserted": inserted, "updated": updated, "skipped": skipped}
-    if category:
-        result["category"] = category
-    return result
+        try:
+            upsert, content_hash = _build_upsert(profile_data)
+        except ValidationError as e:
+            _record_error(stats, profile_data['profile_url'], None, str(e))
+            continue
+        upserts.append(upsert)
+        hashes.append(content_hash)
+        if len(upserts) >= batch_size:
+            await _write_batch(upserts, hashes, stats)
+            upserts, hashes = [], []
+    if upserts:
+        await _write_batch(upserts, hashes, stats)
+    return stats
+
+def _build_upsert(profile_data: Dict[str, Any]) -> Tuple[ProfileUpsert, str]:
+    """Validate a cleaned profile and split it into the fields an import sets and the defaults for new profiles, plus its content hash."""
+    profile = Profile(**profile_data).dict(by_alias=True)
+    set_fields = {k: profile[k] for k in profile_data if k in profile}
+    content_hash = _content_hash({k: v for k, v in set_fields.items() if k not in UNHASHED_FIELDS})
+    set_fields['search_tokens'] = build_search_tokens(set_fields)
+    set_fields['content_hash'] = content_hash
+    on_insert = {k: v for k, v in profile.items() if k not in set_fields}
+    return (set_fields, on_insert), content_hash
+
+def _content_hash(fields: Dict[str, Any]) -> str:
+    """Fingerprint of the cleaned fields an import writes; equal hashes mean nothing would change."""
+    payload = json.dumps(fields, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
 
-async def import_folder(folder_path: str, category: str = None) -> Dict[str, Dict[str, int]]:
-    """Import all CSV/Excel files in a folder."""
+async def _write_batch(upserts: List[ProfileUpsert], hashes: List[str], stats: Dict[str, Any]) -> None:
+    """Drop rows whose stored content hash matches, upsert the rest in one storage call and fold its result into stats."""
+    stored = await repository.content_hashes([set_fields['profile_url'] for set_fields, _ in upserts])
+    changed = [upsert for upsert, content_hash in zip(upserts, hashes) if stored.get(upsert[0]['profile_url']) != content_hash]
+    stats["unchanged"] += len(upserts) - len(changed)
+    if not changed:
+        return
+    result = await repository.upsert_profiles(changed)
+    for profile_url, code, message in result["errors"]:
+        _record_error(stats, profile_url, code, message)
+    stats["inserted"] += result["inserted"]
+    stats["updated"] += result["updated"]
+    await bump_generation()
+
+def _record_error(stats: Dict[str, Any], profile_url: str, code: Optional[int], message: str) -> None:
+    stats["failed"] += 1
+    if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+        stats["errors"].append({"profile_url": profile_url, "code": code, "error": message})
+
+async def import_folder(
+    folder_path: str,
+    category: str = None,
+    workers: int = None,
+    max_in_flight: int = None,
+    skip_files: Optional[Iterable[str]] = None,
+    on_file_done: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
+    force: bool = False,
+    mapping: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Import all CSV/Excel files in a folder.
+
+    Files are read chunk by chunk and each chunk is mapped and cleaned in a process
+    pool of `workers` processes (default: one per core); cleaned chunks are written
+    as they arrive, at most `max_in_flight` at once.
+    Files whose content and category match the import manifest are not read again
+    unless `force` is set. `mapping` forces one mapping profile for every file
+    instead of detecting it per file. Files named in `skip_files` are left out;
+    `on_file_done(name, stats)` is awaited as each file finishes.
+    """
+    skip_files = set(skip_files or ())
     results = {}
+    files = []
+    for name, path, file_category in _list_import_files(folder_path, category):
+        if name in skip_files:
+            continue
+        digest = await asyncio.to_thread(_hash_file, path)
+        entry = await repository.get_file_record(os.path.abspath(path))
+        if not force and entry and entry["sha256"] == digest and entry.get("category") == file_category:
+            logger.info(f"Skipping {path}: unchanged since {entry['imported_at']}")
+            results[name] = {**_new_stats(), "file_unchanged": True, **({"category": file_category} if file_category else {})}
+            if on_file_done:
+                await on_file_done(name, results[name])
+            continue
+        files.append((name, path, file_category, digest))
+
+    async def file_done(name: str, path: str, file_category: Optional[str], digest: str, stats: Dict[str, Any]) -> None:
+        # Files with failed rows stay out of the manifest so the next run retries them
+        if not stats["failed"]:
+            await repository.record_file(os.path.abspath(path), digest, file_category)
+        if on_file_done:
+            await on_file_done(name, stats)
+
+    workers = workers or IMPORT_WORKERS or os.cpu_count() or 1
+    if workers <= 1 or len(files) <= 1:
+        for name, path, file_category, digest in files:
+            results[name] = await import_csv_file(path, file_category, mapping=mapping)
+            await file_done(name, path, file_category, digest, results[name])
+        return results
+
+    max_in_flight = max_in_flight or IMPORT_MAX_IN_FLIGHT or workers
+    loop = asyncio.get_running_loop()
+    write_slots = asyncio.Semaphore(max_in_flight)
+    # Bounds the files open at once and the chunks read but not yet written, so memory
+    # stays bounded by chunk_size rather than by file size
+    file_slots = asyncio.Semaphore(workers + max_in_flight)
+    chunk_slots = asyncio.Semaphore(workers + max_in_flight)
+
+    async def run(pool: ProcessPoolExecutor, name: str, file_path: str, file_category: Optional[str], digest: str) -> Dict[str, Any]:
+        async with file_slots:
+            file_mapping, columns = await asyncio.to_thread(resolve_mapping, file_path, mapping)
+            chunks = read_raw_chunks(file_path, IMPORT_CHUNK_SIZE, list(columns))
+            stats = _new_stats()
+            stage_seconds = dict.fromkeys(ETL_STAGES, 0.0)
+            seen_urls = set()
+            rows = 0
+            pending = deque()
+            exhausted = False
+            while True:
+                # Keep up to `workers` chunks of this file in the pool; only wait for a free slot
+                # when none is pending, so files never hold slots while waiting on each other
+                while not exhausted and len(pending) < workers and not (pending and chunk_slots.locked()):
+                    await chunk_slots.acquire()
+                    chunk = await asyncio.to_thread(_read_next_chunk, chunks, stage_seconds)
+                    if chunk is None:
+                        chunk_slots.release()
+                        exhausted = True
+                    else:
+                        pending.append(loop.run_in_executor(pool, prepare_chunk, chunk, columns))
+                if not pending:
+                    break
+                # Chunks are written in file order, so the first row of a duplicate URL wins as in import_csv_file
+                chunk_rows, profiles, worker_seconds = await pending.popleft()
+                for stage, elapsed in worker_seconds.items():
+                    _record_stage(stage, elapsed, stage_seconds)
+                rows += chunk_rows
+                etl_rows.inc(chunk_rows)
+                with _stage_timer("dedup", stage_seconds):
+                    unique = list(iter_unique_profiles(profiles, seen_urls))
+                async with write_slots:
+                    with _stage_timer("write", stage_seconds):
+                        await _write_profiles(unique, file_category, IMPORT_BATCH_SIZE, stats)
+                chunk_slots.release()
+            stats["mapping"] = file_mapping
+            stats["stage_seconds"] = {stage: round(seconds, 3) for stage, seconds in stage_seconds.items()}
+            stats = _finish_stats(file_path, file_category, stats, rows)
+            await file_done(name, file_path, file_category, digest, stats)
+            return stats
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = [asyncio.ensure_future(run(pool, *entry)) for entry in files]
+        try:
+            outcomes = await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the remaining files when one fails or the import is cancelled
+            for task in tasks:
+                task.cancel()
+            raise
+    results.update({entry[0]: outcome for entry, outcome in zip(files, outcomes)})
+    return results
+
+def _hash_file(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _list_import_files(folder_path: str, category: Optional[str]) -> List[Tuple[str, str, Optional[str]]]:
+    """Return (file_name, file_path, category) for every importable file in a folder."""
+    files = []
     for file_name in os.listdir(folder_path):
         if file_name.endswith(('.csv', '.xlsx', '.xls')):
             file_path = os.path.join(folder_path, file_name)
@@ -70,8 +428,8 @@ async def import_folder(folder_path: str, category: str = None) -> Dict[str, Dic
                 match = re.search(r'^linkedin_(.+?)_results\.(csv|xlsx|xls)$', file_name, re.IGNORECASE)
                 if match:
                     file_category = match.group(1).replace('_', ' ').title()  # e.g., "Senior Software Engineer"
-            results[file_name] = await import_csv_file(file_path, file_category)
-    return results
+            files.append((file_name, file_path, file_category))
+    return files
 
 # Mapping template (example)
 MAPPING_TEMPLATE = {
@@ -88,3 +446,25 @@ MAPPING_TEMPLATE = {
     "Profile URL": "profile_url",
     # Add more mappings as needed
 }
+
+# Named sheet layouts; the one matching the most header columns is used for each file
+MAPPING_PROFILES: Dict[str, Dict[str, str]] = {
+    "default": MAPPING_TEMPLATE,
+    # LinkedIn search scraper exports (see data_to_import/)
+    "search_export": {
+        "Name": "name",
+        "Title": "current_role",
+        "Location": "location",
+        "Education": "education",
+        "Experience Details": "experience",
+        "Total Experience": "total_experience",
+        "Skills": "skills",
+        "Profile URL": "profile_url",
+    },
+}
+
+# Optional JSON file of extra profiles: {"profile name": {"Sheet Column": "model_key", ...}}
+IMPORT_MAPPINGS_FILE = os.getenv("IMPORT_MAPPINGS_FILE")
+if IMPORT_MAPPINGS_FILE:
+    with open(IMPORT_MAPPINGS_FILE) as f:
+        MAPPING_PROFILES.update(json.load(f))
@@ -0,0 +1,177 @@
+import csv
+import io
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+# Only the exported fields leave the server; raw_json and search internals stay behind
+EXPORT_FIELDS = [
+    "profile_id", "name", "current_role", "current_company", "location",
+    "skills", "experience", "education", "profile_url", "category",
+]
+CSV_HEADER = [
+    "Profile ID", "Name", "Current Role", "Current Company", "Location",
+    "Skills", "Experience", "Education", "Profile URL", "Category",
+]
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "500"))
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "10000"))
+
+def _export_record(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Projected document with the same defaults the Profile model applies."""
+    return {
+        "profile_id": doc.get("profile_id") or "",
+        "name": doc.get("name") or "",
+        "current_role": doc.get("current_role") or "",
+        "current_company": doc.get("current_company") or "",
+        "location": doc.get("location") or "",
+        "skills": [str(s) for s in doc.get("skills") or []],
+        "experience": [e for e in doc.get("experience") or [] if isinstance(e, dict)],
+        "education": [e for e in doc.get("education") or [] if isinstance(e, dict)],
+        "profile_url": doc.get("profile_url") or "",
+        "category": doc.get("category"),
+    }
+
+def _csv_row(record: Dict[str, Any]) -> List[str]:
+    return [
+        record["profile_id"],
+        record["name"],
+        record["current_role"],
+        record["current_company"],
+        record["location"],
+        "; ".join(record["skills"]),
+        "; ".join(f"{e.get('role', '')} at {e.get('company', '')}" for e in record["experience"]),
+        "; ".join(f"{e.get('degree', '')} from {e.get('institute', '')}" for e in record["education"]),
+        record["profile_url"],
+        record["category"] or "",
+    ]
+
+async def iter_csv(cursor) -> AsyncIterator[str]:
+    """Yield CSV text in chunks of EXPORT_CHUNK_ROWS rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    rows = 0
+    async for doc in cursor:
+        writer.writerow(_csv_row(_export_record(doc)))
+        rows += 1
+        if rows % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+async def iter_ndjson(cursor) -> AsyncIterator[str]:
+    """Yield one JSON object per line, batched like iter_csv."""
+    lines = []
+    async for doc in cursor:
+        lines.append(json.dumps(_export_record(doc), default=str, ensure_ascii=False))
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+class _ChunkSink:
+    """Append-only file object that hands written bytes back to the response stream."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _parquet_schema(pa):
+    experience = pa.struct([
+        ("company", pa.string()),
+        ("role", pa.string()),
+        ("start_date", pa.string()),
+        ("end_date", pa.string()),
+    ])
+    education = pa.struct([
+        ("degree", pa.string()),
+        ("institute", pa.string()),
+        ("year", pa.int64()),
+    ])
+    return pa.schema([
+        ("profile_id", pa.string()),
+        ("name", pa.string()),
+        ("current_role", pa.string()),
+        ("current_company", pa.string()),
+        ("location", pa.string()),
+        ("skills", pa.list_(pa.string())),
+        ("experience", pa.list_(experience)),
+        ("education", pa.list_(education)),
+        ("profile_url", pa.string()),
+        ("category", pa.string()),
+    ])
+
+def _parquet_row_group(pa, schema, records: List[Dict[str, Any]]):
+    columns = {field: [r[field] for r in records] for field in EXPORT_FIELDS}
+    columns["experience"] = [
+        [{k: e.get(k) for k in ("company", "role", "start_date", "end_date")} for e in exp]
+        for exp in columns["experience"]
+    ]
+    columns["education"] = [
+        [{"degree": e.get("degree"), "institute": e.get("institute"), "year": e.get("year")} for e in edu]
+        for edu in columns["education"]
+    ]
+    return pa.Table.from_pydict(columns, schema=schema)
+
+async def iter_parquet(cursor) -> AsyncIterator[bytes]:
+    """Yield a Parquet file written one row group of PARQUET_ROW_GROUP_SIZE rows at a time."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(pa)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    records = []
+    async for doc in cursor:
+        records.append(_export_record(doc))
+        if len(records) >= PARQUET_ROW_GROUP_SIZE:
+            writer.write_table(_parquet_row_group(pa, schema, records))
+            records = []
+            yield sink.drain()
+    if records:
+        writer.write_table(_parquet_row_group(pa, schema, records))
+    writer.close()
+    yield sink.drain()
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+EXPORT_WRITERS = {"csv": iter_csv, "ndjson": iter_ndjson, "parquet": iter_parquet}
@@ -0,0 +1,223 @@
+import hashlib
+import os
+import re
+import zlib
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# 4 compresses JSON better than gzip -6 at about the same speed
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "image/svg+xml", "text/")
+# Progress events must reach the browser one by one
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+# Compression appends "-<encoding>" to the ETag, as the compressed body is a different representation
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+# Re-read index.html and the assets it links whenever they change on disk (for development)
+STATIC_RELOAD = os.getenv("STATIC_RELOAD", "0") == "1"
+# Content-hashed (?v=) asset URLs never change, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Browsers keep the body but check its ETag before each reuse
+REVALIDATE_CACHE_CONTROL = "no-cache"
+ASSET_URL_RE = re.compile(r'((?:href|src)=")(/static/[^"?#]+)(")')
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 prescribes for it), ignoring encoding suffixes."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        for suffix in ENCODING_SUFFIXES:
+            if candidate.endswith(suffix):
+                candidate = candidate[:-len(suffix)]
+        if candidate == opaque:
+            return True
+    return False
+
+def _accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """br when the client takes it and brotli is installed, else gzip, else None."""
+    accepted = set()
+    for entry in accept_encoding.split(","):
+        name, _, params = entry.strip().partition(";")
+        params = params.strip()
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 1.0
+        if quality > 0:
+            accepted.add(name.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush, so the client can decode everything sent so far."""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with brotli (when installed) or gzip.
+
+    A complete body of at least `minimum_size` bytes is compressed in one go. Streamed bodies
+    (exports) are compressed chunk by chunk with a flush after each, so rows still arrive as
+    they are written.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        start = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether compressing pays
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is not None:
+                data = compressor.chunk(body) if more_body else compressor.finish(body)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+            headers = MutableHeaders(scope=start)
+            content_type = headers.get("content-type", "")
+            if (
+                start["status"] < 200 or start["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or content_type.startswith(UNCOMPRESSED_TYPES)
+                or (not more_body and len(body) < self.minimum_size)
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            compressor = _Compressor(encoding)
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and etag.endswith('"'):
+                headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+            if more_body:
+                del headers["content-length"]
+                data = compressor.chunk(body)
+            else:
+                data = compressor.finish(body)
+                headers["Content-Length"] = str(len(data))
+            await send(start)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+class VersionedStaticFiles(StaticFiles):
+    """Static files; requests with a ?v= content hash are cached for a year, others revalidated by ETag."""
+
+    async def get_response(self, path: str, scope) -> Response:
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            versioned = "v" in parse_qs(scope.get("query_string", b"").decode())
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if versioned else REVALIDATE_CACHE_CONTROL
+        return response
+
+class IndexPage:
+    """static/index.html held in memory, with a content hash (?v=) on each /static/ URL it links.
+
+    Read on first use; with `reload` it is read again whenever index.html or a linked
+    asset changes on disk.
+    """
+
+    def __init__(self, static_dir: str, reload: bool = STATIC_RELOAD):
+        self.static_dir = static_dir
+        self.reload = reload
+        self._loaded = False
+        self._page: Optional[Tuple[bytes, str]] = None
+        # mtime of every file the page was built from (None: it did not exist)
+        self._mtimes: Dict[str, Optional[int]] = {}
+
+    def _changed(self) -> bool:
+        for path, mtime in self._mtimes.items():
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                return True
+        return False
+
+    def _versioned_url(self, match: "re.Match") -> str:
+        url = match.group(2)
+        path = os.path.join(self.static_dir, url[len("/static/"):])
+        try:
+            with open(path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:12]
+            self._mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            return match.group(0)
+        return f"{match.group(1)}{url}?v={digest}{match.group(3)}"
+
+    def _load(self) -> None:
+        index_path = os.path.join(self.static_dir, "index.html")
+        self._loaded = True
+        self._page = None
+        self._mtimes = {index_path: None}
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        self._mtimes[index_path] = os.stat(index_path).st_mtime_ns
+        body = ASSET_URL_RE.sub(self._versioned_url, content).encode("utf-8")
+        self._page = (body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+
+    def get(self) -> Optional[Tuple[bytes, str]]:
+        """(body, ETag) of the page, or None without an index.html."""
+        if not self._loaded or (self.reload and self._changed()):
+            self._load()
+        return self._page
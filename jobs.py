@@ -0,0 +1,342 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+from pymongo import ReturnDocument
+from db import get_jobs_collection
+from etl import MAX_REPORTED_ERRORS, import_csv_file, import_folder
+
+logger = logging.getLogger(__name__)
+
+# Import jobs run at the same time in this process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Uploads are kept here until their job finishes, so an interrupted job can resume
+JOB_UPLOAD_DIR = os.getenv("JOB_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "linkedin_import_jobs"))
+# Running jobs whose worker has not been heard from for this many seconds are requeued
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "300"))
+# Running jobs refresh updated_at this often, and other workers' jobs are checked for staleness as often
+JOB_HEARTBEAT_INTERVAL = JOB_STALE_AFTER / 3
+# Seconds between progress events on /jobs/{id}/events
+JOB_EVENT_INTERVAL = float(os.getenv("JOB_EVENT_INTERVAL", "1"))
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATUSES = {"completed", "failed", "cancelled"}
+STAT_COUNTS = ("inserted", "updated", "unchanged", "skipped", "failed")
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+class JobCancelled(Exception):
+    """Raised at a checkpoint when the job was cancelled from another process."""
+
+class JobLost(Exception):
+    """Raised at a checkpoint when the job is no longer running on this worker (requeued as stale)."""
+
+def _merge_stats(base: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the stats of a resumed run to those committed before the interruption."""
+    merged = {key: base.get(key, 0) + stats.get(key, 0) for key in STAT_COUNTS}
+    merged["errors"] = (base.get("errors", []) + stats.get("errors", []))[:MAX_REPORTED_ERRORS]
+    for key in ("category", "mapping"):
+        if stats.get(key):
+            merged[key] = stats[key]
+    if stats.get("stage_seconds"):
+        base_seconds = base.get("stage_seconds") or {}
+        merged["stage_seconds"] = {stage: round(base_seconds.get(stage, 0) + seconds, 3) for stage, seconds in stats["stage_seconds"].items()}
+    return merged
+
+def job_view(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Public representation of a job document, with elapsed time and throughput."""
+    view = {"id": doc["_id"], **{k: v for k, v in doc.items() if k != "_id"}}
+    started_at = doc.get("started_at")
+    elapsed = ((doc.get("finished_at") or datetime.utcnow()) - started_at).total_seconds() if started_at else 0.0
+    rows = doc.get("rows_processed", 0) - doc.get("resumed_from", 0)
+    view["elapsed_seconds"] = round(elapsed, 1)
+    view["rows_per_second"] = round(rows / elapsed, 1) if elapsed > 0 else 0.0
+    return view
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    jobs = await get_jobs_collection()
+    return await jobs.find_one({"_id": job_id})
+
+async def list_jobs(status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    jobs = await get_jobs_collection()
+    query = {"status": status} if status else {}
+    return [doc async for doc in jobs.find(query).sort("created_at", -1).limit(limit)]
+
+async def iter_job_events(job_id: str, interval: float = JOB_EVENT_INTERVAL) -> AsyncIterator[str]:
+    """Server-sent events with the job's state, ending once the job has finished."""
+    while True:
+        doc = await get_job(job_id)
+        if doc is None:
+            return
+        yield f"data: {json.dumps(job_view(doc), default=str)}\n\n"
+        if doc["status"] in FINISHED_STATUSES:
+            return
+        await asyncio.sleep(interval)
+
+def _process_alive(pid: int) -> bool:
+    if os.name != "posix":
+        # Signal 0 only probes on POSIX; elsewhere only staleness tells
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _worker_gone(worker: Optional[str], startup: bool) -> bool:
+    """Whether the process that claimed a job is known to be gone without waiting for staleness.
+
+    On startup that includes this WORKER_ID: a restarted container often gets the same host name and pid.
+    """
+    if not worker:
+        return False
+    if worker == WORKER_ID:
+        return startup
+    host, _, pid = worker.rpartition(":")
+    return host == socket.gethostname() and pid.isdigit() and not _process_alive(int(pid))
+
+def _discard_upload(doc: Dict[str, Any]) -> None:
+    if doc.get("owns_file") and os.path.exists(doc["path"]):
+        os.unlink(doc["path"])
+
+class JobQueue:
+    """Bounded pool of asyncio workers running import jobs whose state is kept in Mongo.
+
+    File jobs checkpoint after every committed chunk and folder jobs after every
+    file, so a job interrupted by a restart resumes where it stopped. Running jobs
+    send a heartbeat; jobs of crashed workers are requeued on startup and by a
+    periodic staleness check.
+    """
+
+    def __init__(self, concurrency: int = JOB_WORKERS):
+        self.concurrency = max(1, concurrency)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._monitor: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        await self._recover(startup=True)
+        jobs = await get_jobs_collection()
+        async for doc in jobs.find({"status": "queued"}, {"_id": 1}).sort("created_at", 1):
+            self._queue.put_nowait(doc["_id"])
+        self._monitor = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        """Stop the workers; interrupted jobs go back to queued and resume on the next start."""
+        self._stopping = True
+        if self._monitor:
+            self._monitor.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, *([self._monitor] if self._monitor else []), return_exceptions=True)
+        self._workers = []
+        self._monitor = None
+
+    async def submit(self, kind: str, path: str, name: str, category: Optional[str] = None, owns_file: bool = False, mapping: Optional[str] = None) -> Dict[str, Any]:
+        """Persist a queued job and hand it to the workers; kind is "file" or "folder"."""
+        now = datetime.utcnow()
+        doc = {
+            "_id": uuid.uuid4().hex,
+            "kind": kind,
+            "name": name,
+            "path": path,
+            "owns_file": owns_file,
+            "category": category,
+            "mapping": mapping,
+            "status": "queued",
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "attempts": 0,
+            "rows_processed": 0,
+            "resumed_from": 0,
+            "files_done": [],
+            "stats": None,
+            "error": None,
+            "cancel_requested": False,
+            "worker": None,
+        }
+        jobs = await get_jobs_collection()
+        await jobs.insert_one(doc)
+        self._queue.put_nowait(doc["_id"])
+        return doc
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job; returns None for unknown ids."""
+        jobs = await get_jobs_collection()
+        doc = await jobs.find_one_and_update(
+            {"_id": job_id, "status": {"$in": ["queued", "running"]}},
+            {"$set": {"cancel_requested": True}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            return await get_job(job_id)
+        if doc["status"] == "queued":
+            # Never claimed, so no worker will finish it; its id is dropped when dequeued
+            await self._finish(doc, "cancelled", expect_status="queued")
+        task = self._running.get(job_id)
+        if task:
+            task.cancel()
+        # Jobs running in another process stop at their next checkpoint
+        return await get_job(job_id)
+
+    async def _recover(self, startup: bool = False) -> int:
+        """Requeue running jobs whose worker is gone or silent for JOB_STALE_AFTER; returns how many."""
+        jobs = await get_jobs_collection()
+        stale_before = datetime.utcnow() - timedelta(seconds=JOB_STALE_AFTER)
+        requeued = 0
+        async for doc in jobs.find({"status": "running"}, {"worker": 1, "updated_at": 1}):
+            if doc.get("worker") == WORKER_ID and not startup:
+                continue
+            if not _worker_gone(doc.get("worker"), startup) and (doc.get("updated_at") or datetime.min) >= stale_before:
+                continue
+            # Only if nobody claimed or touched it since it was read
+            result = await jobs.update_one(
+                {"_id": doc["_id"], "status": "running", "worker": doc.get("worker"), "updated_at": doc.get("updated_at")},
+                {"$set": {"status": "queued"}},
+            )
+            if result.modified_count:
+                logger.warning(f"Requeued import job {doc['_id']} left running by {doc.get('worker')}")
+                self._queue.put_nowait(doc["_id"])
+                requeued += 1
+        return requeued
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                await self._recover()
+            except Exception as e:
+                logger.error(f"Checking for stale import jobs failed: {str(e)}")
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Keep updated_at fresh while a job runs, so a long file between checkpoints never looks stale."""
+        jobs = await get_jobs_collection()
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                await jobs.update_one({"_id": job_id, "status": "running", "worker": WORKER_ID}, {"$set": {"updated_at": datetime.utcnow()}})
+            except Exception as e:
+                logger.error(f"Heartbeat for import job {job_id} failed: {str(e)}")
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Import job {job_id} could not be run: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        jobs = await get_jobs_collection()
+        now = datetime.utcnow()
+        # Claiming atomically keeps a job that was queued by several processes from running twice;
+        # the pipeline records the row it resumes from in the same write
+        doc = await jobs.find_one_and_update(
+            {"_id": job_id, "status": "queued"},
+            [{"$set": {
+                "status": "running", "started_at": now, "updated_at": now, "worker": WORKER_ID,
+                "attempts": {"$add": ["$attempts", 1]},
+                "resumed_from": "$rows_processed",
+            }}],
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            return
+        logger.info(f"Running import job {job_id} ({doc['kind']} {doc['name']}) from row {doc['rows_processed']}")
+
+        task = asyncio.create_task(self._execute(doc))
+        self._running[job_id] = task
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            stats = await task
+            await self._finish(doc, "completed", stats=stats)
+        except asyncio.CancelledError:
+            if self._stopping:
+                await jobs.update_one({"_id": job_id, "status": "running", "worker": WORKER_ID}, {"$set": {"status": "queued"}})
+                raise
+            await self._finish(doc, "cancelled")
+        except JobCancelled:
+            await self._finish(doc, "cancelled")
+        except JobLost:
+            # Another worker owns the job now; its state is not ours to write
+            logger.warning(f"Import job {job_id} was taken over by another worker; stopped this run")
+        except Exception as e:
+            logger.error(f"Import job {job_id} failed: {str(e)}")
+            await self._finish(doc, "failed", error=str(e))
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job_id, None)
+
+    async def _execute(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = doc["_id"]
+        if doc["kind"] == "folder":
+            done = {entry["file"]: entry["stats"] for entry in doc.get("files_done", [])}
+
+            async def file_done(name: str, stats: Dict[str, Any]) -> None:
+                done[name] = stats
+                rows = sum(s.get(key, 0) for s in done.values() for key in STAT_COUNTS)
+                await self._checkpoint(job_id, {"rows_processed": rows}, push={"files_done": {"file": name, "stats": stats}})
+
+            await import_folder(doc["path"], doc["category"], skip_files=list(done), on_file_done=file_done, mapping=doc.get("mapping"))
+            return done
+
+        base = doc.get("stats") or {}
+        resumed_from = doc["rows_processed"]
+
+        async def progress(rows: int, stats: Dict[str, Any]) -> None:
+            # Rows dropped so far as duplicates; import_csv_file only fills this in at the end
+            skipped = rows - resumed_from - sum(stats[key] for key in STAT_COUNTS if key != "skipped")
+            await self._checkpoint(job_id, {"rows_processed": rows, "stats": _merge_stats(base, {**stats, "skipped": skipped})})
+
+        stats = await import_csv_file(doc["path"], doc["category"], skip_rows=resumed_from, on_progress=progress, mapping=doc.get("mapping"))
+        return _merge_stats(base, stats)
+
+    async def _checkpoint(self, job_id: str, fields: Dict[str, Any], push: Optional[Dict[str, Any]] = None) -> None:
+        jobs = await get_jobs_collection()
+        update = {"$set": {**fields, "updated_at": datetime.utcnow()}}
+        if push:
+            update["$push"] = push
+        # Only while this worker still holds the job: a run that was requeued as stale must not
+        # write over the progress of the worker that claimed it since
+        doc = await jobs.find_one_and_update(
+            {"_id": job_id, "status": "running", "worker": WORKER_ID}, update, projection={"cancel_requested": 1},
+        )
+        if doc is None:
+            raise JobLost(job_id)
+        if doc.get("cancel_requested"):
+            raise JobCancelled(job_id)
+
+    async def _finish(self, doc: Dict[str, Any], status: str, stats: Optional[Dict[str, Any]] = None, error: Optional[str] = None, expect_status: str = "running") -> None:
+        jobs = await get_jobs_collection()
+        fields = {"status": status, "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()}
+        if stats is not None:
+            fields["stats"] = stats
+        if error is not None:
+            fields["error"] = error
+        query = {"_id": doc["_id"], "status": expect_status}
+        if expect_status == "running":
+            query["worker"] = WORKER_ID
+        result = await jobs.update_one(query, {"$set": fields})
+        if result.modified_count:
+            _discard_upload(doc)
+            logger.info(f"Import job {doc['_id']} {status}")
+
+job_queue = JobQueue()
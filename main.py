@@ -1,17 +1,39 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from routes import router
-from db import create_indexes
+from db import get_database
+from storage import repository
+from categories import run_category_refresher
+from skill_stats import run_skill_stats_refresher
+from similarity import run_similarity_refresher
+from jobs import job_queue
+from metrics import MetricsMiddleware, command_metrics, render_metrics
+from http_cache import REVALIDATE_CACHE_CONTROL, CompressionMiddleware, IndexPage, VersionedStaticFiles, etag_matches
 import asyncio
 import os
 
 app = FastAPI(title="LinkedIn Data Manager", version="1.0.0")
 
+background_tasks = []
+
 @app.on_event("startup")
 async def startup_event():
-    await create_indexes()
+    await repository.create_indexes()
+    background_tasks.append(asyncio.create_task(run_similarity_refresher()))
+    if repository.name != "mongo":
+        return
+    command_metrics.attach(get_database())
+    # Materialized summaries and import jobs are MongoDB features
+    background_tasks.append(asyncio.create_task(run_category_refresher()))
+    background_tasks.append(asyncio.create_task(run_skill_stats_refresher()))
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_queue.stop()
+    for task in background_tasks:
+        task.cancel()
 
 app.include_router(router, prefix="/api", tags=["profiles"])
 
@@ -23,25 +45,38 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# gzip/brotli above COMPRESS_MIN_SIZE; inside the metrics middleware, so response sizes are wire sizes
+app.add_middleware(CompressionMiddleware)
+# Outermost, so request latency includes the other middleware
+app.add_middleware(MetricsMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 # Mount static directory for UI assets
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 if not os.path.exists(static_dir):
     os.makedirs(static_dir, exist_ok=True)
-app.mount("/static", StaticFiles(directory=static_dir), name="static")
+app.mount("/static", VersionedStaticFiles(directory=static_dir), name="static")
 
 from fastapi.responses import HTMLResponse
 
 from fastapi.responses import Response
 
+index_page = IndexPage(static_dir)
+
 @app.get("/", response_class=HTMLResponse)
-async def serve_index():
-    index_path = os.path.join(static_dir, "index.html")
-    if os.path.exists(index_path):
-        with open(index_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        return HTMLResponse(content=content)
-    return Response(content="LinkedIn Data Manager API", media_type="text/plain")
+async def serve_index(request: Request):
+    page = index_page.get()
+    if page is None:
+        return Response(content="LinkedIn Data Manager API", media_type="text/plain")
+    content, etag = page
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=content, headers=headers)
 
 if __name__ == "__main__":
     import uvicorn
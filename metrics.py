@@ -0,0 +1,280 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from pymongo import monitoring
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Mongo commands slower than this are logged together with their explain plan
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# A slow query shape is explained at most once per this many seconds
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+
+# Route template of the request being served; Motor copies it into its executor threads
+current_route: ContextVar[str] = ContextVar("current_route", default="background")
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """Monotonic counter per label set, in Prometheus text format."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in values]
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, in Prometheus text format."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels.get(name, "") for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = []
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labels, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"])
+http_request_size = Histogram(
+    "http_request_size_bytes", "HTTP request body size by route", ["method", "route"], SIZE_BUCKETS)
+http_response_size = Histogram(
+    "http_response_size_bytes", "HTTP response body size by route", ["method", "route"], SIZE_BUCKETS)
+mongo_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by command, collection and route",
+    ["command", "collection", "route"])
+mongo_command_failures = Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands", ["command", "collection", "route"])
+mongo_slow_commands = Counter(
+    "mongodb_slow_commands_total", "MongoDB commands slower than SLOW_QUERY_MS", ["command", "collection", "route"])
+etl_stage_duration = Histogram(
+    "etl_stage_duration_seconds", "Import time per chunk and stage (read, map, clean, dedup, write)", ["stage"], STAGE_BUCKETS)
+etl_rows = Counter("etl_rows_total", "Sheet rows read by imports")
+
+REGISTRY = [
+    http_request_duration, http_request_size, http_response_size,
+    mongo_command_duration, mongo_command_failures, mongo_slow_commands,
+    etl_stage_duration, etl_rows,
+]
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def _route_template(scope: Dict[str, Any]) -> str:
+    from starlette.routing import Match
+
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request and measuring body sizes, labelled by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = _route_template(scope)
+        token = current_route.set(route)
+        method = scope["method"]
+        status = 500
+        response_bytes = 0
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_route.reset(token)
+            http_request_duration.observe(time.perf_counter() - start, method=method, route=route, status=str(status))
+            headers = dict(scope.get("headers") or [])
+            request_bytes = int(headers.get(b"content-length", b"0") or 0)
+            http_request_size.observe(request_bytes, method=method, route=route)
+            http_response_size.observe(response_bytes, method=method, route=route)
+
+# Commands whose plan can be explained; writes and getMore are only timed
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct"}
+# Session and cluster fields the driver adds, which explain does not accept
+DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "$query"}
+
+def _command_filter(command_name: str, command: Dict[str, Any]) -> Any:
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        return pipeline[0].get("$match") if pipeline and "$match" in pipeline[0] else pipeline[:1]
+    return command.get("filter", command.get("query"))
+
+def plan_summary(explain: Dict[str, Any]) -> str:
+    """Winning plan as "FETCH <- IXSCAN skills_1"; collection scans are easy to spot."""
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        for stage in explain.get("stages", []):
+            planner = stage.get("$cursor", {}).get("queryPlanner")
+            if planner:
+                break
+    plan = (planner or {}).get("winningPlan") or {}
+    plan = plan.get("queryPlan", plan)
+    stages = []
+    while plan:
+        name = plan.get("stage", "?")
+        if plan.get("indexName"):
+            name += f" {plan['indexName']}"
+        stages.append(name)
+        children = plan.get("inputStages") or ([plan["inputStage"]] if "inputStage" in plan else [])
+        plan = children[0] if children else None
+    return " <- ".join(stages) or "unknown"
+
+class CommandMetrics(monitoring.CommandListener):
+    """pymongo command listener recording per-command latency and logging slow queries.
+
+    Listener callbacks run on the driver's threads, so slow-query explains are
+    handed to the event loop registered with `attach`.
+    """
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._pending: Dict[Tuple[Any, int], Tuple[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._database = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._explained = TTLCache(256, SLOW_QUERY_EXPLAIN_INTERVAL)
+
+    def attach(self, database) -> None:
+        """Enable explain plans for slow queries, run through `database` on the current loop."""
+        self._database = database
+        self._loop = asyncio.get_running_loop()
+
+    def started(self, event) -> None:
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        command = event.command if event.command_name in EXPLAINABLE_COMMANDS else None
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (collection, command)
+
+    def succeeded(self, event) -> None:
+        self._finish(event, failed=False)
+
+    def failed(self, event) -> None:
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        with self._lock:
+            collection, command = self._pending.pop((event.connection_id, event.request_id), ("", None))
+        route = current_route.get()
+        labels = {"command": event.command_name, "collection": collection, "route": route}
+        mongo_command_duration.observe(event.duration_micros / 1e6, **labels)
+        if failed:
+            mongo_command_failures.inc(**labels)
+            return
+        elapsed_ms = event.duration_micros / 1000
+        if elapsed_ms >= self.slow_ms:
+            mongo_slow_commands.inc(**labels)
+            self._log_slow(event.command_name, collection, route, elapsed_ms, command)
+
+    def _log_slow(self, command_name: str, collection: str, route: str, elapsed_ms: float, command: Optional[Dict[str, Any]]) -> None:
+        query = json.dumps(_command_filter(command_name, command), default=str)[:500] if command else ""
+        message = f"Slow {command_name} on {collection} took {elapsed_ms:.0f}ms (route {route}) {query}"
+        pipeline = (command or {}).get("pipeline") or []
+        writes = any("$out" in stage or "$merge" in stage for stage in pipeline)
+        if command is None or writes or self._database is None or self._loop is None or self._loop.is_closed():
+            logger.warning(message)
+            return
+        shape = f"{command_name}:{collection}:{route}:{query}"
+        if self._explained.get(shape) is not None:
+            logger.warning(message)
+            return
+        self._explained.set(shape, True)
+        explain = {k: v for k, v in command.items() if k not in DRIVER_FIELDS}
+        asyncio.run_coroutine_threadsafe(self._explain_and_log(explain, message), self._loop)
+
+    async def _explain_and_log(self, command: Dict[str, Any], message: str) -> None:
+        try:
+            result = await self._database.command({"explain": command, "verbosity": "queryPlanner"})
+            plan = plan_summary(result)
+            if "COLLSCAN" in plan:
+                plan += " (collection scan)"
+            logger.warning(f"{message} plan: {plan}")
+        except Exception as e:
+            logger.warning(f"{message} (explain failed: {str(e)})")
+
+command_metrics = CommandMetrics()
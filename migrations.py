@@ -0,0 +1,242 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from cache import bump_generation
+from models import ProfileFilter
+from search import build_search_tokens
+from skills import canonical_skills
+from storage import SEARCH_FIELDS, repository
+from utils import clean_string, experience_stats, generate_profile_id, parse_education, parse_experience, restored_profile_url
+
+logger = logging.getLogger(__name__)
+
+# Profiles read and written per batch; progress is checkpointed after each one
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "500"))
+# A running migration whose heartbeat is this many seconds old may be taken over by another run
+MIGRATION_LEASE = float(os.getenv("MIGRATION_LEASE", "300"))
+# Running migrations refresh heartbeat_at this often
+MIGRATION_HEARTBEAT_INTERVAL = MIGRATION_LEASE / 3
+
+class MigrationRunning(Exception):
+    """Raised when another process (or request) is already running the migration."""
+
+class MigrationLost(Exception):
+    """Raised at a checkpoint when another run has taken the migration over."""
+
+class Migration:
+    """A data migration: the profiles it visits and the fields it sets on each.
+
+    Subclass it, implement migrate and add an instance to MIGRATIONS.
+    """
+
+    name = ""
+    description = ""
+    # Fields migrate() reads ("_id" is always included); None reads whole profiles
+    fields: Optional[List[str]] = None
+
+    def filters(self) -> ProfileFilter:
+        """Profiles to visit; all of them by default."""
+        return ProfileFilter()
+
+    def migrate(self, profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fields to set on a profile, or None to leave it as is.
+
+        A batch interrupted before its checkpoint is migrated again, so this must be safe to repeat.
+        """
+        raise NotImplementedError
+
+    async def migrate_batch(self, profiles: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """(profile id, fields) for the profiles of a batch to change; migrate() on each by default."""
+        updates = []
+        for profile in profiles:
+            fields = self.migrate(profile)
+            if fields:
+                updates.append((str(profile["_id"]), fields))
+        return updates
+
+class BackfillEducation(Migration):
+    name = "backfill_education"
+    description = "Fill empty education from the sheet row kept in raw_json"
+    fields = SEARCH_FIELDS + ["raw_json"]
+
+    def filters(self):
+        return ProfileFilter(has_education=False)
+
+    def migrate(self, profile):
+        raw = profile.get("raw_json") or {}
+        education = parse_education(raw.get("education") or raw.get("Education"))
+        if not education:
+            return None
+        # Institutes are searchable, so the prefix index changes with them
+        return {"education": education, "search_tokens": build_search_tokens({**profile, "education": education})}
+
+class ParseExperience(Migration):
+    name = "parse_experience"
+    description = "Parse experience details from the sheet row into dated entries and recompute the experience totals"
+    fields = ["experience", "total_experience", "total_experience_months", "current_tenure_start", "raw_json"]
+
+    def migrate(self, profile):
+        raw = profile.get("raw_json") or {}
+        # Without the sheet's details (profiles created through the API) the stored entries are kept
+        experience = parse_experience(raw["experience"]) if "experience" in raw else profile.get("experience") or []
+        total_experience = clean_string(raw.get("total_experience")) or profile.get("total_experience") or None
+        months, tenure_start = experience_stats(experience, total_experience)
+        fields = {
+            "experience": experience,
+            "total_experience": total_experience,
+            "total_experience_months": months,
+            "current_tenure_start": tenure_start,
+        }
+        fields = {field: value for field, value in fields.items() if profile.get(field) != value}
+        return fields or None
+
+class CanonicalizeSkills(Migration):
+    name = "canonicalize_skills"
+    description = "Rewrite stored skills as canonical lowercase names, which the skill filter matches exactly"
+    fields = SEARCH_FIELDS
+
+    def migrate(self, profile):
+        skills = canonical_skills(profile.get("skills") or [])
+        if skills == (profile.get("skills") or []):
+            return None
+        return {"skills": skills, "search_tokens": build_search_tokens({**profile, "skills": skills})}
+
+class CanonicalizeProfileUrls(Migration):
+    name = "canonicalize_profile_urls"
+    description = "Store profile_url in canonical form, restoring slug case from the sheet row, and derive profile_id from it"
+    fields = ["profile_url", "profile_id", "raw_json"]
+
+    def migrate(self, profile):
+        stored = profile.get("profile_url") or ""
+        url = restored_profile_url(profile)
+        if not url:
+            return None
+        fields = {}
+        if url != stored:
+            fields["profile_url"] = url
+        profile_id = generate_profile_id(url)
+        if profile_id != profile.get("profile_id"):
+            fields["profile_id"] = profile_id
+        return fields or None
+
+    async def migrate_batch(self, profiles):
+        updates = await super().migrate_batch(profiles)
+        urls = [fields["profile_url"] for _, fields in updates if "profile_url" in fields]
+        taken = await repository.existing_urls(urls) if urls else set()
+        kept = []
+        for profile_id, fields in updates:
+            url = fields.get("profile_url")
+            if url in taken:
+                # profile_url is unique; the two profiles are duplicates for dedupe.py --merge
+                logger.warning(f"Left profile {profile_id} as is: {url} belongs to another profile")
+                continue
+            if url:
+                taken.add(url)
+            kept.append((profile_id, fields))
+        return kept
+
+MIGRATIONS: Dict[str, Migration] = {migration.name: migration for migration in [
+    BackfillEducation(), ParseExperience(), CanonicalizeSkills(), CanonicalizeProfileUrls(),
+]}
+
+def migration_view(name: str, state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Public representation of a migration and its checkpoint."""
+    view = {"name": name, "description": MIGRATIONS[name].description, "status": "pending"}
+    if state:
+        view.update(state)
+        view["after"] = str(state["after"]) if state.get("after") is not None else None
+    return view
+
+async def _save(name: str, state: Dict[str, Any]) -> None:
+    if not await repository.save_migration(name, state):
+        raise MigrationLost(name)
+
+async def _heartbeat(name: str, state: Dict[str, Any]) -> None:
+    """Keep heartbeat_at fresh while the migration runs, so a long batch never looks abandoned."""
+    while True:
+        await asyncio.sleep(MIGRATION_HEARTBEAT_INTERVAL)
+        state["heartbeat_at"] = datetime.utcnow()
+        try:
+            await _save(name, state)
+        except MigrationLost:
+            return
+        except Exception as e:
+            logger.error(f"Heartbeat for migration {name} failed: {str(e)}")
+
+async def run_migration(name: str, batch_size: int = MIGRATION_BATCH_SIZE, restart: bool = False) -> Dict[str, Any]:
+    """Run a migration in "_id" order, resuming after the last checkpoint unless `restart`.
+
+    A completed migration is not run again unless `restart` is given. The run claims the
+    checkpoint first, so a migration already running elsewhere raises MigrationRunning.
+    """
+    migration = MIGRATIONS[name]
+    now = datetime.utcnow()
+    fields = {"status": "running", "owner": uuid.uuid4().hex, "heartbeat_at": now, "batch_size": batch_size, "error": None}
+    if restart:
+        fields.update(after=None, processed=0, updated=0, started_at=now, finished_at=None)
+    state = await repository.claim_migration(name, fields, now - timedelta(seconds=MIGRATION_LEASE), restart)
+    if state is None:
+        current = await repository.get_migration(name)
+        if current and current.get("status") == "completed":
+            return current
+        raise MigrationRunning(name)
+    if state.get("processed"):
+        logger.info(f"Resuming migration {name} after {state.get('after')} ({state['processed']} profiles done)")
+    for key, default in (("after", None), ("processed", 0), ("updated", 0), ("started_at", now)):
+        state.setdefault(key, default)
+    heartbeat = asyncio.create_task(_heartbeat(name, state))
+    updated = 0
+    try:
+        while True:
+            docs = await repository.find_after_id(migration.filters(), migration.fields, state["after"], batch_size)
+            if not docs:
+                break
+            updates = await migration.migrate_batch(docs)
+            matched = await repository.update_many(updates)
+            updated += matched
+            state["after"] = docs[-1]["_id"]
+            state["processed"] += len(docs)
+            state["updated"] += matched
+            state["updated_at"] = state["heartbeat_at"] = datetime.utcnow()
+            await _save(name, state)
+            logger.info(f"Migration {name}: {state['processed']} profiles processed, {state['updated']} updated")
+    except MigrationLost:
+        logger.warning(f"Migration {name} was taken over by another run; stopped this one")
+        raise
+    except Exception as e:
+        state.update(status="failed", error=str(e), updated_at=datetime.utcnow())
+        await repository.save_migration(name, state)
+        raise
+    finally:
+        heartbeat.cancel()
+        if updated:
+            await bump_generation()
+    state.update(status="completed", finished_at=datetime.utcnow())
+    await _save(name, state)
+    logger.info(f"Migration {name} completed: {state['processed']} profiles processed, {state['updated']} updated")
+    return state
+
+async def main(names: List[str], batch_size: int, restart: bool) -> None:
+    for name in names or list(MIGRATIONS):
+        try:
+            state = await run_migration(name, batch_size, restart)
+        except (MigrationRunning, MigrationLost):
+            print(f"Migration {name} is being run by another process; skipped")
+            continue
+        print(json.dumps(migration_view(name, state), indent=2, default=str))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run data migrations in batches, resuming where an interrupted run stopped.")
+    parser.add_argument("names", nargs="*", help=f"Migrations to run (default: all of {', '.join(MIGRATIONS)})")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE, help="Profiles per batch and checkpoint")
+    parser.add_argument("--restart", action="store_true", help="Start from the beginning, even if completed")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in MIGRATIONS]
+    if unknown:
+        parser.error(f"unknown migrations: {', '.join(unknown)}")
+    asyncio.run(main(args.names, args.batch_size, args.restart))
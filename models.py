@@ -25,6 +25,9 @@ class Profile(BaseModel):
     experience: List[Experience] = []
     education: List[Education] = []
     total_experience: Optional[str] = None
+    # Parsed from the sheet; back the min_exp/max_exp range filters
+    total_experience_months: Optional[int] = None
+    current_tenure_start: Optional[datetime] = None
     profile_url: str
     category: Optional[str] = None
     last_scraped_at: datetime = Field(default_factory=datetime.utcnow)
@@ -36,6 +39,31 @@ class Profile(BaseModel):
             ObjectId: str
         }
 
+# Fields the UI's result grid needs; list/search endpoints return these for view=summary
+SUMMARY_FIELDS = [
+    "profile_id", "name", "current_role", "current_company", "location",
+    "skills", "education", "profile_url", "category", "last_scraped_at",
+]
+
+class ProfileSummary(BaseModel):
+    id: Optional[str] = Field(None, alias="_id")
+    profile_id: str = ""
+    name: str = ""
+    current_role: str = ""
+    current_company: str = ""
+    location: str = ""
+    skills: List[str] = []
+    education: List[Education] = []
+    profile_url: str = ""
+    category: Optional[str] = None
+    last_scraped_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+        json_encoders = {
+            ObjectId: str
+        }
+
 class ProfileUpdate(BaseModel):
     name: Optional[str] = None
     current_role: Optional[str] = None
@@ -47,8 +75,56 @@ class ProfileUpdate(BaseModel):
     profile_url: Optional[str] = None
     raw_json: Optional[Dict] = None
 
+class BulkFilter(BaseModel):
+    """search-adv filters selecting the profiles of a bulk operation."""
+    role: Optional[str] = None
+    location: Optional[str] = None
+    skill: Optional[str] = None
+    skill_mode: str = Field("all", regex="^(all|any)$")
+    category: Optional[str] = None
+    q: Optional[str] = None
+    search_mode: Optional[str] = None
+    min_exp: Optional[float] = Field(None, ge=0)
+    max_exp: Optional[float] = Field(None, ge=0)
+
+class BulkSelection(BaseModel):
+    """Profiles a bulk operation applies to: an id list or a filter."""
+    ids: List[str] = []
+    filter: Optional[BulkFilter] = None
+
+class BulkUpdate(BulkSelection):
+    update: ProfileUpdate
+
+class BulkCategoryUpdate(BulkSelection):
+    # None moves the profiles to Uncategorized
+    category: Optional[str] = None
+
 class ProfileSearch(BaseModel):
     role: Optional[str] = None
     location: Optional[str] = None
     skill: Optional[str] = None
     category: Optional[str] = None
+
+class ProfileFilter(BaseModel):
+    """Search filters in storage-neutral form; each repository translates them to its own query language."""
+    role: Optional[str] = None
+    location: Optional[str] = None
+    # Canonical skill names
+    skills: List[str] = []
+    skill_mode: str = "all"
+    category: Optional[str] = None
+    q: Optional[str] = None
+    search_mode: Optional[str] = None
+    include_education: bool = True
+    min_months: Optional[int] = None
+    max_months: Optional[int] = None
+    # Only profiles with (True) or without (False) parsed education
+    has_education: Optional[bool] = None
+    # Only these profile ids
+    ids: List[str] = []
+    # Only profiles written (imported or edited) after this time
+    updated_after: Optional[datetime] = None
+
+    def matches_all(self) -> bool:
+        """True when nothing narrows the result; modes given without a value to apply to do not."""
+        return self == ProfileFilter(skill_mode=self.skill_mode, search_mode=self.search_mode, include_education=self.include_education)
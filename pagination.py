@@ -0,0 +1,62 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Any, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Recency order used by list/search endpoints; _id breaks ties so keyset pages are stable
+RECENCY_SORT = [("last_scraped_at", -1), ("_id", -1)]
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Opaque token for the position just after `doc` in RECENCY_SORT order."""
+    scraped_at = doc.get("last_scraped_at")
+    doc_id = doc["_id"]
+    payload = {
+        "t": scraped_at.isoformat() if isinstance(scraped_at, datetime) else None,
+        "i": str(doc_id),
+        "o": isinstance(doc_id, ObjectId),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        scraped_at = datetime.fromisoformat(payload["t"]) if payload["t"] else None
+        doc_id = ObjectId(payload["i"]) if payload["o"] else str(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    return {"last_scraped_at": scraped_at, "_id": doc_id}
+
+def cursor_clause(token: str) -> Dict[str, Any]:
+    """Query clause selecting documents that sort after the cursor position."""
+    position = decode_cursor(token)
+    scraped_at = position["last_scraped_at"]
+    doc_id = position["_id"]
+    # Comparisons only match values of the same BSON type. Descending _id order puts
+    # ObjectIds before string ids, so every string id follows an ObjectId position.
+    if isinstance(doc_id, ObjectId):
+        id_after = {"$or": [{"_id": {"$lt": doc_id}}, {"_id": {"$type": "string"}}]}
+    else:
+        id_after = {"_id": {"$lt": doc_id}}
+    if scraped_at is None:
+        # Missing timestamps sort last; only ties on _id remain
+        return {"$and": [{"last_scraped_at": None}, id_after]}
+    return {
+        "$or": [
+            {"last_scraped_at": {"$lt": scraped_at}},
+            {"$and": [{"last_scraped_at": scraped_at}, id_after]},
+            {"last_scraped_at": None},
+        ]
+    }
+
+def apply_cursor(query: Dict[str, Any], token: Optional[str]) -> Dict[str, Any]:
+    if not token:
+        return query
+    clause = cursor_clause(token)
+    return {"$and": [query, clause]} if query else clause
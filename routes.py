@@ -1,308 +1,684 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Request, Response
 from fastapi.responses import StreamingResponse
-from typing import List, Optional, Dict, Any
-from bson import ObjectId
-from models import Profile, ProfileUpdate, ProfileSearch
-from db import get_collection
-from etl import import_csv_file, import_folder
+from typing import List, Optional, Dict, Any, Tuple, Callable
+from models import (
+    BulkCategoryUpdate, BulkSelection, BulkUpdate, Profile, ProfileFilter, ProfileSummary, ProfileUpdate,
+    SUMMARY_FIELDS,
+)
+from etl import MAPPING_PROFILES, import_csv_file, import_folder
+from search import SEARCH_MODES, DEFAULT_SEARCH_MODE, build_search_tokens
+from cache import APPROX_COUNT_LIMIT, bump_generation, current_generation, normalize_key, result_cache, totals_cache
+from export import EXPORT_FIELDS, EXPORT_FORMATS, EXPORT_WRITERS, parquet_available
+from jobs import JOB_STATUSES, JOB_UPLOAD_DIR, get_job, iter_job_events, job_queue, job_view, list_jobs
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+from storage import FACET_FIELDS, SEARCH_FIELDS, repository
+from dedupe import DEDUP_THRESHOLD, find_duplicates, merge_duplicates
+from similarity import similar_profiles, similarity_index
+from migrations import MIGRATION_BATCH_SIZE, MIGRATIONS, MigrationLost, MigrationRunning, migration_view, run_migration
+from utils import experience_stats
+from skills import canonical_skills
+from serialization import FastJSONResponse, compile_renderer
+from http_cache import REVALIDATE_CACHE_CONTROL, etag_matches
 import os
 import tempfile
-import csv
-import io
 
 router = APIRouter()
 
-def _sanitize_profile_document(doc: Dict[str, Any]) -> Profile:
-    """Coerce Mongo document into a valid Profile model, filling safe defaults."""
-    safe: Dict[str, Any] = {
-        "_id": doc.get("_id"),
-        "profile_id": doc.get("profile_id", ""),
-        "name": doc.get("name", ""),
-        "current_role": doc.get("current_role", ""),
-        "current_company": doc.get("current_company", ""),
-        "location": doc.get("location", ""),
-        "skills": doc.get("skills", []) or [],
-        "experience": doc.get("experience", []) or [],
-        "education": doc.get("education", []) or [],
-        "profile_url": doc.get("profile_url", ""),
-        "category": doc.get("category"),
-        "raw_json": doc.get("raw_json", {}),
-    }
-    return Profile(**safe)
+VIEW_DESCRIPTION = "full (default) or summary; summary omits raw_json and experience"
+FIELDS_DESCRIPTION = "Comma-separated profile fields to return instead of a full profile"
+SKILL_DESCRIPTION = "Comma-separated skills, matched exactly after alias normalization (e.g. React.js = react)"
+SKILL_MODE_DESCRIPTION = "all: profiles with every listed skill; any: with at least one"
+MIN_EXP_DESCRIPTION = "Minimum total experience in years"
+MAX_EXP_DESCRIPTION = "Maximum total experience in years"
+MAPPING_DESCRIPTION = "Column mapping profile (see /mappings); detected from the header by default"
+FACETS_DESCRIPTION = "Comma-separated facets to count, each optionally with its own limit (e.g. skills:20)"
+PROJECTABLE_FIELDS = set(Profile.__fields__) - {"id"}
+
+# List endpoints render documents straight to dicts instead of validating a model per item
+render_profile = compile_renderer(Profile)
+render_summary = compile_renderer(ProfileSummary)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Profiles per batched write in the bulk endpoints
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+
+DEFAULT_FACETS = ",".join(FACET_FIELDS)
+MAX_FACET_LIMIT = 100
+
+def _item_renderer(view: str, fields: Optional[str]) -> Tuple[Optional[List[str]], Callable[[Dict[str, Any]], Any]]:
+    """Fields to read from storage and the function that renders each returned document."""
+    if fields:
+        names = [f.strip() for f in fields.split(",") if f.strip() and f.strip() not in ("_id", "id")]
+        unknown = [f for f in names if f not in PROJECTABLE_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        return names, lambda doc: {"_id": str(doc["_id"]), **{name: doc.get(name) for name in names}}
+    if view == "summary":
+        return SUMMARY_FIELDS, render_summary
+    return None, render_profile
+
+def _build_search_query(
+    role: Optional[str] = None,
+    location: Optional[str] = None,
+    skill: Optional[str] = None,
+    category: Optional[str] = None,
+    q: Optional[str] = None,
+    search_mode: Optional[str] = None,
+    include_education: bool = True,
+    min_exp: Optional[float] = None,
+    max_exp: Optional[float] = None,
+    skill_mode: str = "all",
+) -> ProfileFilter:
+    """Collect the field filters and the global search box into one storage-neutral filter."""
+    return ProfileFilter(
+        role=role or None,
+        location=location or None,
+        # Exact matches on canonical skill names
+        skills=canonical_skills(skill.split(",")) if skill else [],
+        skill_mode=skill_mode,
+        category=category or None,
+        q=q or None,
+        search_mode=search_mode,
+        include_education=include_education,
+        # Years in the API, months in storage
+        min_months=round(min_exp * 12) if min_exp is not None else None,
+        max_months=round(max_exp * 12) if max_exp is not None else None,
+    )
+
+def _resolve_search_mode(search_mode: Optional[str], sort: str = "recent") -> str:
+    if search_mode and search_mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"search_mode must be one of {', '.join(SEARCH_MODES)}")
+    # Relevance ordering needs text scores, so it implies text mode unless a mode was chosen
+    if not search_mode:
+        return "text" if sort == "relevance" else DEFAULT_SEARCH_MODE
+    return search_mode
+
+def _bulk_filters(selection: BulkSelection) -> ProfileFilter:
+    """The storage filter for a bulk request's ids or search filter."""
+    if bool(selection.ids) == (selection.filter is not None):
+        raise HTTPException(status_code=400, detail="Give either ids or filter")
+    if selection.ids:
+        return ProfileFilter(ids=selection.ids)
+    f = selection.filter
+    if not any(value is not None for name, value in f.dict().items() if name != "skill_mode"):
+        # An empty filter would select every profile
+        raise HTTPException(status_code=400, detail="filter must set at least one field")
+    search_mode = _resolve_search_mode(f.search_mode)
+    return _build_search_query(f.role, f.location, f.skill, f.category, f.q, search_mode, min_exp=f.min_exp, max_exp=f.max_exp, skill_mode=f.skill_mode)
+
+def _update_data(update: ProfileUpdate) -> Dict[str, Any]:
+    update_data = {k: v for k, v in update.dict().items() if v is not None}
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    if "skills" in update_data:
+        update_data["skills"] = canonical_skills(update_data["skills"])
+    return update_data
+
+def _update_fields(profile: Dict[str, Any], update_data: Dict[str, Any]) -> Dict[str, Any]:
+    """update_data plus the fields derived from it: the prefix-search index and experience ranges."""
+    fields = dict(update_data)
+    fields["search_tokens"] = build_search_tokens({**profile, **update_data})
+    if "experience" in update_data:
+        fields["total_experience_months"], fields["current_tenure_start"] = experience_stats(update_data["experience"])
+    return fields
+
+async def _bulk_update(filters: ProfileFilter, update_data: Dict[str, Any]) -> Dict[str, int]:
+    """Apply update_data to every matching profile, BULK_BATCH_SIZE profiles per batched write."""
+    updated = 0
+    after = None
+    while True:
+        # "_id" order, so profiles the update moves out of the filter do not shift the next batch
+        docs = await repository.find_after_id(filters, SEARCH_FIELDS, after, BULK_BATCH_SIZE)
+        if not docs:
+            break
+        updated += await repository.update_many([(str(doc["_id"]), _update_fields(doc, update_data)) for doc in docs])
+        after = docs[-1]["_id"]
+    if updated:
+        await bump_generation()
+    return {"updated": updated}
+
+async def _count_total(filters: ProfileFilter, count: str) -> Tuple[Optional[int], bool]:
+    """Total for a filter as (total, is_approximate), served from the totals cache when possible."""
+    if count == "none":
+        return None, False
+    key = normalize_key(repository.name, filters.dict())
+    generation = await current_generation()
+    total = totals_cache.get(key, generation)
+    if total is not None:
+        return total, False
+    if count == "approx":
+        # A total from before the latest write is good enough for an estimate
+        total = totals_cache.get(key)
+        if total is not None:
+            return total, True
+        if filters.matches_all():
+            # Collection metadata, never cached as an exact total
+            return await repository.estimated_count(), True
+        total = await repository.count(filters, limit=APPROX_COUNT_LIMIT)
+        if total >= APPROX_COUNT_LIMIT:
+            return total, True
+    else:
+        total = await repository.count(filters)
+    totals_cache.set(key, total, generation)
+    return total, False
+
+def _validator_headers(cache_key: str) -> Dict[str, str]:
+    return {"ETag": result_cache.etag(cache_key), "Cache-Control": REVALIDATE_CACHE_CONTROL}
+
+async def _cached_response(cache_key: str, request: Request) -> Optional[Response]:
+    """304 when the client holds the current body, the cached body if there is one, else None."""
+    validators = _validator_headers(cache_key)
+    if etag_matches(request.headers.get("if-none-match"), validators["ETag"]):
+        # The ETag names the write generation and the params, so storage need not be read
+        return Response(status_code=304, headers=validators)
+    cached = await result_cache.get(cache_key)
+    if cached is None:
+        return None
+    body, headers = cached
+    return Response(content=body, media_type="application/json", headers={**headers, **validators, "X-Cache": "HIT"})
+
+async def _store_response(cache_key: str, content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serialize a response once, keep the body in the result cache and return it."""
+    headers = headers or {}
+    response = FastJSONResponse(content, headers={**headers, **_validator_headers(cache_key)})
+    await result_cache.set(cache_key, response.body, headers)
+    response.headers["X-Cache"] = "MISS"
+    return response
+
+def _check_cursor(cursor: Optional[str]) -> None:
+    if not cursor:
+        return
+    try:
+        decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _render_items(docs: List[Dict[str, Any]], render: Callable[[Dict[str, Any]], Any]) -> List[Any]:
+    items = []
+    for doc in docs:
+        try:
+            items.append(render(doc))
+        except Exception:
+            # Skip malformed documents instead of failing the whole request
+            continue
+    return items
+
+def _parse_facets(facets: str, facet_limit: int) -> Dict[str, int]:
+    """Facet name -> number of values to return, from "name" or "name:limit" entries."""
+    limits = {}
+    for entry in facets.split(","):
+        name, _, limit = entry.strip().partition(":")
+        if not name:
+            continue
+        if name not in FACET_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Unknown facet '{name}'; available: {', '.join(FACET_FIELDS)}")
+        if limit and not (limit.isdigit() and 1 <= int(limit) <= MAX_FACET_LIMIT):
+            raise HTTPException(status_code=400, detail=f"Facet limit for '{name}' must be between 1 and {MAX_FACET_LIMIT}")
+        limits[name] = int(limit) if limit else facet_limit
+    return limits
+
+def _check_mapping(mapping: Optional[str]) -> None:
+    if mapping and mapping not in MAPPING_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown mapping profile '{mapping}'")
+
+async def _spool_upload(file: UploadFile, directory: Optional[str] = None) -> str:
+    """Write an upload to disk in chunks instead of reading it into memory at once."""
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(delete=False, dir=directory, suffix=os.path.splitext(file.filename)[1]) as tmp:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            tmp.write(chunk)
+        return tmp.name
 
 @router.post("/profiles/import", response_model=dict)
-async def import_profiles(file: UploadFile = File(...), category: Optional[str] = Query(None)):
-    """Import profiles from uploaded CSV/Excel file."""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
+async def import_profiles(
+    response: Response,
+    file: UploadFile = File(...),
+    category: Optional[str] = Query(None),
+    wait: bool = Query(False, description="Import within the request instead of queueing a background job"),
+    mapping: Optional[str] = Query(None, description=MAPPING_DESCRIPTION),
+):
+    """Import profiles from uploaded CSV/Excel file as a background job (or inline with wait=true)."""
+    _check_mapping(mapping)
+    # Job state lives in MongoDB; other storage backends always import inline
+    if not wait and repository.supports_jobs:
+        tmp_path = await _spool_upload(file, JOB_UPLOAD_DIR)
+        job = await job_queue.submit("file", tmp_path, file.filename, category, owns_file=True, mapping=mapping)
+        response.status_code = 202
+        return {"message": "Import queued", "job": job_view(job)}
+    tmp_path = await _spool_upload(file)
     try:
-        result = await import_csv_file(tmp_path, category)
+        result = await import_csv_file(tmp_path, category, mapping=mapping)
         return {"message": "Import completed", "stats": result}
     finally:
         os.unlink(tmp_path)
 
 @router.post("/profiles/import-folder", response_model=dict)
-async def import_profiles_folder(folder_path: str, category: Optional[str] = Query(None)):
-    """Import all CSV/Excel files from a folder."""
+async def import_profiles_folder(
+    response: Response,
+    folder_path: str,
+    category: Optional[str] = Query(None),
+    wait: bool = Query(False, description="Import within the request instead of queueing a background job"),
+    mapping: Optional[str] = Query(None, description=MAPPING_DESCRIPTION),
+):
+    """Import all CSV/Excel files from a folder as a background job (or inline with wait=true)."""
     if not os.path.isdir(folder_path):
         raise HTTPException(status_code=400, detail="Invalid folder path")
-    result = await import_folder(folder_path, category)
+    _check_mapping(mapping)
+    if not wait and repository.supports_jobs:
+        job = await job_queue.submit("folder", folder_path, os.path.basename(os.path.normpath(folder_path)), category, mapping=mapping)
+        response.status_code = 202
+        return {"message": "Folder import queued", "job": job_view(job)}
+    result = await import_folder(folder_path, category, mapping=mapping)
     return {"message": "Folder import completed", "stats": result}
 
+@router.get("/mappings", response_model=Dict[str, Dict[str, str]])
+async def get_mappings():
+    """List the column mapping profiles available to imports."""
+    return MAPPING_PROFILES
+
+def _require_jobs() -> None:
+    # Job state lives in MongoDB; other backends import inline and keep no jobs
+    if not repository.supports_jobs:
+        raise HTTPException(status_code=501, detail=f"Import jobs are not available with the {repository.name} storage backend")
+
+@router.get("/jobs", response_model=List[Dict[str, Any]])
+async def get_jobs(
+    status: Optional[str] = Query(None, regex=f"^({'|'.join(JOB_STATUSES)})$"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """List import jobs, newest first."""
+    _require_jobs()
+    return [job_view(doc) for doc in await list_jobs(status, limit)]
+
+@router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_job_status(job_id: str):
+    """Get an import job's state, progress and rows processed per second."""
+    _require_jobs()
+    doc = await get_job(job_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_view(doc)
+
+@router.post("/jobs/{job_id}/cancel", response_model=Dict[str, Any])
+async def cancel_job(job_id: str):
+    """Cancel a queued or running import job. Batches already written are kept."""
+    _require_jobs()
+    doc = await job_queue.cancel(job_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_view(doc)
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent events with the job's progress until it finishes."""
+    _require_jobs()
+    if not await get_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        iter_job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/profiles", response_model=List[Profile])
-async def get_profiles(skip: int = 0, limit: int = 10):
-    """Get all profiles with pagination."""
-    collection = await get_collection()
-    profiles = []
-    async for profile in collection.find().sort("last_scraped_at", -1).skip(skip).limit(limit):
-        try:
-            profiles.append(_sanitize_profile_document(profile))
-        except Exception:
-            # Skip malformed documents instead of failing the whole request
-            continue
-    return profiles
+async def get_profiles(
+    request: Request,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces skip"),
+    view: str = Query("full", regex="^(full|summary)$", description=VIEW_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    """Get all profiles with pagination. The next page's cursor is sent in the X-Next-Cursor header."""
+    # Bad parameters get their 400 even when a cached body or a 304 would match
+    read_fields, render = _item_renderer(view, fields)
+    _check_cursor(cursor)
+    cache_key = await result_cache.key("profiles", {"skip": skip, "limit": limit, "cursor": cursor, "view": view, "fields": fields})
+    cached = await _cached_response(cache_key, request)
+    if cached:
+        return cached
+    docs = await repository.find(ProfileFilter(), read_fields, skip=skip, limit=limit, cursor=cursor)
+    headers = {}
+    if docs and len(docs) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(docs[-1])
+    # Items are already rendered (and slim views are not Profiles), so skip response_model
+    return await _store_response(cache_key, _render_items(docs, render), headers)
 
 @router.get("/profiles/by-id/{profile_id}", response_model=Profile)
 async def get_profile(profile_id: str):
     """Get a single profile by ID."""
-    collection = await get_collection()
-    profile = await collection.find_one({"_id": ObjectId(profile_id)})
+    profile = await repository.get(profile_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     return Profile(**profile)
 
+@router.get("/profiles/by-id/{profile_id}/similar", response_model=Dict[str, Any])
+async def get_similar_profiles(
+    profile_id: str,
+    k: int = Query(10, ge=1, le=100, description="Profiles to return"),
+    view: str = Query("summary", regex="^(full|summary)$", description=VIEW_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    """Profiles most similar to this one by skills, role and location (TF-IDF cosine), best first."""
+    profile = await repository.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    read_fields, render = _item_renderer(view, fields)
+    matches = dict(await similar_profiles(profile, k))
+    docs = await repository.find(ProfileFilter(ids=list(matches)), read_fields, limit=k) if matches else []
+    by_id = {str(doc["_id"]): doc for doc in docs}
+    # Profiles deleted since the index was refreshed are skipped
+    items = _render_items([by_id[match_id] for match_id in matches if match_id in by_id], render)
+    for item in items:
+        item["similarity"] = matches[str(item["_id"])]
+    return FastJSONResponse({"items": items, "indexed_profiles": len(similarity_index)})
+
 @router.get("/profiles/search", response_model=List[Profile])
 async def search_profiles(
+    request: Request,
     role: Optional[str] = Query(None),
     location: Optional[str] = Query(None),
-    skill: Optional[str] = Query(None),
+    skill: Optional[str] = Query(None, description=SKILL_DESCRIPTION),
+    skill_mode: str = Query("all", regex="^(all|any)$", description=SKILL_MODE_DESCRIPTION),
     category: Optional[str] = Query(None),
     q: Optional[str] = Query(None, description="Global search across name/role/company/location/skills"),
+    search_mode: Optional[str] = Query(None, description="prefix (default), text or regex"),
+    sort: str = Query("recent", regex="^(recent|relevance)$"),
     skip: int = 0,
-    limit: int = 10
+    limit: int = 10,
+    view: str = Query("full", regex="^(full|summary)$", description=VIEW_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
 ):
     """Search profiles by filters."""
-    collection = await get_collection()
-    criteria = []
-    if role:
-        criteria.append({"current_role": {"$regex": role, "$options": "i"}})
-    if location:
-        criteria.append({"location": {"$regex": location, "$options": "i"}})
-    if skill:
-        # For arrays of strings, regex directly on field works across elements
-        criteria.append({"skills": {"$regex": skill, "$options": "i"}})
-    if category:
-        criteria.append({"category": category})
-    if q:
-        or_block = {
-            "$or": [
-                {"name": {"$regex": q, "$options": "i"}},
-                {"current_role": {"$regex": q, "$options": "i"}},
-                {"current_company": {"$regex": q, "$options": "i"}},
-                {"location": {"$regex": q, "$options": "i"}},
-                {"skills": {"$regex": q, "$options": "i"}},
-                {"category": {"$regex": q, "$options": "i"}},
-            ]
-        }
-        criteria.append(or_block)
+    read_fields, render = _item_renderer(view, fields)
+    search_mode = _resolve_search_mode(search_mode, sort)
+    cache_key = await result_cache.key("search", {
+        "role": role, "location": location, "skill": skill, "skill_mode": skill_mode, "category": category, "q": q,
+        "search_mode": search_mode, "sort": sort, "skip": skip, "limit": limit, "view": view, "fields": fields,
+    })
+    cached = await _cached_response(cache_key, request)
+    if cached:
+        return cached
+    filters = _build_search_query(role, location, skill, category, q, search_mode, include_education=False, skill_mode=skill_mode)
 
-    query = {"$and": criteria} if criteria else {}
-
-    profiles = []
-    async for profile in collection.find(query).sort("last_scraped_at", -1).skip(skip).limit(limit):
-        try:
-            profiles.append(_sanitize_profile_document(profile))
-        except Exception:
-            continue
-    return profiles
+    by_relevance = bool(q) and sort == "relevance" and search_mode == "text"
+    docs = await repository.find(filters, read_fields, by_relevance, skip=skip, limit=limit)
+    return await _store_response(cache_key, _render_items(docs, render))
 
 @router.get("/profiles/search-adv", response_model=Dict[str, Any])
 async def search_profiles_advanced(
+    request: Request,
     role: Optional[str] = Query(None),
     location: Optional[str] = Query(None),
-    skill: Optional[str] = Query(None),
+    skill: Optional[str] = Query(None, description=SKILL_DESCRIPTION),
+    skill_mode: str = Query("all", regex="^(all|any)$", description=SKILL_MODE_DESCRIPTION),
     category: Optional[str] = Query(None),
     q: Optional[str] = Query(None),
+    search_mode: Optional[str] = Query(None, description="prefix (default), text or regex"),
+    sort: str = Query("recent", regex="^(recent|relevance)$"),
+    min_exp: Optional[float] = Query(None, ge=0, description=MIN_EXP_DESCRIPTION),
+    max_exp: Optional[float] = Query(None, ge=0, description=MAX_EXP_DESCRIPTION),
     skip: int = 0,
-    limit: int = 10
+    limit: int = 10,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces skip"),
+    count: str = Query("exact", regex="^(exact|approx|none)$", description="How to compute total: exact, approx or none"),
+    view: str = Query("full", regex="^(full|summary)$", description=VIEW_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
 ):
-    """Search returning items and total count for pagination UI."""
-    collection = await get_collection()
-    criteria = []
-    if role:
-        criteria.append({"current_role": {"$regex": role, "$options": "i"}})
-    if location:
-        criteria.append({"location": {"$regex": location, "$options": "i"}})
-    if skill:
-        criteria.append({"skills": {"$elemMatch": {"$regex": skill, "$options": "i"}}})
-    if category:
-        criteria.append({"category": category})
-    if q:
-        criteria.append({
-            "$or": [
-                {"name": {"$regex": q, "$options": "i"}},
-                {"current_role": {"$regex": q, "$options": "i"}},
-                {"current_company": {"$regex": q, "$options": "i"}},
-                {"location": {"$regex": q, "$options": "i"}},
-                {"skills": {"$regex": q, "$options": "i"}},
-                {"category": {"$regex": q, "$options": "i"}},
-                {"education": {"$elemMatch": {"institute": {"$regex": q, "$options": "i"}}}},
-            ]
-        })
-    query = {"$and": criteria} if criteria else {}
-
-    total = await collection.count_documents(query)
-    items: List[Profile] = []
-    async for doc in collection.find(query).sort("last_scraped_at", -1).skip(skip).limit(limit):
-        try:
-            items.append(_sanitize_profile_document(doc))
-        except Exception:
-            continue
-    return {"items": items, "total": total}
+    """Search returning items, total count and next_cursor for pagination UI."""
+    read_fields, render = _item_renderer(view, fields)
+    search_mode = _resolve_search_mode(search_mode, sort)
+    by_relevance = bool(q) and sort == "relevance" and search_mode == "text"
+    if cursor and by_relevance:
+        raise HTTPException(status_code=400, detail="cursor pagination is not available with sort=relevance")
+    _check_cursor(cursor)
+    cache_key = await result_cache.key("search-adv", {
+        "role": role, "location": location, "skill": skill, "skill_mode": skill_mode, "category": category, "q": q,
+        "search_mode": search_mode, "sort": sort, "min_exp": min_exp, "max_exp": max_exp,
+        "skip": skip, "limit": limit, "cursor": cursor, "count": count, "view": view, "fields": fields,
+    })
+    cached = await _cached_response(cache_key, request)
+    if cached:
+        return cached
+    filters = _build_search_query(role, location, skill, category, q, search_mode, min_exp=min_exp, max_exp=max_exp, skill_mode=skill_mode)
+
+    total, total_approximate = await _count_total(filters, count)
+    docs = await repository.find(filters, read_fields, by_relevance, skip=skip, limit=limit, cursor=cursor)
+    next_cursor = encode_cursor(docs[-1]) if docs and len(docs) == limit and not by_relevance else None
+    return await _store_response(cache_key, {
+        "items": _render_items(docs, render), "total": total, "total_approximate": total_approximate, "next_cursor": next_cursor,
+    })
+
+@router.get("/profiles/search-faceted", response_model=Dict[str, Any])
+async def search_profiles_faceted(
+    request: Request,
+    role: Optional[str] = Query(None),
+    location: Optional[str] = Query(None),
+    skill: Optional[str] = Query(None, description=SKILL_DESCRIPTION),
+    skill_mode: str = Query("all", regex="^(all|any)$", description=SKILL_MODE_DESCRIPTION),
+    category: Optional[str] = Query(None),
+    q: Optional[str] = Query(None),
+    search_mode: Optional[str] = Query(None, description="prefix (default), text or regex"),
+    sort: str = Query("recent", regex="^(recent|relevance)$"),
+    min_exp: Optional[float] = Query(None, ge=0, description=MIN_EXP_DESCRIPTION),
+    max_exp: Optional[float] = Query(None, ge=0, description=MAX_EXP_DESCRIPTION),
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces skip"),
+    view: str = Query("full", regex="^(full|summary)$", description=VIEW_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    facets: str = Query(DEFAULT_FACETS, description=FACETS_DESCRIPTION),
+    facet_limit: int = Query(10, ge=1, le=MAX_FACET_LIMIT, description="Values per facet when not given in facets"),
+):
+    """Search returning the page, total and top facet values with counts in one round trip."""
+    read_fields, render = _item_renderer(view, fields)
+    facet_limits = _parse_facets(facets, facet_limit)
+    search_mode = _resolve_search_mode(search_mode, sort)
+    by_relevance = bool(q) and sort == "relevance" and search_mode == "text"
+    if cursor and by_relevance:
+        raise HTTPException(status_code=400, detail="cursor pagination is not available with sort=relevance")
+    _check_cursor(cursor)
+    cache_key = await result_cache.key("search-faceted", {
+        "role": role, "location": location, "skill": skill, "skill_mode": skill_mode, "category": category, "q": q,
+        "search_mode": search_mode, "sort": sort, "min_exp": min_exp, "max_exp": max_exp,
+        "skip": skip, "limit": limit, "cursor": cursor, "view": view, "fields": fields,
+        "facets": facets, "facet_limit": facet_limit,
+    })
+    cached = await _cached_response(cache_key, request)
+    if cached:
+        return cached
+    filters = _build_search_query(role, location, skill, category, q, search_mode, min_exp=min_exp, max_exp=max_exp, skill_mode=skill_mode)
+
+    result = await repository.faceted_search(filters, read_fields, by_relevance, skip, limit, cursor, facet_limits)
+    docs = result["items"]
+    next_cursor = encode_cursor(docs[-1]) if docs and len(docs) == limit and not by_relevance else None
+    return await _store_response(cache_key, {
+        "items": _render_items(docs, render),
+        "total": result["total"],
+        "next_cursor": next_cursor,
+        "facets": {
+            name: [{"value": value, "count": count} for value, count in values]
+            for name, values in result["facets"].items()
+        },
+    })
 
 @router.get("/profiles/by-category", response_model=Dict[str, Dict[str, Any]])
 async def get_profiles_by_category(limit: Optional[int] = Query(10, ge=1)):
-    """Get profiles grouped by category with counts."""
-    collection = await get_collection()
-    pipeline = [
-        {"$group": {
-            "_id": {"$ifNull": ["$category", "Uncategorized"]},
-            "profiles": {"$push": "$$ROOT"},
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"count": -1}},
-        {"$project": {
-            "_id": 0,
-            "category": "$_id",
-            "profiles": {"$slice": ["$profiles", limit]},
-            "count": 1
-        }}
-    ]
-    groups = {}
-    async for doc in collection.aggregate(pipeline):
-        category = doc["category"]
-        groups[category] = {
-            "profiles": [Profile(**p).dict(by_alias=True) for p in doc["profiles"]],
-            "count": doc["count"]
+    """Get recent profile summaries grouped by category with counts."""
+    groups = await repository.category_groups(limit)
+    # Rendered without a model, so returned as a response to skip response_model validation
+    return FastJSONResponse({
+        group["category"]: {
+            "profiles": [render_summary(p) for p in group["profiles"][:limit]],
+            "count": group["count"],
         }
-    return groups
+        for group in groups
+    })
 
 @router.put("/profiles/by-id/{profile_id}", response_model=Profile)
 async def update_profile(profile_id: str, update: ProfileUpdate):
     """Update a profile."""
-    collection = await get_collection()
-    update_data = {k: v for k, v in update.dict().items() if v is not None}
-    if not update_data:
-        raise HTTPException(status_code=400, detail="No fields to update")
-    result = await collection.update_one({"_id": ObjectId(profile_id)}, {"$set": update_data})
-    if result.matched_count == 0:
+    update_data = _update_data(update)
+    profile = await repository.get(profile_id)
+    if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
-    updated_profile = await collection.find_one({"_id": ObjectId(profile_id)})
+    update_data = _update_fields(profile, update_data)
+    updated_profile = await repository.update(profile_id, update_data)
+    if not updated_profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    await bump_generation()
     return Profile(**updated_profile)
 
 @router.delete("/profiles/by-id/{profile_id}")
 async def delete_profile(profile_id: str):
     """Delete a profile."""
-    collection = await get_collection()
-    result = await collection.delete_one({"_id": ObjectId(profile_id)})
-    if result.deleted_count == 0:
+    if not await repository.delete(profile_id):
         raise HTTPException(status_code=404, detail="Profile not found")
+    await bump_generation()
     return {"message": "Profile deleted"}
 
+@router.post("/profiles/bulk/update", response_model=Dict[str, Any])
+async def bulk_update_profiles(request: BulkUpdate):
+    """Apply the same field updates to the listed profiles or to every profile matching a filter."""
+    update_data = _update_data(request.update)
+    if "profile_url" in update_data:
+        raise HTTPException(status_code=400, detail="profile_url is unique and cannot be set in bulk")
+    return await _bulk_update(_bulk_filters(request), update_data)
+
+@router.post("/profiles/bulk/category", response_model=Dict[str, Any])
+async def bulk_set_category(request: BulkCategoryUpdate):
+    """Move the listed or matching profiles to a category (Uncategorized when category is null)."""
+    return await _bulk_update(_bulk_filters(request), {"category": request.category or None})
+
+@router.post("/profiles/bulk/delete", response_model=Dict[str, Any])
+async def bulk_delete_profiles(request: BulkSelection):
+    """Delete the listed profiles or every profile matching a filter."""
+    filters = _bulk_filters(request)
+    deleted = 0
+    after = None
+    while True:
+        docs = await repository.find_after_id(filters, ["_id"], after, BULK_BATCH_SIZE)
+        if not docs:
+            break
+        deleted += await repository.delete_many([str(doc["_id"]) for doc in docs])
+        after = docs[-1]["_id"]
+    if deleted:
+        await bump_generation()
+    return {"deleted": deleted}
+
 @router.get("/profiles/export-csv")
 async def export_profiles_csv(
     role: Optional[str] = Query(None),
     location: Optional[str] = Query(None),
-    skill: Optional[str] = Query(None),
+    skill: Optional[str] = Query(None, description=SKILL_DESCRIPTION),
+    skill_mode: str = Query("all", regex="^(all|any)$", description=SKILL_MODE_DESCRIPTION),
     category: Optional[str] = Query(None),
     q: Optional[str] = Query(None),
+    search_mode: Optional[str] = Query(None, description="prefix (default), text or regex"),
+    min_exp: Optional[float] = Query(None, ge=0, description=MIN_EXP_DESCRIPTION),
+    max_exp: Optional[float] = Query(None, ge=0, description=MAX_EXP_DESCRIPTION),
+    format: str = Query("csv", description="csv, ndjson or parquet"),
 ):
-    """Export profiles to CSV based on filters."""
-    collection = await get_collection()
-    criteria = []
-    if role:
-        criteria.append({"current_role": {"$regex": role, "$options": "i"}})
-    if location:
-        criteria.append({"location": {"$regex": location, "$options": "i"}})
-    if skill:
-        criteria.append({"skills": {"$elemMatch": {"$regex": skill, "$options": "i"}}})
-    if category:
-        criteria.append({"category": category})
-    if q:
-        criteria.append({
-            "$or": [
-                {"name": {"$regex": q, "$options": "i"}},
-                {"current_role": {"$regex": q, "$options": "i"}},
-                {"current_company": {"$regex": q, "$options": "i"}},
-                {"location": {"$regex": q, "$options": "i"}},
-                {"skills": {"$regex": q, "$options": "i"}},
-                {"category": {"$regex": q, "$options": "i"}},
-                {"education": {"$elemMatch": {"institute": {"$regex": q, "$options": "i"}}}},
-            ]
-        })
-    query = {"$and": criteria} if criteria else {}
-
-    # Fetch all matching profiles
-    profiles = []
-    async for doc in collection.find(query).sort("last_scraped_at", -1):
-        try:
-            profiles.append(_sanitize_profile_document(doc))
-        except Exception:
-            continue
+    """Stream matching profiles as CSV, NDJSON or Parquet."""
+    search_mode = _resolve_search_mode(search_mode)
+    filters = _build_search_query(role, location, skill, category, q, search_mode, min_exp=min_exp, max_exp=max_exp, skill_mode=skill_mode)
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow to be installed")
 
-    # Generate CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Header
-    writer.writerow([
-        "Profile ID", "Name", "Current Role", "Current Company", "Location",
-        "Skills", "Experience", "Education", "Profile URL", "Category"
-    ])
-
-    # Rows
-    for p in profiles:
-        writer.writerow([
-            p.profile_id,
-            p.name,
-            p.current_role,
-            p.current_company,
-            p.location,
-            "; ".join(p.skills),
-            "; ".join([f"{e.role} at {e.company}" for e in p.experience]),
-            "; ".join([f"{e.degree} from {e.institute}" for e in p.education]),
-            p.profile_url,
-            p.category or "",
-        ])
-
-    output.seek(0)
-    response = StreamingResponse(io.StringIO(output.getvalue()), media_type="text/csv")
-    response.headers["Content-Disposition"] = "attachment; filename=profiles_export.csv"
+    profiles = repository.iter_profiles(filters, EXPORT_FIELDS)
+    media_type, extension = EXPORT_FORMATS[format]
+    response = StreamingResponse(EXPORT_WRITERS[format](profiles), media_type=media_type)
+    response.headers["Content-Disposition"] = f"attachment; filename=profiles_export.{extension}"
     return response
 
 @router.get("/profiles/stats", response_model=Dict[str, Any])
-async def get_profiles_stats():
+async def get_profiles_stats(request: Request):
     """Get basic stats about profiles."""
-    collection = await get_collection()
-    total = await collection.count_documents({})
-    return {"total_profiles": total}
+    cache_key = await result_cache.key("stats", {})
+    cached = await _cached_response(cache_key, request)
+    if cached:
+        return cached
+    total = await repository.estimated_count()
+    return await _store_response(cache_key, {"total_profiles": total})
+
+async def _run_migration(name: str, batch_size: int, restart: bool) -> Dict[str, Any]:
+    try:
+        return await run_migration(name, batch_size, restart)
+    except (MigrationRunning, MigrationLost):
+        raise HTTPException(status_code=409, detail=f"Migration {name} is already running")
 
 @router.post("/profiles/backfill-education")
-async def backfill_education():
-    """One-time helper: if education is empty but raw_json has 'Education', fill it."""
-    collection = await get_collection()
-    updated = 0
-    async for doc in collection.find({"$or": [{"education": {"$size": 0}}, {"education": {"$exists": False}}]}):
-        raw = doc.get("raw_json", {})
-        edu = raw.get("Education") or raw.get("education")
-        if not edu:
-            continue
-        if isinstance(edu, list):
-            edu_list = [{"degree": "", "institute": str(e).strip()} for e in edu if str(e).strip()]
-        else:
-            edu_list = [{"degree": "", "institute": s.strip()} for s in str(edu).split("|") if s.strip()]
-        if edu_list:
-            await collection.update_one({"_id": doc["_id"]}, {"$set": {"education": edu_list}})
-            updated += 1
+async def backfill_education(batch_size: int = Query(MIGRATION_BATCH_SIZE, ge=1)):
+    """One-time helper: if education is empty but raw_json has 'Education', fill it. Runs the backfill_education migration."""
+    state = await repository.get_migration("backfill_education")
+    # Resume an interrupted run; after a completed one, look for profiles imported since
+    restart = bool(state and state.get("status") == "completed")
+    state = await _run_migration("backfill_education", batch_size, restart)
+    return {"updated": state["updated"]}
+
+@router.get("/migrations", response_model=List[Dict[str, Any]])
+async def list_migrations():
+    """Every migration with its checkpoint: status, last processed _id and counts."""
+    return [migration_view(name, await repository.get_migration(name)) for name in MIGRATIONS]
+
+@router.post("/migrations/{name}/run", response_model=Dict[str, Any])
+async def run_named_migration(
+    name: str,
+    batch_size: int = Query(MIGRATION_BATCH_SIZE, ge=1, description="Profiles per batch and checkpoint"),
+    restart: bool = Query(False, description="Start from the beginning, even if completed"),
+):
+    """Run a migration to completion, resuming after its last checkpoint."""
+    if name not in MIGRATIONS:
+        raise HTTPException(status_code=404, detail="Migration not found")
+    return migration_view(name, await _run_migration(name, batch_size, restart))
+
+@router.post("/profiles/rebuild-search-index")
+async def rebuild_search_index(batch_size: int = Query(1000, ge=1)):
+    """Recompute the q search index for every profile (e.g. for documents imported before prefix search)."""
+    updated = await repository.rebuild_search_index(batch_size)
+    if updated:
+        await bump_generation()
     return {"updated": updated}
+
+@router.get("/profiles/duplicates", response_model=Dict[str, Any])
+async def get_duplicate_profiles(
+    threshold: float = Query(DEDUP_THRESHOLD, gt=0, le=1, description="Minimum Jaccard similarity of name, company, location and skills"),
+    limit: int = Query(100, ge=1, le=1000, description="Clusters to list"),
+):
+    """Clusters of duplicate profiles: the same canonical URL, or MinHash/LSH near-duplicates with matching names."""
+    clusters = await find_duplicates(threshold)
+    return {
+        "clusters": len(clusters),
+        "duplicates": sum(len(cluster["profiles"]) - 1 for cluster in clusters),
+        "items": clusters[:limit],
+    }
+
+@router.post("/profiles/duplicates/merge", response_model=Dict[str, Any])
+async def merge_duplicate_profiles(
+    threshold: float = Query(DEDUP_THRESHOLD, gt=0, le=1, description="Minimum Jaccard similarity of name, company, location and skills"),
+    limit: int = Query(100, ge=1, le=1000, description="Merged clusters to list"),
+):
+    """Merge each duplicate cluster into its most recently scraped profile and delete the others."""
+    merged = await merge_duplicates(threshold)
+    return {
+        "clusters": len(merged),
+        "removed": sum(len(item["merged"]) for item in merged),
+        "items": merged[:limit],
+    }
+
+@router.get("/skills/autocomplete", response_model=List[Dict[str, Any]])
+async def autocomplete_skills(prefix: str = Query("", description="Start of a skill name"), limit: int = Query(10, ge=1, le=100)):
+    """Most common canonical skills starting with prefix."""
+    return await repository.suggest_skills(prefix, limit)
+
+@router.get("/cache/stats", response_model=Dict[str, Any])
+async def get_cache_stats():
+    """Hit/miss counters for the search result cache."""
+    return await result_cache.stats()
@@ -1,7 +1,7 @@
+import argparse
 import asyncio
 from etl import import_folder
 import os
-import sys
 
 # --- INSTRUCTIONS ---
 # 1. Create a folder named 'data_to_import' in your project directory.
@@ -9,9 +9,11 @@ import sys
 # 3. Make sure your MongoDB server is running and you have created a .env file with the MONGODB_URI.
 # 4. Run this script from your terminal: python run_import.py [category]
 #    (Replace [category] with the desired category name, e.g., python run_import.py hrbp)
+#    Add --workers N to control how many files are parsed in parallel (default: one per core).
+#    Files unchanged since the last run are skipped; add --force to re-import them anyway.
 # --------------------
 
-async def main(category=None):
+async def main(category=None, workers=None, force=False):
     """The main function to run the import process."""
     project_root = os.path.dirname(os.path.abspath(__file__))
     import_folder_path = os.path.join(project_root, 'data_to_import')
@@ -25,14 +27,17 @@ async def main(category=None):
     if category:
         print(f"Using category: {category}")
     try:
-        results = await import_folder(import_folder_path, category)
+        results = await import_folder(import_folder_path, category, workers=workers, force=force)
         print("\nImport process finished.")
         print("Summary:")
         if not results:
             print("  No files were processed. Make sure your files have a .csv, .xlsx, or .xls extension.")
         for file_name, result in results.items():
             cat = result.get('category', 'None (CLI-provided or not set)')
-            print(f"  - {file_name} (Category: {cat}): Inserted {result.get('inserted', 0)}, Updated {result.get('updated', 0)}")
+            if result.get('file_unchanged'):
+                print(f"  - {file_name} (Category: {cat}): File unchanged, skipped")
+                continue
+            print(f"  - {file_name} (Category: {cat}): Inserted {result.get('inserted', 0)}, Updated {result.get('updated', 0)}, Unchanged {result.get('unchanged', 0)}")
     except Exception as e:
         print(f"An error occurred during the import process: {e}")
 
@@ -44,6 +49,10 @@ if __name__ == "__main__":
         print("Error: MONGODB_URI is not set in your .env file.")
         print("Please create a .env file with: MONGODB_URI='your_mongodb_connection_string'")
     else:
-        category = sys.argv[1] if len(sys.argv) > 1 else None
+        parser = argparse.ArgumentParser(description="Import CSV/Excel files from data_to_import into MongoDB.")
+        parser.add_argument("category", nargs="?", default=None, help="Category to assign to all imported profiles")
+        parser.add_argument("--workers", type=int, default=None, help="Number of parser processes (default: one per core)")
+        parser.add_argument("--force", action="store_true", help="Re-import files even if they are unchanged since the last run")
+        args = parser.parse_args()
         print("MongoDB URI found. Running importer...")
-        asyncio.run(main(category))
+        asyncio.run(main(args.category, args.workers, args.force))
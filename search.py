@@ -0,0 +1,69 @@
+import os
+import re
+from typing import List, Dict, Any, Optional
+
+# q handling: "prefix" uses the search_tokens index, "text" the weighted text index,
+# "regex" keeps the original unanchored case-insensitive $or for compatibility
+SEARCH_MODES = ("prefix", "text", "regex")
+DEFAULT_SEARCH_MODE = os.getenv("SEARCH_MODE", "prefix")
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+# Longest prefix stored per token; longer query tokens are truncated to match
+MAX_PREFIX_LENGTH = 15
+
+TEXT_INDEX_WEIGHTS = {
+    "name": 10,
+    "current_role": 5,
+    "current_company": 5,
+    "skills": 3,
+    "location": 2,
+    "category": 2,
+    "education.institute": 1,
+}
+TEXT_SCORE = {"$meta": "textScore"}
+
+def tokenize(text: Any) -> List[str]:
+    """Lowercase a value and split it into alphanumeric tokens."""
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+def build_search_tokens(profile: Dict[str, Any]) -> List[str]:
+    """Edge n-grams of every token in the searchable fields of a profile."""
+    values = [
+        profile.get("name"),
+        profile.get("current_role"),
+        profile.get("current_company"),
+        profile.get("location"),
+        profile.get("category"),
+    ]
+    values.extend(profile.get("skills") or [])
+    values.extend(e.get("institute") for e in profile.get("education") or [] if isinstance(e, dict))
+    prefixes = set()
+    for value in values:
+        for token in tokenize(value):
+            token = token[:MAX_PREFIX_LENGTH]
+            prefixes.update(token[:i] for i in range(1, len(token) + 1))
+    return sorted(prefixes)
+
+def build_q_clause(q: str, mode: str = None, include_education: bool = True) -> Optional[Dict[str, Any]]:
+    """Translate the global search box into a query clause for the given mode."""
+    mode = mode or DEFAULT_SEARCH_MODE
+    if mode == "text":
+        return {"$text": {"$search": q}}
+    if mode == "regex":
+        clauses = [
+            {"name": {"$regex": q, "$options": "i"}},
+            {"current_role": {"$regex": q, "$options": "i"}},
+            {"current_company": {"$regex": q, "$options": "i"}},
+            {"location": {"$regex": q, "$options": "i"}},
+            {"skills": {"$regex": q, "$options": "i"}},
+            {"category": {"$regex": q, "$options": "i"}},
+        ]
+        if include_education:
+            clauses.append({"education": {"$elemMatch": {"institute": {"$regex": q, "$options": "i"}}}})
+        return {"$or": clauses}
+    tokens = sorted({token[:MAX_PREFIX_LENGTH] for token in tokenize(q)})
+    if not tokens:
+        return None
+    return {"search_tokens": {"$all": tokens}}
@@ -0,0 +1,83 @@
+import json
+import math
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Tuple, Type
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, ModelField
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Renderer = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode a response body; orjson when installed (NaN becomes null), else the stdlib encoder."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_encode_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_encode_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for bodies that are already plain dicts and lists; skips jsonable_encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def _clean_nan(value: Dict[str, Any]) -> Dict[str, Any]:
+    # Empty sheet cells come back from pandas as NaN, which is not valid JSON
+    return {k: None if isinstance(v, float) and math.isnan(v) else v for k, v in value.items()}
+
+def _to_str(value: Any) -> str:
+    return value if isinstance(value, str) else str(value)
+
+def _default_factory(field: ModelField) -> Callable[[], Any]:
+    if field.default_factory is not None:
+        return field.default_factory
+    if field.required and field.type_ is str:
+        return lambda: ""
+    default = field.default
+    if isinstance(default, (list, dict)):
+        return lambda: type(default)(default)
+    return lambda: default
+
+def _converter(field: ModelField) -> Callable[[Any], Any]:
+    item_type = field.type_
+    if field.shape == SHAPE_LIST:
+        if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+            render_item = compile_renderer(item_type)
+            return lambda values: [render_item(v) for v in values if isinstance(v, dict)]
+        return list
+    if item_type is str or field.alias == "_id":
+        return _to_str
+    if field.outer_type_ in (dict, Dict) or getattr(field.outer_type_, "__origin__", None) is dict:
+        return _clean_nan
+    return lambda value: value
+
+def compile_renderer(model: Type[BaseModel]) -> Renderer:
+    """Precompile a model's fields into a function turning a Mongo document into a response dict.
+
+    Documents are trusted to have the stored shape, so this fills defaults and coerces
+    ids and strings instead of running a full validation per item.
+    """
+    plan: List[Tuple[str, Callable[[], Any], Callable[[Any], Any]]] = [
+        (field.alias, _default_factory(field), _converter(field)) for field in model.__fields__.values()
+    ]
+
+    def render(doc: Dict[str, Any]) -> Dict[str, Any]:
+        item = {}
+        for key, default, convert in plan:
+            value = doc.get(key)
+            item[key] = default() if value is None else convert(value)
+        return item
+
+    return render
@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import os
+import zlib
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+from cache import refresh_on_write
+from models import ProfileFilter
+from search import tokenize
+from storage import repository
+
+logger = logging.getLogger(__name__)
+
+# Similar-profile index: one TF-IDF row per profile over its skills, role tokens and city,
+# kept in memory as a sparse (feature x profile) matrix and saved to SIMILAR_INDEX_PATH
+SIMILAR_INDEX_PATH = os.getenv("SIMILAR_INDEX_PATH", "similar_index.npz")
+SIMILAR_REFRESH_INTERVAL = float(os.getenv("SIMILAR_REFRESH_INTERVAL", "30"))
+# Seconds after which the whole collection is compared with the index; refreshes in
+# between only read profiles written since the last one
+SIMILAR_MAX_AGE = float(os.getenv("SIMILAR_MAX_AGE", "600"))
+# Seconds of overlap between incremental refreshes, covering writes still in flight and
+# clock differences between API workers
+SIMILAR_CHANGE_OVERLAP = float(os.getenv("SIMILAR_CHANGE_OVERLAP", "60"))
+# Share of each feature group in a profile vector; skills dominate
+FEATURE_WEIGHTS = {
+    "s": 1.0,
+    "r": float(os.getenv("SIMILAR_ROLE_WEIGHT", "0.5")),
+    "l": float(os.getenv("SIMILAR_LOCATION_WEIGHT", "0.3")),
+}
+
+SIMILAR_FIELDS = ["skills", "current_role", "location"]
+ROLE_STOPWORDS = {"a", "an", "and", "at", "for", "in", "of", "the", "to", "with"}
+
+def profile_features(profile: Dict[str, Any]) -> List[str]:
+    """Features a profile is compared on: canonical skills, role tokens and city."""
+    features = {f"s:{skill.lower()}" for skill in profile.get("skills") or [] if skill}
+    features.update(f"r:{token}" for token in tokenize(profile.get("current_role")) if token not in ROLE_STOPWORDS)
+    city = " ".join(tokenize((profile.get("location") or "").split(",")[0]))
+    if city:
+        features.add(f"l:{city}")
+    return sorted(features)
+
+def _fingerprint(profile: Dict[str, Any]) -> int:
+    """Cheap checksum of the indexed fields; unchanged profiles keep their row on refresh."""
+    skills = "\x1f".join(profile.get("skills") or [])
+    return zlib.crc32(f"{skills}\x1e{profile.get('current_role') or ''}\x1e{profile.get('location') or ''}".encode())
+
+class SimilarityIndex:
+    """Cosine similarity between profiles over a sparse TF-IDF matrix.
+
+    The matrix is stored transposed (one row of postings per feature), so scoring a query
+    reads only the postings of its own features. Refreshes after writes read only the
+    profiles written since the previous refresh and reuse the rows of every other profile.
+    """
+
+    def __init__(self, path: str = SIMILAR_INDEX_PATH):
+        self.path = path
+        self.vocabulary: Dict[str, int] = {}
+        self.fingerprints = np.array([], dtype=np.uint32)
+        # (profile ids, idf per feature, features x profiles postings with L2-normalized
+        # profile vectors), swapped as one tuple so queries never see a half-built index
+        self._matrix: Tuple[np.ndarray, np.ndarray, sparse.csr_matrix] = (
+            np.array([], dtype=str), np.array([], dtype=np.float32), sparse.csr_matrix((0, 0), dtype=np.float32),
+        )
+        # Start of the last refresh; None until one has run, so the first one is complete
+        self.refreshed_at: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._matrix[0])
+
+    def _term_ids(self, features: List[str]) -> List[int]:
+        vocabulary = self.vocabulary
+        for feature in features:
+            if feature not in vocabulary:
+                vocabulary[feature] = len(vocabulary)
+        return [vocabulary[feature] for feature in features]
+
+    def _build(self, ids: List[str], fingerprints: np.ndarray, terms: sparse.csr_matrix) -> None:
+        """Weight a (profile x feature) incidence matrix and swap it in."""
+        count = terms.shape[0]
+        document_frequency = np.bincount(terms.indices, minlength=terms.shape[1])
+        idf = (np.log((1 + count) / (1 + document_frequency)) + 1).astype(np.float32)
+        groups = np.array([FEATURE_WEIGHTS[term[0]] for term in self.vocabulary], dtype=np.float32)[:terms.shape[1]]
+        matrix = sparse.csr_matrix(((idf * groups)[terms.indices], terms.indices, terms.indptr), shape=terms.shape)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        matrix = sparse.diags((1 / norms).astype(np.float32)) @ matrix
+        self.fingerprints = fingerprints
+        self._matrix = (np.array(ids, dtype=str), idf, matrix.T.tocsr())
+
+    def _incidence(self) -> sparse.csr_matrix:
+        """The current (profile x feature) pattern with unit entries."""
+        matrix = self._matrix[2].T.tocsr()
+        return sparse.csr_matrix((np.ones(matrix.nnz, dtype=np.float32), matrix.indices, matrix.indptr), shape=matrix.shape)
+
+    async def refresh(self, full: bool = False) -> int:
+        """Bring the index in step with storage; returns the profiles (re)tokenized.
+
+        Only profiles with updated_at after the previous refresh are read, and profile ids
+        are listed only when the stored count shows deletions. `full` reads every profile,
+        catching edits made straight in the database.
+        """
+        async with self._lock:
+            started = datetime.utcnow()
+            complete = full or self.refreshed_at is None
+            if complete:
+                docs = repository.iter_profiles(fields=SIMILAR_FIELDS)
+            else:
+                since = self.refreshed_at - timedelta(seconds=SIMILAR_CHANGE_OVERLAP)
+                docs = repository.iter_profiles(ProfileFilter(updated_after=since), SIMILAR_FIELDS)
+            kept, new_ids, new_fingerprints, new_rows = await self._read_changes(docs, complete)
+            ids = self._matrix[0].tolist()
+            if not complete and len(kept) + len(new_ids) != await repository.count(ProfileFilter()):
+                # Profiles were deleted since: keep only rows whose profile is still stored
+                live = {str(doc["_id"]) async for doc in repository.iter_profiles(fields=[])}
+                kept = [position for position in kept if ids[position] in live]
+            kept_ids = [ids[position] for position in kept]
+            self.refreshed_at = started
+            if not new_ids and len(kept) == len(self):
+                return 0
+            await asyncio.to_thread(self._rebuild, kept, kept_ids, new_ids, new_fingerprints, new_rows)
+            logger.info(f"Similarity index: {len(self)} profiles, {len(new_ids)} tokenized, {len(self.vocabulary)} features")
+            return len(new_ids)
+
+    async def _read_changes(self, docs: AsyncIterator[Dict[str, Any]], complete: bool) -> Tuple[List[int], List[str], List[int], List[List[int]]]:
+        """(kept row positions, new ids, new fingerprints, new term rows) after reading `docs`.
+
+        When `docs` is every stored profile, rows it does not include are dropped; otherwise
+        rows are kept unless their profile was read with different indexed fields.
+        """
+        new_ids: List[str] = []
+        new_fingerprints: List[int] = []
+        new_rows: List[List[int]] = []
+        positions = {profile_id: i for i, profile_id in enumerate(self._matrix[0].tolist())}
+        fingerprints = self.fingerprints
+        unchanged: List[int] = []
+        replaced = set()
+        async for doc in docs:
+            profile_id = str(doc["_id"])
+            fingerprint = _fingerprint(doc)
+            position = positions.get(profile_id)
+            if position is not None:
+                if fingerprints[position] == fingerprint:
+                    unchanged.append(position)
+                    continue
+                replaced.add(position)
+            new_ids.append(profile_id)
+            new_fingerprints.append(fingerprint)
+            new_rows.append(self._term_ids(profile_features(doc)))
+        kept = unchanged if complete else [i for i in range(len(self)) if i not in replaced]
+        return kept, new_ids, new_fingerprints, new_rows
+
+    def _rebuild(self, kept: List[int], kept_ids: List[str], new_ids: List[str],
+                 new_fingerprints: List[int], new_rows: List[List[int]]) -> None:
+        width = len(self.vocabulary)
+        old = self._incidence()[kept] if kept else sparse.csr_matrix((0, width), dtype=np.float32)
+        old = sparse.csr_matrix((old.data, old.indices, old.indptr), shape=(len(kept), width))
+        indptr = np.zeros(len(new_rows) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(row) for row in new_rows])
+        indices = np.fromiter((term for row in new_rows for term in row), dtype=np.int32, count=int(indptr[-1]))
+        new = sparse.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr), shape=(len(new_rows), width))
+        fingerprints = np.concatenate([self.fingerprints[kept], np.array(new_fingerprints, dtype=np.uint32)])
+        self._build(kept_ids + new_ids, fingerprints, sparse.vstack([old, new], format="csr"))
+        self.save()
+
+    def query_vector(self, profile: Dict[str, Any], idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(feature ids, weights) of a profile's normalized vector, from its current fields."""
+        features = profile_features(profile)
+        # Features no indexed profile has count towards the norm but match nothing
+        unseen_idf = np.log(1 + len(self)) + 1
+        terms = np.array([self.vocabulary.get(feature, -1) for feature in features], dtype=np.int64)
+        terms[terms >= len(idf)] = -1
+        weights = np.array([FEATURE_WEIGHTS[feature[0]] for feature in features], dtype=np.float32)
+        weights *= np.where(terms >= 0, idf[np.maximum(terms, 0)] if len(idf) else unseen_idf, unseen_idf)
+        norm = np.sqrt((weights ** 2).sum())
+        if norm:
+            weights /= norm
+        return terms[terms >= 0], weights[terms >= 0]
+
+    def similar(self, profiles: List[Dict[str, Any]], k: int) -> List[List[Tuple[str, float]]]:
+        """Top k (profile id, cosine similarity) for each profile.
+
+        A profile's scores are the weighted sum of the postings of its features, one sparse
+        matrix-vector product; profiles sharing no feature with it score zero.
+        """
+        ids, idf, postings = self._matrix
+        results = []
+        for profile in profiles:
+            terms, weights = self.query_vector(profile, idf)
+            if not len(terms):
+                results.append([])
+                continue
+            scores = postings[terms].T @ weights
+            # One extra in case the profile finds itself
+            limit = min(k + 1, len(scores))
+            top = np.argpartition(scores, -limit)[-limit:]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            own_id = str(profile.get("_id"))
+            matches = [(str(ids[i]), round(float(scores[i]), 4)) for i in top if scores[i] > 0]
+            results.append([match for match in matches if match[0] != own_id][:k])
+        return results
+
+    def save(self) -> None:
+        """Write the index under a temporary name and swap it in, so readers never see half a file.
+
+        Each uvicorn worker keeps and saves its own copy; the temporary name is per process.
+        """
+        if not self.path:
+            return
+        ids, idf, postings = self._matrix
+        terms = np.array(list(self.vocabulary)[:len(idf)], dtype=str)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(
+                f, ids=ids, fingerprints=self.fingerprints, terms=terms, idf=idf,
+                data=postings.data, indices=postings.indices, indptr=postings.indptr,
+                shape=np.array(postings.shape), backend=np.array(repository.name),
+            )
+        os.replace(temporary, self.path)
+
+    def load(self) -> bool:
+        """Read a saved index; the next refresh only re-tokenizes profiles changed since."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as saved:
+                if str(saved["backend"]) != repository.name:
+                    return False
+                shape = tuple(int(size) for size in saved["shape"])
+                postings = sparse.csr_matrix((saved["data"], saved["indices"], saved["indptr"]), shape=shape)
+                self.vocabulary = {str(term): i for i, term in enumerate(saved["terms"])}
+                self.fingerprints = saved["fingerprints"]
+                self._matrix = (saved["ids"], saved["idf"], postings)
+        except Exception as e:
+            logger.error(f"Could not load the similarity index from {self.path}: {str(e)}")
+            return False
+        logger.info(f"Loaded similarity index: {len(self)} profiles")
+        return True
+
+similarity_index = SimilarityIndex()
+
+async def similar_profiles(profile: Dict[str, Any], k: int) -> List[Tuple[str, float]]:
+    """Top k (profile id, similarity) for a profile, building the index first if it is empty."""
+    if not len(similarity_index) and not similarity_index.load():
+        await similarity_index.refresh()
+    return (await asyncio.to_thread(similarity_index.similar, [profile], k))[0]
+
+async def run_similarity_refresher(interval: float = SIMILAR_REFRESH_INTERVAL, max_age: float = SIMILAR_MAX_AGE) -> None:
+    """Load the saved index, then refresh it whenever the write generation has moved, and in full every `max_age` seconds."""
+    await asyncio.to_thread(similarity_index.load)
+    await refresh_on_write(similarity_index.refresh, interval, "similarity index", max_age, partial(similarity_index.refresh, full=True))
@@ -0,0 +1,31 @@
+import os
+import re
+from typing import Any, Dict, List
+from cache import refresh_on_write
+from db import get_collection, get_skill_stats_collection
+
+# Seconds between checks for writes that made the skill frequency table stale
+SKILL_STATS_REFRESH_INTERVAL = float(os.getenv("SKILL_STATS_REFRESH_INTERVAL", "60"))
+
+async def refresh_skill_stats() -> None:
+    """Rebuild the skill frequency table; $out swaps the new collection in atomically."""
+    collection = await get_collection()
+    stats = await get_skill_stats_collection()
+    pipeline = [
+        {"$unwind": "$skills"},
+        {"$group": {"_id": "$skills", "count": {"$sum": 1}}},
+        {"$out": stats.name},
+    ]
+    async for _ in collection.aggregate(pipeline):
+        pass
+
+async def run_skill_stats_refresher(interval: float = SKILL_STATS_REFRESH_INTERVAL) -> None:
+    await refresh_on_write(refresh_skill_stats, interval, "skill stats")
+
+async def suggest_skills(prefix: str = "", limit: int = 10) -> List[Dict[str, Any]]:
+    """Most frequent canonical skills starting with `prefix`, read from the frequency table."""
+    stats = await get_skill_stats_collection()
+    # An anchored, case-sensitive regex is a range scan on _id (skills are stored lowercase)
+    query = {"_id": {"$regex": f"^{re.escape(prefix.lower())}"}} if prefix else {}
+    cursor = stats.find(query).sort("count", -1).limit(limit)
+    return [{"skill": doc["_id"], "count": doc["count"]} async for doc in cursor]
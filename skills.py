@@ -0,0 +1,74 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, List
+
+# Canonical skill -> spellings seen in sheets. Lookups ignore case, spaces, dots,
+# dashes and underscores, so "React.js", "ReactJS" and "react js" need one entry.
+SKILL_ALIASES: Dict[str, List[str]] = {
+    "react": ["react.js", "reactjs"],
+    "react native": ["react-native"],
+    "next.js": ["nextjs", "next"],
+    "vue.js": ["vue", "vuejs"],
+    "node.js": ["nodejs", "node"],
+    "express.js": ["express", "expressjs"],
+    "gatsby": ["gatsbyjs"],
+    "javascript": ["js", "ecmascript", "es6"],
+    "typescript": ["ts"],
+    "html": ["html5"],
+    "css": ["css3", "cascading style sheets", "cascading style sheets (css)"],
+    "scss": ["sass"],
+    "golang": ["go", "go lang"],
+    "c++": ["cpp"],
+    "c#": ["csharp", "c sharp"],
+    "python": ["python3", "python 3"],
+    "postgresql": ["postgres", "psql"],
+    "mongodb": ["mongo"],
+    "mysql": ["my sql"],
+    "kubernetes": ["k8s"],
+    "aws": ["amazon web services", "amazon web services (aws)"],
+    "gcp": ["google cloud", "google cloud platform", "google cloud platform (gcp)"],
+    "spring boot": ["springboot"],
+    "rest apis": ["rest api", "restful apis", "restful api", "restful web services", "rest"],
+    "graphql": ["graph ql"],
+    "redux": ["redux.js", "reduxjs"],
+    "object-oriented programming": ["object-oriented programming (oop)", "oop", "oops"],
+    "system design": ["systems design"],
+    "machine learning": ["ml"],
+    "data structures": ["data structure", "dsa", "data structures and algorithms"],
+}
+
+# Optional JSON file with more aliases in the same shape: {"canonical": ["alias", ...]}
+SKILL_ALIASES_FILE = os.getenv("SKILL_ALIASES_FILE")
+if SKILL_ALIASES_FILE:
+    with open(SKILL_ALIASES_FILE) as f:
+        for canonical, aliases in json.load(f).items():
+            SKILL_ALIASES.setdefault(canonical.lower(), []).extend(aliases)
+
+KEY_STRIP_RE = re.compile(r'[\s.\-_]+')
+WHITESPACE_RE = re.compile(r'\s+')
+
+def skill_key(skill: str) -> str:
+    """Lookup key for a skill spelling: lowercase without spaces, dots, dashes or underscores."""
+    return KEY_STRIP_RE.sub('', skill.lower())
+
+CANONICAL_BY_KEY: Dict[str, str] = {}
+for _canonical, _aliases in SKILL_ALIASES.items():
+    for _alias in [_canonical] + _aliases:
+        CANONICAL_BY_KEY[skill_key(_alias)] = _canonical
+
+def canonical_skill(skill: str) -> str:
+    """Canonical lowercase name of a skill; unknown skills are lowercased with single spaces."""
+    normalized = WHITESPACE_RE.sub(' ', skill.strip().lower())
+    return CANONICAL_BY_KEY.get(skill_key(normalized), normalized)
+
+def canonical_skills(skills: Iterable[str]) -> List[str]:
+    """Canonicalize a skill list, dropping blanks and repeats but keeping the original order."""
+    seen = set()
+    result = []
+    for skill in skills:
+        canonical = canonical_skill(skill)
+        if canonical and canonical not in seen:
+            seen.add(canonical)
+            result.append(canonical)
+    return result
@@ -0,0 +1,582 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from categories import UNCATEGORIZED
+from models import ProfileFilter, SUMMARY_FIELDS
+from pagination import decode_cursor, encode_cursor
+from search import DEFAULT_SEARCH_MODE, MAX_PREFIX_LENGTH, TEXT_INDEX_WEIGHTS, tokenize
+from storage import ProfileRepository
+
+# Database file for STORAGE_BACKEND=sqlite (":memory:" for a throwaway database)
+SQLITE_PATH = os.getenv("SQLITE_PATH", "linkedin_data.db")
+
+PROFILE_COLUMNS = [
+    "id", "profile_id", "name", "current_role", "current_company", "location", "skills", "experience",
+    "education", "total_experience", "total_experience_months", "current_tenure_start", "profile_url",
+    "category", "last_scraped_at", "raw_json", "content_hash", "updated_at",
+]
+JSON_COLUMNS = {"skills": "[]", "experience": "[]", "education": "[]", "raw_json": "{}"}
+DATETIME_COLUMNS = {"current_tenure_start", "last_scraped_at", "updated_at"}
+# Text-searched columns, in profiles_fts order
+FTS_COLUMNS = ["name", "current_role", "current_company", "location", "skills", "category", "education"]
+FTS_WEIGHTS = ", ".join(str(TEXT_INDEX_WEIGHTS.get(column, TEXT_INDEX_WEIGHTS["education.institute"])) for column in FTS_COLUMNS)
+REGEX_COLUMNS = ["name", "current_role", "current_company", "location", "category"]
+
+# profile_skills and profiles_fts are kept in step with profiles by triggers, so every
+# write path (imports, edits, deletes) maintains the skill and text indexes.
+FTS_VALUES = """
+    new.seq, new.name, new.current_role, new.current_company, new.location,
+    (SELECT group_concat(value, ' ') FROM json_each(new.skills)), new.category,
+    (SELECT group_concat(json_extract(value, '$.institute'), ' ') FROM json_each(new.education))
+"""
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS profiles (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    profile_id TEXT,
+    name TEXT,
+    current_role TEXT,
+    current_company TEXT,
+    location TEXT,
+    skills TEXT NOT NULL DEFAULT '[]',
+    experience TEXT NOT NULL DEFAULT '[]',
+    education TEXT NOT NULL DEFAULT '[]',
+    total_experience TEXT,
+    total_experience_months INTEGER,
+    current_tenure_start TEXT,
+    profile_url TEXT NOT NULL UNIQUE,
+    category TEXT,
+    last_scraped_at TEXT,
+    raw_json TEXT NOT NULL DEFAULT '{{}}',
+    content_hash TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS profiles_recency ON profiles (last_scraped_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS profiles_category_recency ON profiles (category, last_scraped_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS profiles_experience ON profiles (total_experience_months);
+CREATE INDEX IF NOT EXISTS profiles_tenure ON profiles (current_tenure_start);
+
+CREATE TABLE IF NOT EXISTS profile_skills (
+    skill TEXT NOT NULL,
+    profile INTEGER NOT NULL,
+    PRIMARY KEY (skill, profile)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS profile_skills_profile ON profile_skills (profile);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS profiles_fts USING fts5(
+    {", ".join(FTS_COLUMNS)}, tokenize = "unicode61 remove_diacritics 2"
+);
+
+CREATE TRIGGER IF NOT EXISTS profiles_ai AFTER INSERT ON profiles BEGIN
+    INSERT INTO profiles_fts (rowid, {", ".join(FTS_COLUMNS)}) VALUES ({FTS_VALUES});
+    INSERT OR IGNORE INTO profile_skills (skill, profile) SELECT value, new.seq FROM json_each(new.skills);
+END;
+CREATE TRIGGER IF NOT EXISTS profiles_ad AFTER DELETE ON profiles BEGIN
+    DELETE FROM profiles_fts WHERE rowid = old.seq;
+    DELETE FROM profile_skills WHERE profile = old.seq;
+END;
+CREATE TRIGGER IF NOT EXISTS profiles_au AFTER UPDATE ON profiles BEGIN
+    DELETE FROM profiles_fts WHERE rowid = old.seq;
+    INSERT INTO profiles_fts (rowid, {", ".join(FTS_COLUMNS)}) VALUES ({FTS_VALUES});
+    DELETE FROM profile_skills WHERE profile = old.seq;
+    INSERT OR IGNORE INTO profile_skills (skill, profile) SELECT value, new.seq FROM json_each(new.skills);
+END;
+
+CREATE TABLE IF NOT EXISTS import_files (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    category TEXT,
+    imported_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+RECENCY_ORDER = "p.last_scraped_at DESC, p.id DESC"
+EXPORT_BATCH_SIZE = 1000
+# Bound parameters per IN (...) list
+MAX_IN_PARAMS = 500
+
+@lru_cache(maxsize=256)
+def _compile_regex(pattern: str) -> "re.Pattern":
+    return re.compile(pattern, re.IGNORECASE)
+
+def _regexp(pattern: str, value: Any) -> bool:
+    # Backs "value REGEXP pattern"; case-insensitive like the Mongo $regex filters
+    return value is not None and _compile_regex(pattern).search(str(value)) is not None
+
+def _to_sql(column: str, value: Any) -> Any:
+    if column in JSON_COLUMNS:
+        return json.dumps(value if value is not None else json.loads(JSON_COLUMNS[column]), default=str, ensure_ascii=False)
+    if isinstance(value, datetime):
+        # Fixed-width ISO strings sort in time order
+        return value.isoformat(timespec="microseconds")
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    doc = {}
+    for column in row.keys():
+        value = row[column]
+        if column in JSON_COLUMNS:
+            value = json.loads(value) if value else json.loads(JSON_COLUMNS[column])
+        elif column in DATETIME_COLUMNS and value:
+            value = datetime.fromisoformat(value)
+        doc["_id" if column == "id" else column] = value
+    return doc
+
+def _select_list(fields: Optional[List[str]]) -> str:
+    """Columns to read for a field list; id and last_scraped_at are always read for cursors."""
+    if fields is None:
+        columns = PROFILE_COLUMNS
+    else:
+        columns = ["id", "last_scraped_at"] + [f for f in fields if f in PROFILE_COLUMNS and f not in ("id", "last_scraped_at")]
+    return ", ".join(f"p.{column}" for column in columns)
+
+def _fts_query(q: str, mode: str) -> Optional[str]:
+    """FTS5 query for the global search box: every token as a prefix, or any token for text mode."""
+    tokens = sorted(set(tokenize(q)))
+    if not tokens:
+        return None
+    if mode == "text":
+        return " OR ".join(f'"{token}"' for token in tokens)
+    return " ".join(f'"{token[:MAX_PREFIX_LENGTH]}"*' for token in tokens)
+
+class SQLiteProfileRepository(ProfileRepository):
+    """Embedded single-file storage: indexed columns, a skills table and FTS5 for text search.
+
+    One connection is shared behind a lock and every call runs in a worker thread,
+    so queries never block the event loop.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.create_function("REGEXP", 2, _regexp, deterministic=True)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(SCHEMA)
+            # Files created before profiles carried updated_at gain the column in place
+            if "updated_at" not in {row["name"] for row in conn.execute("PRAGMA table_info(profiles)")}:
+                conn.execute("ALTER TABLE profiles ADD COLUMN updated_at TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS profiles_updated ON profiles (updated_at)")
+            self._conn = conn
+        return self._conn
+
+    def _run(self, fn, *args):
+        def call():
+            with self._lock:
+                return fn(self._connection(), *args)
+        return asyncio.to_thread(call)
+
+    def _where(self, filters: Optional[ProfileFilter]) -> Tuple[List[str], List[Any], Optional[str]]:
+        """(conditions, params, fts query) for a filter; the FTS match is applied by the caller."""
+        clauses: List[str] = []
+        params: List[Any] = []
+        fts = None
+        if filters is None:
+            return clauses, params, fts
+        if filters.role:
+            clauses.append("p.current_role REGEXP ?")
+            params.append(filters.role)
+        if filters.location:
+            clauses.append("p.location REGEXP ?")
+            params.append(filters.location)
+        if filters.skills:
+            if filters.skill_mode == "all":
+                for skill in filters.skills:
+                    clauses.append("p.seq IN (SELECT profile FROM profile_skills WHERE skill = ?)")
+                    params.append(skill)
+            else:
+                marks = ", ".join("?" for _ in filters.skills)
+                clauses.append(f"p.seq IN (SELECT profile FROM profile_skills WHERE skill IN ({marks}))")
+                params.extend(filters.skills)
+        if filters.category:
+            clauses.append("p.category = ?")
+            params.append(filters.category)
+        if filters.min_months is not None:
+            clauses.append("p.total_experience_months >= ?")
+            params.append(filters.min_months)
+        if filters.max_months is not None:
+            clauses.append("p.total_experience_months <= ?")
+            params.append(filters.max_months)
+        if filters.has_education is not None:
+            clauses.append(f"json_array_length(p.education) {'>' if filters.has_education else '='} 0")
+        if filters.ids:
+            clauses.append(f"p.id IN ({', '.join('?' for _ in filters.ids)})")
+            params.extend(filters.ids)
+        if filters.updated_after is not None:
+            clauses.append("p.updated_at > ?")
+            params.append(_to_sql("updated_at", filters.updated_after))
+        if filters.q:
+            mode = filters.search_mode or DEFAULT_SEARCH_MODE
+            if mode == "regex":
+                options = [f"p.{column} REGEXP ?" for column in REGEX_COLUMNS]
+                options.append("EXISTS (SELECT 1 FROM json_each(p.skills) WHERE value REGEXP ?)")
+                if filters.include_education:
+                    options.append("EXISTS (SELECT 1 FROM json_each(p.education) WHERE json_extract(value, '$.institute') REGEXP ?)")
+                clauses.append(f"({' OR '.join(options)})")
+                params.extend([filters.q] * len(options))
+            else:
+                fts = _fts_query(filters.q, mode)
+        return clauses, params, fts
+
+    def _from_clause(self, filters: Optional[ProfileFilter], by_relevance: bool = False) -> Tuple[str, List[Any]]:
+        """FROM ... WHERE ... for a filter; relevance joins the FTS table so bm25 can order by it."""
+        clauses, params, fts = self._where(filters)
+        source = "profiles p"
+        if fts is not None:
+            if by_relevance:
+                source = "profiles p JOIN profiles_fts ON profiles_fts.rowid = p.seq"
+                clauses.insert(0, "profiles_fts MATCH ?")
+            else:
+                clauses.insert(0, "p.seq IN (SELECT rowid FROM profiles_fts WHERE profiles_fts MATCH ?)")
+            params.insert(0, fts)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return f"FROM {source}{where}", params
+
+    @staticmethod
+    def _cursor_clause(token: str) -> Tuple[str, List[Any]]:
+        """Keyset condition for rows after the cursor in (last_scraped_at DESC, id DESC) order."""
+        position = decode_cursor(token)
+        doc_id = str(position["_id"])
+        if position["last_scraped_at"] is None:
+            # NULL timestamps sort last
+            return "(p.last_scraped_at IS NULL AND p.id < ?)", [doc_id]
+        scraped_at = _to_sql("last_scraped_at", position["last_scraped_at"])
+        return (
+            "(p.last_scraped_at < ? OR (p.last_scraped_at = ? AND p.id < ?) OR p.last_scraped_at IS NULL)",
+            [scraped_at, scraped_at, doc_id],
+        )
+
+    def _page_sql(self, filters, fields, by_relevance, skip, limit, cursor) -> Tuple[str, List[Any]]:
+        from_clause, params = self._from_clause(filters, by_relevance)
+        if cursor:
+            condition, cursor_params = self._cursor_clause(cursor)
+            from_clause += f" {'AND' if ' WHERE ' in from_clause else 'WHERE'} {condition}"
+            params += cursor_params
+        order = f"bm25(profiles_fts, {FTS_WEIGHTS}), {RECENCY_ORDER}" if by_relevance and "profiles_fts MATCH" in from_clause else RECENCY_ORDER
+        sql = f"SELECT {_select_list(fields)} {from_clause} ORDER BY {order} LIMIT ? OFFSET ?"
+        return sql, params + [limit, 0 if cursor else max(skip, 0)]
+
+    async def create_indexes(self):
+        await self._run(lambda conn: None)
+
+    async def find(self, filters, fields=None, by_relevance=False, skip=0, limit=10, cursor=None):
+        sql, params = self._page_sql(filters, fields, by_relevance, skip, limit, cursor)
+        return await self._run(lambda conn: [_from_row(row) for row in conn.execute(sql, params)])
+
+    async def count(self, filters, limit=None):
+        from_clause, params = self._from_clause(filters)
+        if limit:
+            sql = f"SELECT count(*) FROM (SELECT 1 {from_clause} LIMIT ?)"
+            params = params + [limit]
+        else:
+            sql = f"SELECT count(*) {from_clause}"
+        return await self._run(lambda conn: conn.execute(sql, params).fetchone()[0])
+
+    async def estimated_count(self):
+        return await self.count(ProfileFilter())
+
+    def _facet_sql(self, name: str, from_clause: str) -> str:
+        if name == "skills":
+            return (
+                "SELECT s.skill AS value, count(*) AS n FROM profile_skills s "
+                f"WHERE s.profile IN (SELECT p.seq {from_clause}) GROUP BY s.skill ORDER BY n DESC, value LIMIT ?"
+            )
+        if name == "category":
+            value = f"coalesce(p.category, '{UNCATEGORIZED}')"
+            extra = ""
+        else:
+            value = f"p.{name}"
+            extra = f" {'AND' if ' WHERE ' in from_clause else 'WHERE'} p.{name} IS NOT NULL AND p.{name} != ''"
+        return f"SELECT {value} AS value, count(*) AS n {from_clause}{extra} GROUP BY value ORDER BY n DESC, value LIMIT ?"
+
+    async def faceted_search(self, filters, fields, by_relevance, skip, limit, cursor, facet_limits):
+        page_sql, page_params = self._page_sql(filters, fields, by_relevance, skip, limit, cursor)
+        from_clause, params = self._from_clause(filters)
+
+        def run(conn):
+            # One read transaction, so page, total and facets see the same snapshot
+            conn.execute("BEGIN")
+            try:
+                items = [_from_row(row) for row in conn.execute(page_sql, page_params)]
+                total = conn.execute(f"SELECT count(*) {from_clause}", params).fetchone()[0]
+                facets = {
+                    name: [(row["value"], row["n"]) for row in conn.execute(self._facet_sql(name, from_clause), params + [k])]
+                    for name, k in facet_limits.items()
+                }
+            finally:
+                conn.execute("COMMIT")
+            return {"items": items, "total": total, "facets": facets}
+
+        return await self._run(run)
+
+    async def get(self, profile_id):
+        def run(conn):
+            row = conn.execute(f"SELECT {_select_list(None)} FROM profiles p WHERE p.id = ?", (profile_id,)).fetchone()
+            return _from_row(row) if row else None
+
+        return await self._run(run)
+
+    async def update(self, profile_id, fields):
+        columns = [column for column in fields if column in PROFILE_COLUMNS and column not in ("id", "updated_at")]
+        if columns:
+            fields = {**fields, "updated_at": datetime.utcnow()}
+            columns.append("updated_at")
+
+        def run(conn):
+            if columns:
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                cur = conn.execute(f"UPDATE profiles SET {assignments} WHERE id = ?", [_to_sql(c, fields[c]) for c in columns] + [profile_id])
+                if cur.rowcount == 0:
+                    return None
+            row = conn.execute(f"SELECT {_select_list(None)} FROM profiles p WHERE p.id = ?", (profile_id,)).fetchone()
+            return _from_row(row) if row else None
+
+        return await self._run(run)
+
+    async def delete(self, profile_id):
+        return await self._run(lambda conn: conn.execute("DELETE FROM profiles WHERE id = ?", (profile_id,)).rowcount > 0)
+
+    async def update_many(self, updates):
+        def run(conn):
+            matched = 0
+            now = datetime.utcnow()
+            conn.execute("BEGIN")
+            try:
+                for profile_id, fields in updates:
+                    columns = [column for column in fields if column in PROFILE_COLUMNS and column not in ("id", "updated_at")]
+                    if not columns:
+                        continue
+                    fields = {**fields, "updated_at": now}
+                    columns.append("updated_at")
+                    assignments = ", ".join(f"{column} = ?" for column in columns)
+                    params = [_to_sql(column, fields[column]) for column in columns] + [profile_id]
+                    matched += conn.execute(f"UPDATE profiles SET {assignments} WHERE id = ?", params).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return matched
+
+        return await self._run(run) if updates else 0
+
+    async def delete_many(self, profile_ids):
+        def run(conn):
+            deleted = 0
+            conn.execute("BEGIN")
+            try:
+                for start in range(0, len(profile_ids), MAX_IN_PARAMS):
+                    chunk = profile_ids[start:start + MAX_IN_PARAMS]
+                    marks = ", ".join("?" for _ in chunk)
+                    deleted += conn.execute(f"DELETE FROM profiles WHERE id IN ({marks})", chunk).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return deleted
+
+        return await self._run(run) if profile_ids else 0
+
+    async def category_groups(self, limit):
+        summary = ", ".join(f"p.{field}" for field in ["id"] + SUMMARY_FIELDS)
+        group = f"coalesce(p.category, '{UNCATEGORIZED}')"
+
+        def run(conn):
+            groups = {
+                row["grp"]: {"category": row["grp"], "count": row["n"], "profiles": []}
+                for row in conn.execute(f"SELECT {group} AS grp, count(*) AS n FROM profiles p GROUP BY grp ORDER BY n DESC")
+            }
+            ranked = conn.execute(
+                f"SELECT * FROM (SELECT {summary}, {group} AS grp, "
+                f"row_number() OVER (PARTITION BY {group} ORDER BY {RECENCY_ORDER}) AS rank FROM profiles p) "
+                "WHERE rank <= ? ORDER BY grp, rank",
+                (limit,),
+            )
+            for row in ranked:
+                doc = _from_row(row)
+                grp = doc.pop("grp")
+                doc.pop("rank")
+                groups[grp]["profiles"].append(doc)
+            return list(groups.values())
+
+        return await self._run(run)
+
+    async def content_hashes(self, profile_urls):
+        marks = ", ".join("?" for _ in profile_urls)
+        sql = f"SELECT profile_url, content_hash FROM profiles WHERE profile_url IN ({marks})"
+        return await self._run(lambda conn: {row["profile_url"]: row["content_hash"] for row in conn.execute(sql, profile_urls)})
+
+    async def existing_urls(self, profile_urls):
+        marks = ", ".join("?" for _ in profile_urls)
+        sql = f"SELECT profile_url FROM profiles WHERE profile_url IN ({marks})"
+        return await self._run(lambda conn: {row["profile_url"] for row in conn.execute(sql, profile_urls)})
+
+    async def upsert_profiles(self, profiles):
+        def run(conn):
+            urls = [set_fields["profile_url"] for set_fields, _ in profiles]
+            marks = ", ".join("?" for _ in urls)
+            existing = {row[0] for row in conn.execute(f"SELECT profile_url FROM profiles WHERE profile_url IN ({marks})", urls)}
+            stats = {"inserted": 0, "updated": 0, "errors": []}
+            now = datetime.utcnow()
+            conn.execute("BEGIN")
+            try:
+                for set_fields, on_insert in profiles:
+                    set_fields = {**set_fields, "updated_at": now}
+                    values = {"id": on_insert.get("_id") or str(ObjectId()), **on_insert, **set_fields}
+                    columns = [column for column in PROFILE_COLUMNS if column in values]
+                    updates = [column for column in set_fields if column in PROFILE_COLUMNS and column != "profile_url"]
+                    conflict = f"DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in updates)}" if updates else "DO NOTHING"
+                    sql = (
+                        f"INSERT INTO profiles ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+                        f"ON CONFLICT (profile_url) {conflict}"
+                    )
+                    try:
+                        # A failed statement is rolled back on its own; the batch goes on
+                        conn.execute(sql, [_to_sql(column, values[column]) for column in columns])
+                    except sqlite3.Error as e:
+                        stats["errors"].append((set_fields["profile_url"], None, str(e)))
+                        continue
+                    stats["updated" if set_fields["profile_url"] in existing else "inserted"] += 1
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return stats
+
+        return await self._run(run)
+
+    async def iter_profiles(self, filters=None, fields=None):
+        # Keyset batches, so a long export holds neither the lock nor a read snapshot between batches
+        cursor = None
+        while True:
+            batch = await self.find(filters or ProfileFilter(), fields, limit=EXPORT_BATCH_SIZE, cursor=cursor)
+            for doc in batch:
+                yield doc
+            if len(batch) < EXPORT_BATCH_SIZE:
+                return
+            cursor = encode_cursor(batch[-1])
+
+    async def find_after_id(self, filters, fields, after, limit):
+        from_clause, params = self._from_clause(filters)
+        if after is not None:
+            from_clause += f" {'AND' if ' WHERE ' in from_clause else 'WHERE'} p.id > ?"
+            params.append(str(after))
+        sql = f"SELECT {_select_list(fields)} {from_clause} ORDER BY p.id LIMIT ?"
+        return await self._run(lambda conn: [_from_row(row) for row in conn.execute(sql, params + [limit])])
+
+    async def rebuild_search_index(self, batch_size=1000):
+        def run(conn):
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM profiles_fts")
+            conn.execute(
+                f"INSERT INTO profiles_fts (rowid, {', '.join(FTS_COLUMNS)}) "
+                f"SELECT {FTS_VALUES.replace('new.', 'profiles.')} FROM profiles"
+            )
+            conn.execute("DELETE FROM profile_skills")
+            conn.execute("INSERT OR IGNORE INTO profile_skills (skill, profile) SELECT value, profiles.seq FROM profiles, json_each(profiles.skills)")
+            conn.execute("COMMIT")
+            return conn.execute("SELECT count(*) FROM profiles").fetchone()[0]
+
+        return await self._run(run)
+
+    async def suggest_skills(self, prefix, limit):
+        prefix = prefix.lower()
+        # A range on the (skill, profile) key instead of LIKE, which would not use the index
+        sql = (
+            "SELECT skill, count(*) AS n FROM profile_skills WHERE skill >= ? AND skill < ? "
+            "GROUP BY skill ORDER BY n DESC, skill LIMIT ?"
+        )
+        rows = await self._run(lambda conn: conn.execute(sql, (prefix, prefix + "\U0010ffff", limit)).fetchall())
+        return [{"skill": row["skill"], "count": row["n"]} for row in rows]
+
+    async def get_file_record(self, path):
+        def run(conn):
+            row = conn.execute("SELECT sha256, category, imported_at FROM import_files WHERE path = ?", (path,)).fetchone()
+            return {"_id": path, "sha256": row["sha256"], "category": row["category"], "imported_at": row["imported_at"]} if row else None
+
+        return await self._run(run)
+
+    async def record_file(self, path, sha256, category):
+        sql = (
+            "INSERT INTO import_files (path, sha256, category, imported_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET sha256 = excluded.sha256, category = excluded.category, imported_at = excluded.imported_at"
+        )
+        await self._run(lambda conn: conn.execute(sql, (path, sha256, category, datetime.utcnow().isoformat())))
+
+    async def get_migration(self, name):
+        row = await self._run(lambda conn: conn.execute("SELECT state FROM migrations WHERE name = ?", (name,)).fetchone())
+        return json.loads(row["state"]) if row else None
+
+    async def claim_migration(self, name, fields, stale_before, restart):
+        def run(conn):
+            # IMMEDIATE takes the write lock before reading, so two processes never both claim
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT state FROM migrations WHERE name = ?", (name,)).fetchone()
+                state = json.loads(row["state"]) if row else {}
+                heartbeat = state.get("heartbeat_at")
+                held = state.get("status") == "running" and heartbeat and datetime.fromisoformat(heartbeat) >= stale_before
+                if held or (state.get("status") == "completed" and not restart):
+                    conn.execute("ROLLBACK")
+                    return None
+                state.update(fields)
+                conn.execute(
+                    "INSERT INTO migrations (name, state) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET state = excluded.state",
+                    (name, json.dumps(state, default=str)),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return state
+
+        return await self._run(run)
+
+    async def save_migration(self, name, state):
+        sql = "UPDATE migrations SET state = ? WHERE name = ? AND json_extract(state, '$.owner') IS ?"
+        return await self._run(lambda conn: conn.execute(sql, (json.dumps(state, default=str), name, state.get("owner"))).rowcount > 0)
+
+    async def get_generation(self):
+        row = await self._run(lambda conn: conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone())
+        return row["value"] if row else 0
+
+    async def incr_generation(self):
+        def run(conn):
+            # IMMEDIATE takes the write lock first, so processes sharing the file never read the same value
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT INTO meta (key, value) VALUES ('generation', 1) ON CONFLICT (key) DO UPDATE SET value = value + 1")
+                value = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return value
+
+        return await self._run(run)
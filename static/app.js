@@ -69,6 +69,8 @@
     if (filterCategory.value) params.append('category', filterCategory.value);
     params.append('skip', String(skip));
     params.append('limit', String(limit));
+    // The grid only needs summary fields; full profiles come from /profiles/by-id
+    params.append('view', 'summary');
     return params.toString();
   }
 
@@ -193,17 +195,47 @@
     }
   }
 
+  const FACETS = encodeURIComponent('category:5,location:5,current_company:5,skills:8');
+  const FACET_LABELS = { category: 'Category', location: 'Location', current_company: 'Company', skills: 'Skills' };
+  const facetPanel = document.getElementById('facetPanel');
+
+  function renderFacets(facets) {
+    facetPanel.innerHTML = Object.entries(facets).filter(([, values]) => values.length).map(([name, values]) => `
+      <div class="mb-2">
+        <div class="small text-muted">${FACET_LABELS[name] || name}</div>
+        ${values.map(v => `<span class="badge text-bg-light border me-1 mb-1 facet-value" role="button" data-facet="${name}" data-value="${escapeHtml(v.value)}">${escapeHtml(v.value)} <span class="text-muted">${v.count}</span></span>`).join('')}
+      </div>`).join('');
+  }
+
+  // Clicking a facet value narrows the search to it
+  facetPanel.addEventListener('click', (e) => {
+    const chip = e.target.closest('.facet-value');
+    if (!chip) return;
+    const value = chip.dataset.value;
+    if (chip.dataset.facet === 'category') filterCategory.value = value;
+    else if (chip.dataset.facet === 'location') filterLocation.value = value;
+    else if (chip.dataset.facet === 'skills') {
+      const current = filterSkill.value.split(',').map(s => s.trim()).filter(Boolean);
+      if (!current.includes(value)) current.push(value);
+      filterSkill.value = current.join(', ');
+    } else filterGlobal.value = value;
+    skip = 0;
+    fetchProfiles().catch(console.error);
+  });
+
   async function fetchProfiles() {
     const q = buildQueryParams();
     let items = [];
     let total = 0;
     try {
       loading.classList.add('show');
-      const res = await fetch(`${API_BASE}/api/profiles/search-adv?${q}`);
-      if (!res.ok) throw new Error('adv failed');
+      // One request returns the page, the total and the sidebar facet counts
+      const res = await fetch(`${API_BASE}/api/profiles/search-faceted?${q}&facets=${FACETS}`);
+      if (!res.ok) throw new Error('faceted search failed');
       const data = await res.json();
       items = data.items || [];
       total = data.total || 0;
+      renderFacets(data.facets || {});
     } catch (e) {
       // Fallback to simple list endpoint
       const res2 = await fetch(`${API_BASE}/api/profiles?${q}`);
@@ -348,6 +380,25 @@
     return (...args) => { clearTimeout(t); t = setTimeout(() => fn(...args), ms); };
   }
   const instant = debounce(() => { skip = 0; fetchProfiles().catch(console.error); }, 350);
+
+  // Skill suggestions for the last comma-separated entry, from the precomputed frequency table
+  const skillOptions = document.getElementById('skillOptions');
+  const suggestSkills = debounce(async () => {
+    const parts = filterSkill.value.split(',');
+    const prefix = parts.pop().trim();
+    const head = parts.length ? parts.join(',') + ', ' : '';
+    try {
+      const res = await fetch(`${API_BASE}/api/skills/autocomplete?${new URLSearchParams({prefix, limit: '10'})}`);
+      if (!res.ok) return;
+      const suggestions = await res.json();
+      skillOptions.innerHTML = suggestions
+        .map(s => `<option value="${escapeHtml(head + s.skill)}">${s.count}</option>`)
+        .join('');
+    } catch (e) {
+      console.error(e);
+    }
+  }, 200);
+  filterSkill.addEventListener('input', suggestSkills);
   [filterGlobal, filterRole, filterLocation, filterSkill, filterCategory].forEach(el => {
     el.addEventListener('input', instant);
   });
@@ -372,7 +423,9 @@
     try {
       const res = await fetch(url, { method: 'POST', body: form });
       if (!res.ok) throw new Error('Upload failed');
-      await res.json();
+      const data = await res.json();
+      const job = await followImportJob(data.job.id);
+      if (job.status !== 'completed') throw new Error(`Import ${job.status}${job.error ? ': ' + job.error : ''}`);
       alert('Import completed');
       fetchTotalProfiles().catch(console.error);
       onSearch();
@@ -385,6 +438,25 @@
     }
   });
 
+  // Show a background import's progress on the upload button until it finishes
+  function followImportJob(jobId) {
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${API_BASE}/api/jobs/${jobId}/events`);
+      source.onmessage = (event) => {
+        const job = JSON.parse(event.data);
+        btnUpload.textContent = `Importing... ${job.rows_processed} rows`;
+        if (['completed', 'failed', 'cancelled'].includes(job.status)) {
+          source.close();
+          resolve(job);
+        }
+      };
+      source.onerror = () => {
+        source.close();
+        reject(new Error('Lost connection to import job'));
+      };
+    });
+  }
+
   // View toggles
   btnViewTable.addEventListener('click', showTable);
   btnViewCategories.addEventListener('click', showCategories);
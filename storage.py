@@ -0,0 +1,447 @@
+import importlib
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from categories import CATEGORY_TOP_N, UNCATEGORIZED, live_category_summaries, stored_category_summaries
+from db import create_indexes, get_collection, get_manifest_collection, get_meta_collection, get_migrations_collection
+from models import ProfileFilter
+from pagination import RECENCY_SORT, apply_cursor
+from search import TEXT_SCORE, build_q_clause, build_search_tokens
+from skill_stats import suggest_skills
+
+# "mongo" (default), "sqlite" (embedded, single node) or "module:Class"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+
+FACET_FIELDS = ("category", "location", "current_company", "skills")
+SEARCH_FIELDS = ["name", "current_role", "current_company", "location", "category", "skills", "education"]
+
+# (set_fields, on_insert) for one profile: fields an import overwrites, and the
+# defaults written only when the profile is new
+ProfileUpsert = Tuple[Dict[str, Any], Dict[str, Any]]
+
+class ProfileRepository:
+    """Profile storage used by the API and the importer.
+
+    Documents go in and come out as dicts shaped like the Mongo documents: "_id",
+    the Profile fields and datetimes as datetime. Every write also stamps "updated_at",
+    so ProfileFilter.updated_after finds changed profiles. Implement this to add a storage engine.
+    """
+
+    name = "base"
+    # Import job state is kept in MongoDB; without it imports run inline
+    supports_jobs = False
+
+    async def create_indexes(self) -> None:
+        raise NotImplementedError
+
+    async def find(self, filters: ProfileFilter, fields: Optional[List[str]] = None, by_relevance: bool = False,
+                   skip: int = 0, limit: int = 10, cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+        """A page of matching profiles, newest first (best text match first with by_relevance).
+
+        `fields` limits the returned fields ("_id" and "last_scraped_at" are always included);
+        `cursor` is a pagination token from encode_cursor and replaces `skip`.
+        """
+        raise NotImplementedError
+
+    async def count(self, filters: ProfileFilter, limit: Optional[int] = None) -> int:
+        """Matching profiles, counting no further than `limit` when given."""
+        raise NotImplementedError
+
+    async def estimated_count(self) -> int:
+        """All profiles, possibly approximate (from collection metadata where the engine has it)."""
+        raise NotImplementedError
+
+    async def faceted_search(self, filters: ProfileFilter, fields: Optional[List[str]], by_relevance: bool, skip: int,
+                             limit: int, cursor: Optional[str], facet_limits: Dict[str, int]) -> Dict[str, Any]:
+        """{"items": page, "total": n, "facets": {facet: [(value, count), ...]}} for FACET_FIELDS entries."""
+        raise NotImplementedError
+
+    async def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def update(self, profile_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Set fields on a profile and return the updated document, or None if it does not exist."""
+        raise NotImplementedError
+
+    async def delete(self, profile_id: str) -> bool:
+        raise NotImplementedError
+
+    async def update_many(self, updates: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Set fields on many profiles in one batch, given (profile id, fields) pairs; returns the profiles matched."""
+        raise NotImplementedError
+
+    async def delete_many(self, profile_ids: List[str]) -> int:
+        """Delete profiles by id in one batch; returns the profiles deleted."""
+        raise NotImplementedError
+
+    async def category_groups(self, limit: int) -> List[Dict[str, Any]]:
+        """[{"category", "count", "profiles": up to `limit` recent summaries}] by descending count."""
+        raise NotImplementedError
+
+    async def content_hashes(self, profile_urls: List[str]) -> Dict[str, Optional[str]]:
+        """Stored content_hash of each profile_url that exists."""
+        raise NotImplementedError
+
+    async def existing_urls(self, profile_urls: List[str]) -> Set[str]:
+        """The given profile_urls that belong to a stored profile."""
+        raise NotImplementedError
+
+    async def upsert_profiles(self, profiles: List[ProfileUpsert]) -> Dict[str, Any]:
+        """Insert or update profiles keyed on profile_url, continuing past failed rows.
+
+        Returns {"inserted", "updated", "errors": [(profile_url, code, message)]}.
+        """
+        raise NotImplementedError
+
+    def iter_profiles(self, filters: Optional[ProfileFilter] = None, fields: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream matching profiles (all by default) newest first, for exports and maintenance; "_id" is always included."""
+        raise NotImplementedError
+
+    async def find_after_id(self, filters: ProfileFilter, fields: Optional[List[str]], after: Any, limit: int) -> List[Dict[str, Any]]:
+        """Up to `limit` matching profiles in "_id" order, after the "_id" value `after` (from the start when None).
+
+        Keyset batches for migrations: rows a batch updates out of the filter do not shift the next one.
+        """
+        raise NotImplementedError
+
+    async def rebuild_search_index(self, batch_size: int = 1000) -> int:
+        """Recompute the q search index for every profile; returns the profiles updated."""
+        raise NotImplementedError
+
+    async def suggest_skills(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """[{"skill", "count"}] for the most common canonical skills starting with prefix."""
+        raise NotImplementedError
+
+    async def get_file_record(self, path: str) -> Optional[Dict[str, Any]]:
+        """Folder import manifest entry: {"sha256", "category", "imported_at"}."""
+        raise NotImplementedError
+
+    async def record_file(self, path: str, sha256: str, category: Optional[str]) -> None:
+        raise NotImplementedError
+
+    async def get_migration(self, name: str) -> Optional[Dict[str, Any]]:
+        """Checkpoint saved by save_migration, or None if the migration never ran."""
+        raise NotImplementedError
+
+    async def claim_migration(self, name: str, fields: Dict[str, Any], stale_before: datetime, restart: bool) -> Optional[Dict[str, Any]]:
+        """Set `fields` (status "running" and the run's owner) on a migration's checkpoint in one atomic step.
+
+        Returns the updated checkpoint, or None while another run holds it (heartbeat_at not
+        older than `stale_before`) or when it has completed and `restart` is not given.
+        """
+        raise NotImplementedError
+
+    async def save_migration(self, name: str, state: Dict[str, Any]) -> bool:
+        """Replace the checkpoint while state["owner"] still holds it; False when another run has taken it over."""
+        raise NotImplementedError
+
+    async def get_generation(self) -> int:
+        """The write generation: how many writes have invalidated cached results, from any process."""
+        raise NotImplementedError
+
+    async def incr_generation(self) -> int:
+        raise NotImplementedError
+
+def _facet_stages(name: str, limit: int) -> List[Dict[str, Any]]:
+    """Stages counting the values of one facet under the current $match."""
+    if name == "category":
+        stages = [{"$project": {"value": {"$ifNull": ["$category", UNCATEGORIZED]}}}]
+    elif name == "skills":
+        stages = [{"$project": {"value": "$skills"}}, {"$unwind": "$value"}]
+    else:
+        stages = [{"$match": {name: {"$nin": [None, ""]}}}, {"$project": {"value": f"${name}"}}]
+    return stages + [
+        {"$group": {"_id": "$value", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+
+def _id_values(profile_ids: List[str]) -> List[Any]:
+    """Each id as stored: imports use string ids, profiles created elsewhere may have ObjectIds."""
+    values: List[Any] = []
+    for profile_id in profile_ids:
+        try:
+            values.append(ObjectId(profile_id))
+        except (InvalidId, TypeError):
+            pass
+        values.append(profile_id)
+    return values
+
+def _projection(fields: Optional[List[str]]) -> Optional[Dict[str, int]]:
+    # last_scraped_at is always read so keyset cursors can be built
+    return {field: 1 for field in list(fields) + ["last_scraped_at"]} if fields is not None else None
+
+class MongoProfileRepository(ProfileRepository):
+    """The profiles collection through Motor, with materialized category and skill summaries."""
+
+    name = "mongo"
+    supports_jobs = True
+
+    @staticmethod
+    def query(filters: ProfileFilter) -> Dict[str, Any]:
+        """Combine the field filters and the global search box into one Mongo query."""
+        criteria = []
+        if filters.role:
+            criteria.append({"current_role": {"$regex": filters.role, "$options": "i"}})
+        if filters.location:
+            criteria.append({"location": {"$regex": filters.location, "$options": "i"}})
+        if filters.skills:
+            # Exact matches on the canonical skills multikey index
+            if len(filters.skills) == 1:
+                criteria.append({"skills": filters.skills[0]})
+            else:
+                criteria.append({"skills": {"$all" if filters.skill_mode == "all" else "$in": filters.skills}})
+        if filters.category:
+            criteria.append({"category": filters.category})
+        if filters.min_months is not None or filters.max_months is not None:
+            months = {}
+            if filters.min_months is not None:
+                months["$gte"] = filters.min_months
+            if filters.max_months is not None:
+                months["$lte"] = filters.max_months
+            criteria.append({"total_experience_months": months})
+        if filters.has_education is not None:
+            missing = [{"education": {"$size": 0}}, {"education": {"$exists": False}}]
+            criteria.append({"$or": missing} if not filters.has_education else {"$nor": missing})
+        if filters.ids:
+            criteria.append({"_id": {"$in": _id_values(filters.ids)}})
+        if filters.updated_after is not None:
+            criteria.append({"updated_at": {"$gt": filters.updated_after}})
+        if filters.q:
+            q_clause = build_q_clause(filters.q, filters.search_mode, filters.include_education)
+            if q_clause:
+                criteria.append(q_clause)
+        return {"$and": criteria} if criteria else {}
+
+    @staticmethod
+    def _id_query(profile_id: str) -> Dict[str, Any]:
+        return {"_id": {"$in": _id_values([profile_id])}}
+
+    async def create_indexes(self) -> None:
+        await create_indexes()
+
+    async def find(self, filters, fields=None, by_relevance=False, skip=0, limit=10, cursor=None):
+        collection = await get_collection()
+        projection = _projection(fields)
+        query = apply_cursor(self.query(filters), cursor)
+        if by_relevance:
+            projection = dict(projection or {}, score=TEXT_SCORE)
+            find = collection.find(query, projection).sort([("score", TEXT_SCORE)] + RECENCY_SORT)
+        else:
+            find = collection.find(query, projection).sort(RECENCY_SORT)
+        if not cursor:
+            find = find.skip(skip)
+        return await find.limit(limit).to_list(length=limit)
+
+    async def count(self, filters, limit=None):
+        collection = await get_collection()
+        query = self.query(filters)
+        if limit:
+            return await collection.count_documents(query, limit=limit)
+        return await collection.count_documents(query)
+
+    async def estimated_count(self):
+        collection = await get_collection()
+        return await collection.estimated_document_count()
+
+    async def faceted_search(self, filters, fields, by_relevance, skip, limit, cursor, facet_limits):
+        collection = await get_collection()
+        # Facets and total describe the whole filter; only the page honours the cursor
+        items_stages: List[Dict[str, Any]] = []
+        if cursor:
+            items_stages.append({"$match": apply_cursor({}, cursor)})
+        else:
+            items_stages.append({"$skip": max(skip, 0)})
+        items_stages.append({"$limit": limit})
+        projection = _projection(fields)
+        if projection:
+            items_stages.append({"$project": projection})
+        sort_stage = dict(RECENCY_SORT)
+        if by_relevance:
+            sort_stage = {"score": TEXT_SCORE, **sort_stage}
+        pipeline = [
+            {"$match": self.query(filters)},
+            {"$sort": sort_stage},
+            {"$facet": {
+                "items": items_stages,
+                "total": [{"$count": "n"}],
+                **{f"facet_{name}": _facet_stages(name, k) for name, k in facet_limits.items()},
+            }},
+        ]
+        result = (await collection.aggregate(pipeline, allowDiskUse=True).to_list(length=1))[0]
+        return {
+            "items": result["items"],
+            "total": result["total"][0]["n"] if result["total"] else 0,
+            "facets": {name: [(group["_id"], group["count"]) for group in result[f"facet_{name}"]] for name in facet_limits},
+        }
+
+    async def get(self, profile_id):
+        collection = await get_collection()
+        return await collection.find_one(self._id_query(profile_id))
+
+    async def update(self, profile_id, fields):
+        collection = await get_collection()
+        return await collection.find_one_and_update(
+            self._id_query(profile_id), {"$set": {**fields, "updated_at": datetime.utcnow()}}, return_document=ReturnDocument.AFTER,
+        )
+
+    async def delete(self, profile_id):
+        collection = await get_collection()
+        result = await collection.delete_one(self._id_query(profile_id))
+        return result.deleted_count > 0
+
+    async def update_many(self, updates):
+        if not updates:
+            return 0
+        collection = await get_collection()
+        now = datetime.utcnow()
+        result = await collection.bulk_write(
+            [UpdateOne(self._id_query(profile_id), {"$set": {**fields, "updated_at": now}}) for profile_id, fields in updates], ordered=False,
+        )
+        return result.matched_count
+
+    async def delete_many(self, profile_ids):
+        if not profile_ids:
+            return 0
+        collection = await get_collection()
+        result = await collection.delete_many({"_id": {"$in": _id_values(profile_ids)}})
+        return result.deleted_count
+
+    async def category_groups(self, limit):
+        groups = []
+        if limit <= CATEGORY_TOP_N:
+            groups = await stored_category_summaries()
+        if not groups:
+            # Summaries not built yet, or more profiles requested than are materialized
+            groups = await live_category_summaries(limit)
+        return groups
+
+    async def content_hashes(self, profile_urls):
+        collection = await get_collection()
+        return {
+            doc["profile_url"]: doc.get("content_hash")
+            async for doc in collection.find({"profile_url": {"$in": profile_urls}}, {"profile_url": 1, "content_hash": 1})
+        }
+
+    async def existing_urls(self, profile_urls):
+        collection = await get_collection()
+        return {doc["profile_url"] async for doc in collection.find({"profile_url": {"$in": profile_urls}}, {"profile_url": 1, "_id": 0})}
+
+    async def upsert_profiles(self, profiles):
+        collection = await get_collection()
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne({"profile_url": set_fields["profile_url"]}, {"$set": {**set_fields, "updated_at": now}, "$setOnInsert": on_insert}, upsert=True)
+            for set_fields, on_insert in profiles
+        ]
+        errors = []
+        try:
+            result = await collection.bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            # Unordered writes keep going past failed rows; report them individually
+            details = e.details
+            for err in details.get("writeErrors", []):
+                errors.append((profiles[err["index"]][0]["profile_url"], err.get("code"), err.get("errmsg", "")))
+        return {"inserted": details.get("nUpserted", 0), "updated": details.get("nMatched", 0), "errors": errors}
+
+    async def iter_profiles(self, filters=None, fields=None):
+        collection = await get_collection()
+        query = self.query(filters) if filters else {}
+        projection = {field: 1 for field in fields} if fields is not None else None
+        async for doc in collection.find(query, projection).sort(RECENCY_SORT).batch_size(1000):
+            yield doc
+
+    async def find_after_id(self, filters, fields, after, limit):
+        collection = await get_collection()
+        criteria = [self.query(filters)]
+        if isinstance(after, ObjectId):
+            criteria.append({"_id": {"$gt": after}})
+        elif after is not None:
+            # String ids sort before ObjectIds, and $gt on a string never reaches them
+            criteria.append({"$or": [{"_id": {"$gt": after}}, {"_id": {"$type": "objectId"}}]})
+        projection = {field: 1 for field in fields} if fields is not None else None
+        return await collection.find({"$and": criteria}, projection).sort("_id", 1).limit(limit).to_list(length=limit)
+
+    async def rebuild_search_index(self, batch_size: int = 1000):
+        collection = await get_collection()
+        updated = 0
+        operations = []
+        projection = {field: 1 for field in SEARCH_FIELDS}
+        async for doc in collection.find({}, projection):
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_tokens": build_search_tokens(doc)}}))
+            if len(operations) >= batch_size:
+                result = await collection.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+                operations = []
+        if operations:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+        return updated
+
+    async def suggest_skills(self, prefix, limit):
+        return await suggest_skills(prefix, limit)
+
+    async def get_file_record(self, path):
+        manifest = await get_manifest_collection()
+        return await manifest.find_one({"_id": path})
+
+    async def record_file(self, path, sha256, category):
+        manifest = await get_manifest_collection()
+        await manifest.replace_one(
+            {"_id": path},
+            {"sha256": sha256, "category": category, "imported_at": datetime.utcnow()},
+            upsert=True,
+        )
+
+    async def get_migration(self, name):
+        migrations = await get_migrations_collection()
+        return await migrations.find_one({"_id": name}, {"_id": 0})
+
+    async def claim_migration(self, name, fields, stale_before, restart):
+        migrations = await get_migrations_collection()
+        claimable = ["running"] if restart else ["running", "completed"]
+        query = {"_id": name, "$or": [
+            {"status": {"$nin": claimable}},
+            {"status": "running", "heartbeat_at": {"$not": {"$gte": stale_before}}},
+        ]}
+        try:
+            state = await migrations.find_one_and_update(query, {"$set": fields}, upsert=True, return_document=ReturnDocument.AFTER)
+        except DuplicateKeyError:
+            # The checkpoint exists but did not match: held by another run, or completed
+            return None
+        state.pop("_id", None)
+        return state
+
+    async def save_migration(self, name, state):
+        migrations = await get_migrations_collection()
+        result = await migrations.replace_one({"_id": name, "owner": state.get("owner")}, state)
+        return result.matched_count > 0
+
+    async def get_generation(self):
+        meta = await get_meta_collection()
+        doc = await meta.find_one({"_id": "generation"})
+        return doc["value"] if doc else 0
+
+    async def incr_generation(self):
+        meta = await get_meta_collection()
+        doc = await meta.find_one_and_update(
+            {"_id": "generation"}, {"$inc": {"value": 1}}, upsert=True, return_document=ReturnDocument.AFTER,
+        )
+        return doc["value"]
+
+def load_repository(spec: str = STORAGE_BACKEND) -> ProfileRepository:
+    if spec == "mongo":
+        return MongoProfileRepository()
+    if spec == "sqlite":
+        from sqlite_storage import SQLiteProfileRepository
+
+        return SQLiteProfileRepository()
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+repository = load_repository()
@@ -0,0 +1,111 @@
+import math
+import os
+from typing import Any, Dict, List
+import pandas as pd
+import pytest
+from benchmarks.generator import generate_rows
+from utils import clean_profile_data, clean_profiles_frame
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), "..", "data_to_import", "Omaza Games profiles - SSE.csv")
+# The bundled sheet's columns, as the "search_export" mapping in etl.py renames them
+SAMPLE_COLUMNS = {
+    "Name": "name",
+    "Title": "current_role",
+    "Location": "location",
+    "Education": "education",
+    "Experience Details": "experience",
+    "Total Experience": "total_experience",
+    "Skills": "skills",
+    "Profile URL": "profile_url",
+}
+
+def _normalized(value: Any) -> Any:
+    """NaN never equals NaN, so compare raw cells with NaN as None."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _normalized(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalized(item) for item in value]
+    return value
+
+def _comparable(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Profiles without the random profile_id of rows that have no URL."""
+    result = []
+    for profile in profiles:
+        profile = _normalized(profile)
+        if not profile["profile_url"]:
+            profile.pop("profile_id")
+        result.append(profile)
+    return result
+
+def assert_equivalent(frame: pd.DataFrame) -> None:
+    expected = [clean_profile_data(row) for row in frame.to_dict("records")]
+    assert _comparable(clean_profiles_frame(frame)) == _comparable(expected)
+
+def test_bundled_sheet_matches_row_cleaning():
+    frame = pd.read_csv(SAMPLE_CSV, dtype=str).rename(columns=SAMPLE_COLUMNS)[list(SAMPLE_COLUMNS.values())]
+    assert len(frame) > 200
+    assert_equivalent(frame)
+
+def test_generated_sheet_matches_row_cleaning():
+    frame = pd.DataFrame(generate_rows(3000, seed=11)).rename(columns=SAMPLE_COLUMNS)
+    # Blank cells arrive as NaN from read_csv; every third row also drops its
+    # "Total Experience" so the months come from the merged date ranges
+    frame = frame.mask(frame == "")
+    frame.loc[frame.index % 3 == 0, "total_experience"] = None
+    assert_equivalent(frame)
+
+def test_chunk_with_offset_index_matches_row_cleaning():
+    frame = pd.read_csv(SAMPLE_CSV, dtype=str).rename(columns=SAMPLE_COLUMNS)[list(SAMPLE_COLUMNS.values())]
+    assert_equivalent(frame.iloc[100:150])
+
+@pytest.mark.parametrize("row", [
+    # Every cell missing
+    {key: None for key in SAMPLE_COLUMNS.values()},
+    {key: float("nan") for key in SAMPLE_COLUMNS.values()},
+    # Empty and separator-only skills, whitespace everywhere
+    {"name": "  Jane  ", "current_role": " ", "skills": "", "education": " | ", "profile_url": " linkedin.com/in/jane/ "},
+    {"name": "Jane", "skills": " ,;| ", "profile_url": "https://in.linkedin.com/in/Jane-Doe?trk=x"},
+    {"name": "Jane", "skills": "React.js; ReactJS | python3, Python", "profile_url": "https://www.linkedin.com/in/ACoAACbYR_wBhtL_sGCHArmaWxlo3wdtphlxSOE"},
+    # Malformed experience details
+    {"name": "A", "experience": "|| ||", "profile_url": "https://www.linkedin.com/in/a/"},
+    {"name": "B", "experience": "Acme | | ", "total_experience": "n/a", "profile_url": "https://www.linkedin.com/in/b/"},
+    {"name": "C", "experience": "Acme | Engineer | 2020 -", "profile_url": "https://www.linkedin.com/in/c/"},
+    {"name": "D", "experience": "Acme | Engineer | Present || Engineer | Engineer | Jan 2020 - Present", "profile_url": "https://www.linkedin.com/in/d/"},
+    {"name": "E", "experience": "Acme | Lead | Foo 2019 - Bar 2021 Â· 2 yrs", "total_experience": "2 yrs", "profile_url": "https://www.linkedin.com/in/e/"},
+    # Overlapping, adjacent and ongoing ranges without a total; tenure at a current company
+    {"name": "J", "experience": "Acme | Dev | Jan 2018 - Jun 2019 || Acme | Lead | Jul 2019 - Present || Foo | Advisor | 2019 - 2020 | 2021 - 2022", "total_experience": "no total", "profile_url": "https://www.linkedin.com/in/j/"},
+    {"name": "K", "experience": "Acme | Dev | Mar 2015 - Jan 2012 || Bar | Dev | Dec 2010 - Feb 2011", "profile_url": "https://www.linkedin.com/in/k/"},
+    # Not a LinkedIn profile URL
+    {"name": "F", "current_company": "Foo Inc", "profile_url": "https://example.com/people/F"},
+    # URL spellings: user info, port and case in the host, encoded and unicode slugs,
+    # scheme-relative and non-profile LinkedIn paths
+    {"name": "L", "profile_url": "https://user@WWW.LinkedIn.com:443/in/Jane-Doe/?x=1#y"},
+    {"name": "M", "profile_url": "m.linkedin.com/in/j%C3%A9r%C3%B4me"},
+    {"name": "N", "profile_url": "https://uk.linkedin.com/in/jérôme/"},
+    {"name": "O", "profile_url": "//linkedin.com/in/o//"},
+    {"name": "P", "profile_url": "https://www.linkedin.com/company/acme//"},
+    {"name": "Q", "profile_url": "ftp://linkedin.com.evil.com/in/q"},
+])
+def test_edge_case_rows_match_row_cleaning(row):
+    frame = pd.DataFrame([row], dtype=object)
+    assert_equivalent(frame)
+
+def test_pre_split_list_cells_match_row_cleaning():
+    frame = pd.DataFrame([{
+        "name": "G",
+        "skills": "Node, nodejs, Go",
+        "education": ["IIT Delhi", ""],
+        "experience": ["Acme | Engineer | Jan 2020 - Present", ""],
+        "profile_url": "https://www.linkedin.com/in/g/",
+    }], dtype=object)
+    assert_equivalent(frame)
+
+def test_empty_frame_matches_row_cleaning():
+    assert_equivalent(pd.DataFrame({key: [] for key in SAMPLE_COLUMNS.values()}, dtype=object))
+    assert clean_profiles_frame(pd.DataFrame()) == []
+
+def test_missing_columns_match_row_cleaning():
+    frame = pd.DataFrame([{"name": "H", "profile_url": "https://www.linkedin.com/in/h/"}, {"name": "I"}], dtype=object)
+    assert_equivalent(frame)
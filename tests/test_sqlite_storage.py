@@ -0,0 +1,98 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List
+import pytest
+from etl import _build_upsert
+from models import ProfileFilter
+from pagination import encode_cursor
+from sqlite_storage import SQLiteProfileRepository
+from utils import clean_profile_data
+
+ROWS = [
+    {"name": "Asha Rao", "current_role": "Senior Software Engineer", "location": "Bengaluru, Karnataka, India",
+     "skills": "React.js, Node.js, Kafka", "profile_url": "https://www.linkedin.com/in/asha/"},
+    {"name": "Vikram Singh", "current_role": "Engineering Manager", "location": "Pune, Maharashtra, India",
+     "skills": "Java | Spring Boot | Kafka", "profile_url": "https://www.linkedin.com/in/vikram/"},
+    {"name": "Neha Gupta", "current_role": "Frontend Engineer", "location": "Bengaluru, Karnataka, India",
+     "skills": "ReactJS; TypeScript", "profile_url": "https://www.linkedin.com/in/neha/"},
+    {"name": "Rahul Mehta", "current_role": "Game Developer", "location": "Mumbai, Maharashtra, India",
+     "skills": "Unity, C#", "profile_url": "https://www.linkedin.com/in/rahul/"},
+    {"name": "Priya Nair", "current_role": "Data Engineer", "location": "Bengaluru, Karnataka, India",
+     "skills": "Python, Kafka, Spark", "profile_url": "https://www.linkedin.com/in/priya/"},
+]
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def upserts(rows: List[Dict[str, Any]], category: str = "SSE"):
+    return [_build_upsert({**clean_profile_data(row), "category": category})[0] for row in rows]
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = SQLiteProfileRepository(str(tmp_path / "profiles.db"))
+    run(repository.create_indexes())
+    result = run(repository.upsert_profiles(upserts(ROWS)))
+    assert (result["inserted"], result["updated"], result["errors"]) == (len(ROWS), 0, [])
+    return repository
+
+def test_upsert_updates_existing_profiles(repository):
+    changed = dict(ROWS[0], current_role="Staff Engineer")
+    result = run(repository.upsert_profiles(upserts([changed, {"name": "New", "profile_url": "https://www.linkedin.com/in/new/"}])))
+    assert (result["inserted"], result["updated"]) == (1, 1)
+    assert run(repository.count(ProfileFilter())) == len(ROWS) + 1
+    urls = [ROWS[0]["profile_url"], "https://www.linkedin.com/in/missing/"]
+    assert run(repository.existing_urls(urls)) == {ROWS[0]["profile_url"]}
+    assert set(run(repository.content_hashes(urls))) == {ROWS[0]["profile_url"]}
+    stored = run(repository.find(ProfileFilter(role="Staff")))
+    assert [doc["name"] for doc in stored] == ["Asha Rao"]
+
+def test_keyset_pages_cover_every_profile_once(repository):
+    everything = [doc["_id"] for doc in run(repository.find(ProfileFilter(), limit=100))]
+    seen, cursor = [], None
+    while True:
+        page = run(repository.find(ProfileFilter(), ["name"], limit=2, cursor=cursor))
+        if not page:
+            break
+        seen += [doc["_id"] for doc in page]
+        cursor = encode_cursor(page[-1])
+    assert seen == everything
+    assert len(set(seen)) == len(ROWS)
+
+def test_facets_count_matching_profiles(repository):
+    filters = ProfileFilter(skills=["kafka"])
+    result = run(repository.faceted_search(filters, ["name"], False, 0, 10, None, {"skills": 10, "location": 10}))
+    kafka = [clean_profile_data(row) for row in ROWS if "Kafka" in row["skills"]]
+    assert result["total"] == len(kafka) == len(result["items"])
+    assert dict(result["facets"]["skills"]) == Counter(skill for profile in kafka for skill in profile["skills"])
+    assert dict(result["facets"]["location"]) == Counter(profile["location"] for profile in kafka)
+
+def test_full_text_search(repository):
+    # Prefix mode matches every token as a prefix; text mode matches any token
+    prefix = run(repository.find(ProfileFilter(q="reac beng", search_mode="prefix")))
+    assert sorted(doc["name"] for doc in prefix) == ["Asha Rao", "Neha Gupta"]
+    text = run(repository.find(ProfileFilter(q="unity spark", search_mode="text")))
+    assert sorted(doc["name"] for doc in text) == ["Priya Nair", "Rahul Mehta"]
+    assert run(repository.count(ProfileFilter(q="nomatch"))) == 0
+
+def test_bulk_update_and_delete(repository):
+    docs = run(repository.find(ProfileFilter(location="Bengaluru"), ["name"]))
+    ids = [str(doc["_id"]) for doc in docs]
+    assert run(repository.update_many([(profile_id, {"category": "Backend"}) for profile_id in ids])) == len(ids)
+    assert run(repository.count(ProfileFilter(category="Backend"))) == len(ids)
+
+    assert run(repository.delete_many(ids)) == len(ids)
+    assert run(repository.count(ProfileFilter())) == len(ROWS) - len(ids)
+    assert run(repository.get(ids[0])) is None
+    # Deleted rows leave the full-text index too
+    assert run(repository.count(ProfileFilter(q="bengaluru"))) == 0
+
+def test_writes_stamp_updated_at(repository):
+    before = datetime.utcnow()
+    assert run(repository.count(ProfileFilter(updated_after=before))) == 0
+    profile_id = str(run(repository.find(ProfileFilter(role="Game")))[0]["_id"])
+    run(repository.update(profile_id, {"current_role": "Lead Game Developer"}))
+    run(repository.upsert_profiles(upserts([ROWS[0]])))
+    changed = run(repository.find(ProfileFilter(updated_after=before), ["name", "updated_at"]))
+    assert sorted(doc["name"] for doc in changed) == ["Asha Rao", "Rahul Mehta"]
+    assert all(doc["updated_at"] > before for doc in changed)
@@ -1,7 +1,35 @@
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Set, Tuple
+from datetime import datetime
+from urllib.parse import quote, unquote, urlsplit
 import uuid
+import numpy as np
 import pandas as pd
+from skills import CANONICAL_BY_KEY, KEY_STRIP_RE, WHITESPACE_RE, canonical_skills
+
+# Patterns shared by the per-row and DataFrame cleaning paths
+COMPANY_SUFFIX_RE = re.compile(r'\s+(inc|llc|ltd|corp|corporation|company|co\.?|ltd\.?|inc\.?|llc\.?)$')
+SKILL_SEPARATOR_RE = re.compile(r'[;|,]')
+PROFILE_ID_RE = re.compile(r'/in/([^/?]+)')
+# linkedin.com, www., mobile and country subdomains (in., uk., ...)
+LINKEDIN_HOST_RE = re.compile(r'^(?:[a-z]{1,3}\.)?linkedin\.com$')
+# Host (without user info and port) and path of a URL with a netloc, as urlsplit splits it
+URL_PARTS_RE = re.compile(r'^(?:[A-Za-z][A-Za-z0-9+.\-]*:)?//(?:[^/?#]*@)?([^/?#:]*)(?::[^/?#]*)?([^?#]*)')
+# Slugs that quote(unquote(slug)) leaves unchanged
+PLAIN_SLUG_RE = re.compile(r'^[A-Za-z0-9\-_.~]+$')
+# URLs canonical_profile_url returns unchanged, the usual spelling in exports
+CANONICAL_PROFILE_URL_RE = re.compile(r'^https://www\.linkedin\.com/in/[A-Za-z0-9\-_.~]+/$')
+# Control characters and IPv6 brackets, which urlsplit treats specially
+URL_SPECIAL_RE = re.compile(r'[\x00-\x1f\[\]]')
+# "Jul 2023 - Sep 2024", "Apr 2024 - Present" or "2019 - 2021"
+DATE_RANGE_RE = re.compile(
+    r'(?:([a-z]{3})[a-z]*\.?\s+)?(\d{4})\s*[-\u2013]\s*(?:(present)|(?:([a-z]{3})[a-z]*\.?\s+)?(\d{4}))',
+    re.IGNORECASE,
+)
+# "3 yrs 0 mos", "1 yr", "6 mos"
+DURATION_RE = re.compile(r'(\d+)\s*(yr|mo)', re.IGNORECASE)
+MONTHS = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
 
 def clean_string(value) -> str:
     """Trim spaces and normalize string."""
@@ -13,65 +41,436 @@ def normalize_company_name(company: str) -> str:
     """Normalize company names by removing common suffixes and standardizing."""
     company = clean_string(company).lower()
     # Remove common suffixes
-    company = re.sub(r'\s+(inc|llc|ltd|corp|corporation|company|co\.?|ltd\.?|inc\.?|llc\.?)$', '', company)
+    company = COMPANY_SUFFIX_RE.sub('', company)
     return company.title()
 
 def parse_skills(skills_str: str) -> List[str]:
-    """Convert skills string to list. Supports comma, semicolon, and pipe separators."""
+    """Convert skills string to a canonical lowercase list. Supports comma, semicolon, and pipe separators."""
     if not skills_str:
         return []
-    skills = re.split(r'[;|,]', skills_str)
-    return [clean_string(skill) for skill in skills if skill.strip()]
+    skills = SKILL_SEPARATOR_RE.split(skills_str)
+    return canonical_skills(clean_string(skill) for skill in skills if skill.strip())
 
 def standardize_date(date_str: str) -> str:
     """Standardize date format. For now, just clean it."""
     return clean_string(date_str)
 
+def parse_duration_months(text: str) -> Optional[int]:
+    """Months in a LinkedIn duration such as "3 yrs 0 mos"; None when there is no duration."""
+    parts = DURATION_RE.findall(clean_string(text))
+    if not parts:
+        return None
+    return sum(int(n) * (12 if unit.lower() == 'yr' else 1) for n, unit in parts)
+
+def _month(name: Optional[str], year: str) -> str:
+    return f"{year}-{MONTHS.get((name or 'jan').lower(), 1):02d}"
+
+def parse_experience(value) -> List[Dict[str, Any]]:
+    """Parse "Company | Role | Mon YYYY - Mon YYYY · duration || ..." into Experience dicts.
+
+    Dates become "YYYY-MM"; an ongoing role ("Present") has end_date None. The scraper
+    repeats nested positions as "Role | Role | dates", which are dropped when the same
+    role and dates already appear under a company.
+    """
+    if isinstance(value, list):
+        segments = [clean_string(v) for v in value]
+    else:
+        segments = clean_string(value).split('||')
+    entries = []
+    for segment in segments:
+        fields = []
+        dates = None
+        # The separator dot often arrives as the mojibake "Â·"
+        for part in segment.replace('\u00c2\u00b7', '\u00b7').split('|'):
+            part = part.strip()
+            if not part:
+                continue
+            match = DATE_RANGE_RE.search(part)
+            if match:
+                dates = dates or match
+            else:
+                fields.append(part)
+        if not fields and not dates:
+            continue
+        company, role = (fields[0], fields[1]) if len(fields) >= 2 else ('', fields[0] if fields else '')
+        if company == role:
+            company = ''
+        entry = {'company': company, 'role': role, 'start_date': None, 'end_date': None}
+        if dates:
+            start_month, start_year, present, end_month, end_year = dates.groups()
+            entry['start_date'] = _month(start_month, start_year)
+            entry['end_date'] = None if present else _month(end_month, end_year)
+        entries.append(entry)
+    dated = {(e['role'], e['start_date'], e['end_date']) for e in entries if e['company'] and e['start_date']}
+    return [
+        e for e in entries
+        if e['company'] or not e['start_date'] or (e['role'], e['start_date'], e['end_date']) not in dated
+    ]
+
+def experience_stats(entries: List[Dict[str, Any]], total_experience: Optional[str] = None, today: Optional[datetime] = None) -> Tuple[Optional[int], Optional[datetime]]:
+    """(total experience in months, start of the current tenure) for parsed experience entries.
+
+    The sheet's "Total Experience" wins; otherwise overlapping date ranges are merged
+    and counted inclusively, like LinkedIn does. The current tenure starts with the
+    earliest role at a company the person still works at (or the earliest ongoing role).
+    """
+    today = today or datetime.utcnow()
+    now = today.year * 12 + today.month - 1
+    ranges = []
+    starts = []
+    for e in entries:
+        if not e.get('start_date'):
+            continue
+        year, month = map(int, e['start_date'].split('-'))
+        start = year * 12 + month - 1
+        if e.get('end_date'):
+            end_year, end_month = map(int, e['end_date'].split('-'))
+            end = end_year * 12 + end_month - 1
+        else:
+            end = now
+        starts.append((start, e.get('company'), not e.get('end_date')))
+        ranges.append((start, max(start, end)))
+
+    months = parse_duration_months(total_experience) if total_experience else None
+    if months is None and ranges:
+        months = 0
+        current_start, current_end = None, None
+        for start, end in sorted(ranges):
+            if current_end is None or start > current_end + 1:
+                if current_end is not None:
+                    months += current_end - current_start + 1
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        months += current_end - current_start + 1
+    current_companies = {company for _, company, ongoing in starts if ongoing and company}
+    tenure = [start for start, company, ongoing in starts if ongoing or company in current_companies]
+    tenure_start = None
+    if tenure:
+        start = min(tenure)
+        tenure_start = datetime(start // 12, start % 12 + 1, 1)
+    return months, tenure_start
+
+def canonical_profile_url(url: str) -> str:
+    """One spelling per LinkedIn profile: https://www.linkedin.com/in/<slug>/.
+
+    Country and mobile subdomains, query strings, fragments and a missing scheme or
+    trailing slash all map to the same URL. The slug keeps its case: member ids
+    ("ACoAA...") are case-sensitive. Other URLs are returned as is.
+    """
+    if not url:
+        return url
+    parts = urlsplit(url if '://' in url else f'https://{url}')
+    if not LINKEDIN_HOST_RE.match((parts.hostname or '').lower()):
+        return url
+    match = PROFILE_ID_RE.search(parts.path)
+    if match:
+        path = f"/in/{quote(unquote(match.group(1)), safe='-_.~')}"
+    else:
+        path = parts.path.rstrip('/')
+    return f'https://www.linkedin.com{path}/'
+
+def restored_profile_url(profile: Dict[str, Any]) -> str:
+    """Canonical URL of a stored profile; a slug stored lowercased gets its case back from the sheet row in raw_json."""
+    url = canonical_profile_url(profile.get('profile_url') or '')
+    source = canonical_profile_url(clean_string((profile.get('raw_json') or {}).get('profile_url')))
+    if source and source.lower() == url.lower():
+        return source
+    return url
+
 def generate_profile_id(url: str) -> str:
     """Generate a unique profile_id from URL or UUID."""
     if url:
         # Extract profile ID from LinkedIn URL
-        match = re.search(r'/in/([^/?]+)', url)
+        match = PROFILE_ID_RE.search(url)
         if match:
             return match.group(1)
+        # Derived from the URL so re-imports keep the same id (and content hash)
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, url))
     return str(uuid.uuid4())
 
-def deduplicate_profiles(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Remove duplicates based on profile_url."""
-    seen_urls = set()
-    unique_profiles = []
+def iter_unique_profiles(profiles: Iterable[Dict[str, Any]], seen_urls: Optional[Set[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Lazily drop duplicates based on profile_url; seen_urls carries state across chunks."""
+    if seen_urls is None:
+        seen_urls = set()
     for profile in profiles:
         url = profile.get('profile_url', '')
         if url and url not in seen_urls:
             seen_urls.add(url)
-            unique_profiles.append(profile)
-    return unique_profiles
+            yield profile
+
+def deduplicate_profiles(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Remove duplicates based on profile_url."""
+    return list(iter_unique_profiles(profiles))
+
+def parse_education(value) -> List[Dict[str, str]]:
+    """Education entries from a list or a "|"-separated string; only the institute is known."""
+    # Education: keep as simple list/str for now
+    if isinstance(value, list):
+        return [{'degree': '', 'institute': clean_string(e)} for e in value if clean_string(e)]
+    edu_str = clean_string(value)
+    return [{'degree': '', 'institute': e.strip()} for e in edu_str.split('|') if e.strip()] if edu_str else []
 
 def clean_profile_data(raw_data: Dict[str, Any]) -> Dict[str, Any]:
     """Clean and transform raw profile data."""
     cleaned = {}
-    cleaned['profile_id'] = generate_profile_id(clean_string(raw_data.get('profile_url', '')))
+    profile_url = canonical_profile_url(clean_string(raw_data.get('profile_url', '')))
+    cleaned['profile_id'] = generate_profile_id(profile_url)
     cleaned['name'] = clean_string(raw_data.get('name', ''))
     cleaned['current_role'] = clean_string(raw_data.get('current_role', ''))
     cleaned['current_company'] = normalize_company_name(clean_string(raw_data.get('current_company', '')))
     cleaned['location'] = clean_string(raw_data.get('location', ''))
     cleaned['skills'] = parse_skills(clean_string(raw_data.get('skills', '')))
-    # Education: keep as simple list/str for now
-    education = raw_data.get('education')
-    if isinstance(education, list):
-        cleaned['education'] = [{'degree': '', 'institute': clean_string(e)} for e in education if clean_string(e)]
-    else:
-        edu_str = clean_string(education)
-        cleaned['education'] = ([{'degree': '', 'institute': e.strip()} for e in edu_str.split('|') if e.strip()] if edu_str else [])
+    cleaned['education'] = parse_education(raw_data.get('education'))
 
-    # Experience: store as raw string for now; advanced parsing can be added later
-    exp = raw_data.get('experience')
-    if isinstance(exp, list):
-        cleaned['experience'] = [{'company': '', 'role': clean_string(e)} for e in exp if clean_string(e)]
-    else:
-        exp_str = clean_string(exp)
-        cleaned['experience'] = ([{'company': '', 'role': e.strip()} for e in exp_str.split('|') if e.strip()] if exp_str else [])
+    cleaned['experience'] = parse_experience(raw_data.get('experience'))
+    cleaned['total_experience'] = clean_string(raw_data.get('total_experience')) or None
+    cleaned['total_experience_months'], cleaned['current_tenure_start'] = experience_stats(cleaned['experience'], cleaned['total_experience'])
 
-    cleaned['profile_url'] = clean_string(raw_data.get('profile_url', ''))
+    cleaned['profile_url'] = profile_url
     cleaned['raw_json'] = raw_data
     return cleaned
+
+def clean_profiles_frame(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Column-wise equivalent of clean_profile_data for a frame of mapped rows.
+
+    The frame's columns are model keys (as produced by the ETL mapping). Output
+    matches [clean_profile_data(row) for row in frame.to_dict('records')].
+    """
+    frame = frame.reset_index(drop=True)
+    raw_rows = frame.to_dict('records') if len(frame.columns) else [{} for _ in range(len(frame))]
+
+    profile_url = _canonical_profile_url_column(_clean_column(frame, 'profile_url'))
+    profile_id = profile_url.str.extract(PROFILE_ID_RE, expand=False)
+    missing_id = profile_id.isna()
+    if missing_id.any():
+        profile_id[missing_id] = [
+            str(uuid.uuid5(uuid.NAMESPACE_URL, url)) if url else str(uuid.uuid4())
+            for url in profile_url[missing_id].tolist()
+        ]
+    company = (
+        _clean_column(frame, 'current_company')
+        .str.lower()
+        .str.replace(COMPANY_SUFFIX_RE, '', regex=True)
+        .str.title()
+    )
+    skills = _group_lists(_canonical_skill_column(_explode_column(frame, 'skills', ('|', ';', ','))), len(frame))
+    education = _group_lists(_explode_column(frame, 'education', '|'), len(frame))
+    entries = _experience_entries(frame)
+    experience = _group_lists(pd.Series([
+        {'company': company, 'role': role, 'start_date': start, 'end_date': end}
+        for company, role, start, end in zip(
+            entries['company'].tolist(), entries['role'].tolist(), entries['start_date'].tolist(), entries['end_date'].tolist(),
+        )
+    ], index=entries.index, dtype=object), len(frame))
+    total_experience = _clean_column(frame, 'total_experience')
+    months, tenure_start = _experience_stats_columns(entries, total_experience, datetime.utcnow())
+    total_experience = total_experience.where(total_experience != "", None)
+
+    return [
+        {
+            'profile_id': pid,
+            'name': name,
+            'current_role': role,
+            'current_company': comp,
+            'location': loc,
+            'skills': skill_list,
+            'education': [{'degree': '', 'institute': e} for e in edu],
+            'experience': exp,
+            'total_experience': total,
+            'total_experience_months': months,
+            'current_tenure_start': tenure_start,
+            'profile_url': url,
+            'raw_json': raw,
+        }
+        for pid, name, role, comp, loc, skill_list, edu, exp, total, months, tenure_start, url, raw in zip(
+            profile_id.tolist(),
+            _clean_column(frame, 'name').tolist(),
+            _clean_column(frame, 'current_role').tolist(),
+            company.tolist(),
+            _clean_column(frame, 'location').tolist(),
+            skills,
+            education,
+            experience,
+            total_experience.tolist(),
+            months,
+            tenure_start,
+            profile_url.tolist(),
+            raw_rows,
+        )
+    ]
+
+def _clean_column(frame: pd.DataFrame, column: str) -> pd.Series:
+    """Vectorized clean_string over one column ("" when the column is absent)."""
+    if column not in frame.columns:
+        return pd.Series([""] * len(frame), index=frame.index, dtype=object)
+    series = frame[column]
+    return series.where(series.notna(), "").astype(str).str.strip()
+
+def _experience_entries(frame: pd.DataFrame) -> pd.DataFrame:
+    """Column-wise parse_experience: one row per kept entry, indexed by frame row, in sheet order.
+
+    Besides the Experience fields, start and end hold the dates as month numbers
+    (year * 12 + month - 1) for the stats; end is NaN for an ongoing role.
+    """
+    segments = _explode_column(frame, 'experience', ('||',))
+    segment_rows = segments.index.to_numpy()
+    # The separator dot often arrives as the mojibake "Â·"
+    parts = (
+        segments.reset_index(drop=True)
+        .str.replace('\u00c2\u00b7', '\u00b7', regex=False)
+        .str.split('|', regex=False)
+        .explode()
+        .str.strip()
+    )
+    parts = parts[parts != ""]
+    # Date ranges repeat across profiles, so each distinct part is matched once
+    codes, distinct = pd.factorize(parts)
+    dates = _date_ranges(pd.Series(distinct, dtype=object)).iloc[codes].set_axis(parts.index)
+    is_date = dates['start'].notna()
+
+    # The first two other parts are company and role; the first date range wins
+    fields = parts[~is_date]
+    position = fields.groupby(level=0).cumcount()
+    first = fields[(position == 0).to_numpy()]
+    second = fields[(position == 1).to_numpy()]
+    dates = dates[is_date]
+    dates = dates[~dates.index.duplicated()]
+    segment_ids = pd.RangeIndex(len(segments))
+    first = first.reindex(segment_ids)
+    second = second.reindex(segment_ids)
+    dates = dates.reindex(segment_ids)
+    kept = (first.notna() | dates['start'].notna()).to_numpy()
+
+    has_both = second.notna()
+    company = first.where(has_both, "")
+    role = second.where(has_both, first.fillna(""))
+    company = company.where(company != role, "")
+    entries = dates.assign(company=company, role=role)[kept]
+    entries.index = segment_rows[kept]
+
+    # The scraper repeats nested positions as "Role | Role | dates"; drop them when the
+    # same role and dates already appear under a company
+    dated = (entries['company'] != "") & entries['start_date'].notna()
+    keys = pd.MultiIndex.from_arrays([entries.index, entries['role'], entries['start_date'].fillna(""), entries['end_date'].fillna("")])
+    repeated = ~dated & entries['start_date'].notna() & keys.isin(keys[dated.to_numpy()])
+    return entries[~repeated.to_numpy()]
+
+def _date_ranges(parts: pd.Series) -> pd.DataFrame:
+    """The first DATE_RANGE_RE match of each part as start_date/end_date ("YYYY-MM", None when
+    missing or ongoing) and start/end month numbers (NaN likewise)."""
+    dates = parts.str.extract(DATE_RANGE_RE)
+    dates.columns = ['start_month', 'start_year', 'present', 'end_month', 'end_year']
+    has_start = dates['start_year'].notna()
+    has_end = has_start & dates['present'].isna()
+    start_month = dates['start_month'].str.lower().map(MONTHS).fillna(1).astype(int)
+    end_month = dates['end_month'].str.lower().map(MONTHS).fillna(1).astype(int)
+    return pd.DataFrame({
+        'start_date': (dates['start_year'] + '-' + start_month.map('{:02d}'.format)).where(has_start, None),
+        'end_date': (dates['end_year'] + '-' + end_month.map('{:02d}'.format)).where(has_end, None),
+        'start': (pd.to_numeric(dates['start_year']) * 12 + start_month - 1).where(has_start),
+        'end': (pd.to_numeric(dates['end_year']) * 12 + end_month - 1).where(has_end),
+    }, index=parts.index)
+
+def _experience_stats_columns(entries: pd.DataFrame, total_experience: pd.Series, today: datetime) -> Tuple[List[Optional[int]], List[Optional[datetime]]]:
+    """Column-wise experience_stats for every frame row: (total months, current tenure start)."""
+    now = today.year * 12 + today.month - 1
+    dated = entries[entries['start'].notna()]
+    rows = dated.index.to_numpy()
+    start = dated['start'].to_numpy(dtype=np.int64)
+    end = np.maximum(start, dated['end'].fillna(now).to_numpy(dtype=np.int64))
+
+    # The sheet's "Total Experience" wins; few distinct totals exist, so each is parsed once
+    codes, distinct = pd.factorize(total_experience)
+    durations = pd.Series(distinct, dtype=object).str.extractall(DURATION_RE)
+    distinct_months = pd.Series(np.nan, index=pd.RangeIndex(len(distinct)))
+    if len(durations):
+        amounts = durations[0].astype(int) * np.where(durations[1].str.lower() == 'yr', 12, 1)
+        distinct_months.update(amounts.groupby(level=0).sum())
+    months = pd.Series(np.append(distinct_months.to_numpy(), np.nan)[codes])
+    # Otherwise merge overlapping or adjacent date ranges and count them inclusively
+    ranges = pd.DataFrame({'row': rows, 'start': start, 'end': end}).sort_values(['row', 'start', 'end'], kind='stable')
+    latest_end = ranges.groupby('row')['end'].cummax().groupby(ranges['row']).shift()
+    block = (latest_end.isna() | (ranges['start'] > latest_end + 1)).cumsum()
+    blocks = ranges.groupby(block).agg(row=('row', 'first'), start=('start', 'min'), end=('end', 'max'))
+    merged = (blocks['end'] - blocks['start'] + 1).groupby(blocks['row']).sum()
+    months = months.fillna(merged.reindex(months.index))
+
+    # The current tenure starts with the earliest role at a company the person still
+    # works at, or with the earliest ongoing role
+    ongoing = dated['end'].isna().to_numpy()
+    companies = dated['company'].to_numpy()
+    pairs = pd.MultiIndex.from_arrays([rows, companies])
+    current = pairs[ongoing & (companies != "")]
+    candidate = ongoing | pairs.isin(current)
+    tenure = pd.Series(start[candidate], index=rows[candidate])
+    tenure = tenure.groupby(level=0).min().reindex(months.index)
+    codes, distinct = pd.factorize(tenure)
+    starts = [datetime(int(value) // 12, int(value) % 12 + 1, 1) for value in distinct]
+    tenure_start = [starts[code] if code >= 0 else None for code in codes]
+    return [None if pd.isna(value) else int(value) for value in months.tolist()], tenure_start
+
+def _canonical_profile_url_column(urls: pd.Series) -> pd.Series:
+    """Column-wise canonical_profile_url over cleaned URLs."""
+    done = urls.str.match(CANONICAL_PROFILE_URL_RE)
+    if done.all():
+        return urls
+    canonical = urls.copy()
+    canonical[~done] = _canonicalize_urls(urls[~done])
+    return canonical
+
+def _canonicalize_urls(urls: pd.Series) -> pd.Series:
+    """canonical_profile_url with str.extract: LinkedIn host and /in/ slug rebuilt, other URLs as is."""
+    absolute = urls.where(urls.str.contains('://', regex=False), 'https://' + urls)
+    parts = absolute.str.extract(URL_PARTS_RE)
+    host, path = parts[0].str.lower(), parts[1]
+    linkedin = host.str.match(LINKEDIN_HOST_RE).fillna(False).astype(bool)
+    slug = path.str.extract(PROFILE_ID_RE, expand=False)
+    unusual = slug.notna() & ~slug.str.match(PLAIN_SLUG_RE).fillna(False).astype(bool)
+    if unusual.any():
+        slug[unusual] = slug[unusual].map(lambda value: quote(unquote(value), safe='-_.~'))
+    path = ('/in/' + slug).where(slug.notna(), path.str.rstrip('/'))
+    canonical = ('https://www.linkedin.com' + path + '/').where(linkedin, urls)
+    # Control characters and bracketed hosts keep urlsplit's exact handling
+    special = urls.str.contains(URL_SPECIAL_RE)
+    if special.any():
+        canonical[special] = urls[special].map(canonical_profile_url)
+    return canonical
+
+def _explode_column(frame: pd.DataFrame, column: str, separators: Sequence[str] = ('|',)) -> pd.Series:
+    """Split a column on any of `separators` into one stripped, non-empty part per entry, indexed by row.
+
+    Pre-split list cells are exploded as they are, like the per-row cleaners do.
+    """
+    if column not in frame.columns:
+        return pd.Series([], dtype=object)
+    series = frame[column]
+    is_list = series.map(type) == list
+    text = series.mask(is_list, "")
+    text = text.where(text.notna(), "").astype(str)
+    # Fold every separator into the first one so a plain (non-regex) split suffices
+    for sep in separators[1:]:
+        text = text.str.replace(sep, separators[0], regex=False)
+    parts = text.str.split(separators[0], regex=False)
+    if is_list.any():
+        parts = parts.mask(is_list, series)
+    parts = parts.explode()
+    parts = parts.where(parts.notna(), "").astype(str).str.strip()
+    return parts[parts != ""]
+
+def _canonical_skill_column(skills: pd.Series) -> pd.Series:
+    """Column-wise canonical_skills over exploded skills: canonical names, first spelling per row kept."""
+    # Sheets reuse a small vocabulary, so each distinct spelling is normalized once
+    codes, spellings = pd.factorize(skills)
+    normalized = pd.Series(spellings, dtype=object).str.lower().str.replace(WHITESPACE_RE, ' ', regex=True)
+    keys = normalized.str.replace(KEY_STRIP_RE, '', regex=True)
+    canonical = keys.map(CANONICAL_BY_KEY).fillna(normalized).to_numpy()[codes]
+    repeated = pd.DataFrame({'row': skills.index, 'skill': canonical}).duplicated().to_numpy()
+    return pd.Series(canonical, index=skills.index)[~repeated]
+
+def _group_lists(parts: pd.Series, length: int) -> List[List[Any]]:
+    """Gather an exploded Series (sorted by row position 0..length-1) back into one list per row."""
+    # Rows are contiguous after explode, so each row's entries are one slice of the values
+    bounds = np.searchsorted(parts.index.to_numpy(), np.arange(length + 1))
+    values = parts.tolist()
+    return [values[start:end] for start, end in zip(bounds[:-1], bounds[1:])]